@@ -1,35 +1,53 @@
-from flask import Flask, app, request, jsonify, render_template_string, send_file
+from flask import Flask, Request, app, request, has_request_context, stream_with_context, jsonify, render_template_string, send_file, make_response, Response, current_app
 import os
 import uuid
 import json
-from datetime import UTC, datetime, timezone
+from datetime import UTC, date, datetime, timezone
 import logging
 from typing import Dict, Any, Optional, List
 import io
 from flask_cors import CORS
-from reportlab.lib.pagesizes import A4, inch
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
-from reportlab.lib import colors
-from reportlab.lib.enums import TA_CENTER, TA_LEFT
 import click
-from flask.cli import with_appcontext
+from flask.cli import with_appcontext, AppGroup
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.sansio.multipart import MultipartDecoder, File, Data, NeedData, Epilogue
+from werkzeug.utils import secure_filename
 from dotenv import load_dotenv
-import smtplib
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
-from email.mime.application import MIMEApplication
-import requests
-import urllib.request
-from PIL import Image as PILImage
-import psycopg2
-from psycopg2.extras import DictCursor
-from psycopg2 import sql
 import html
 import re
 import unicodedata
 import base64
+import sys
 from io import BytesIO
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import hmac
+from functools import wraps, lru_cache
+from collections import OrderedDict
+import contextvars
+import atexit
+import queue
+import random
+import math
+import logging.handlers
+import copy
+import shutil
+import zipfile
+import hashlib
+import importlib.util
+import tempfile
+from decimal import Decimal
+
+try:
+    import orjson
+except ImportError:  # optional; the stdlib json module is used instead
+    orjson = None
+
+# ReportLab, requests, psycopg2 and the email MIME classes are imported inside
+# the functions that use them so that gunicorn boots, `flask` CLI commands and
+# health-only containers do not pay for them. See warm_up().
 
 load_dotenv()
 
@@ -39,22 +57,162 @@ POSTGRES_PORT = os.getenv('POSTGRES_PORT', '5432')
 POSTGRES_DB = os.getenv('POSTGRES_DB', 'insurance_db')
 POSTGRES_USER = os.getenv('POSTGRES_USER', 'postgres')
 POSTGRES_PASSWORD = os.getenv('POSTGRES_PASSWORD', 'postgres')
+POSTGRES_CONNECT_TIMEOUT = int(os.getenv('POSTGRES_CONNECT_TIMEOUT', '5'))
 
 # Email configuration
-SMTP_SERVER = 'smtp.gmail.com'
-SMTP_PORT = 465
+SMTP_SERVER = os.getenv('SMTP_SERVER', 'smtp.gmail.com')
+SMTP_PORT = int(os.getenv('SMTP_PORT', '465'))
 SMTP_USERNAME = os.getenv('SMTP_USERNAME')
 SMTP_PASSWORD = os.getenv('SMTP_PASSWORD')
 
-# Email recipients configuration
-PRIMARY_RECIPIENTS = [
+# Email recipients configuration (PRIMARY_RECIPIENTS is comma-separated)
+PRIMARY_RECIPIENTS = [r.strip() for r in os.getenv('PRIMARY_RECIPIENTS', '').split(',') if r.strip()] or [
     "customercare@mua.rw", 
     "info@radiant.rw", 
     "info@rw.sanlamallianz.com", 
     "Rwanda@britam.Com", 
     "info@edencaremedical.com"
 ]
-CC_RECIPIENT = "info@mylifeline.world"
+CC_RECIPIENT = os.getenv('CC_RECIPIENT', "info@mylifeline.world")
+
+# Notification dispatch configuration
+NOTIFICATION_MAX_WORKERS = int(os.getenv('NOTIFICATION_MAX_WORKERS', '8'))
+NOTIFICATION_TIMEOUT = float(os.getenv('NOTIFICATION_TIMEOUT', '30'))
+NOTIFY_PER_INSURER = os.getenv('NOTIFY_PER_INSURER', 'false').lower() == 'true'
+# Queued digests and customer confirmations are given up after this many retries
+NOTIFICATION_MAX_ATTEMPTS = int(os.getenv('NOTIFICATION_MAX_ATTEMPTS', '10'))
+
+# Circuit breakers (SMTP, logo fetch, database): consecutive failures before
+# a dependency is treated as down, and seconds before it is probed again
+BREAKER_FAILURE_THRESHOLD = int(os.getenv('BREAKER_FAILURE_THRESHOLD', '5'))
+BREAKER_RESET_TIMEOUT = float(os.getenv('BREAKER_RESET_TIMEOUT', '30'))
+LOGO_FETCH_TIMEOUT = float(os.getenv('LOGO_FETCH_TIMEOUT', '5'))
+
+# Per-request time budget, kept below gunicorn's worker timeout. The reserve
+# is held back for deferring unfinished work; the PDF stage needs at least
+# DEADLINE_PDF_MIN seconds of budget, otherwise it is deferred.
+REQUEST_DEADLINE = float(os.getenv('REQUEST_DEADLINE', str(int(os.getenv('GUNICORN_TIMEOUT', '30')) - 5)))
+DEADLINE_RESERVE = float(os.getenv('DEADLINE_RESERVE', '3'))
+DEADLINE_PDF_MIN = float(os.getenv('DEADLINE_PDF_MIN', '2'))
+
+# Digest notifications: admin recipients listed here (comma-separated) receive
+# one summary email per scheduled `flask notifications send-digests` run
+# instead of an email per submission. Everyone else stays in immediate mode.
+DIGEST_RECIPIENTS = {r.strip().lower() for r in os.getenv('DIGEST_RECIPIENTS', '').split(',') if r.strip()}
+DIGEST_ATTACHMENT = os.getenv('DIGEST_ATTACHMENT', 'zip').lower()  # zip or links
+# Bundles larger than this fall back to links (Gmail rejects messages over 25MB
+# after base64 encoding).
+DIGEST_MAX_ATTACHMENT_BYTES = int(os.getenv('DIGEST_MAX_ATTACHMENT_BYTES', str(15 * 1024 * 1024)))
+
+# Public links in notification emails. Download links carry an HMAC-signed,
+# expiring token; recipients in PDF_LINK_RECIPIENTS ("*" for everyone) get the
+# link instead of the PDF attached, which keeps each message to a few KB.
+PUBLIC_BASE_URL = os.getenv('PUBLIC_BASE_URL', 'http://localhost:5000').rstrip('/')
+# Without PDF_LINK_SECRET or SECRET_KEY no link is signed or accepted
+PDF_LINK_SECRET = os.getenv('PDF_LINK_SECRET') or os.getenv('SECRET_KEY')
+PDF_LINK_TTL = int(os.getenv('PDF_LINK_TTL', str(14 * 24 * 3600)))
+PDF_LINK_RECIPIENTS = {r.strip().lower() for r in os.getenv('PDF_LINK_RECIPIENTS', '').split(',') if r.strip()}
+# When true, /download-pdf requires a valid token (or the admin key)
+REQUIRE_SIGNED_PDF_LINKS = os.getenv('REQUIRE_SIGNED_PDF_LINKS', 'false').lower() == 'true'
+
+# Enumerated and typed (integer, count, date) form fields are checked in
+# 'warn' mode (logged) until the frontend's values are confirmed, then set to
+# 'enforce'. SCHEMA_ENUM_MODE is the older name of this setting.
+SCHEMA_CHECK_MODE = (os.getenv('SCHEMA_CHECK_MODE') or os.getenv('SCHEMA_ENUM_MODE', 'warn')).lower()
+
+# JSON serialization: 'orjson' (used when installed) or 'stdlib'
+JSON_PROVIDER = os.getenv('JSON_PROVIDER', 'orjson').lower()
+
+# Admin API configuration (support/insurer lookup endpoints)
+ADMIN_API_KEY = os.getenv('ADMIN_API_KEY')
+
+# Submission cache configuration
+SUBMISSION_CACHE_SIZE = int(os.getenv('SUBMISSION_CACHE_SIZE', '1024'))
+SUBMISSION_CACHE_TTL = float(os.getenv('SUBMISSION_CACHE_TTL', '300'))
+SUBMISSION_CACHE_REDIS_URL = os.getenv('SUBMISSION_CACHE_REDIS_URL')
+# TTL of each worker's in-process copies. Updates made by other workers or by
+# CLI commands (compaction, digests) only reach them when they expire, so it
+# is kept short; SUBMISSION_CACHE_TTL applies to the shared tier.
+SUBMISSION_CACHE_LOCAL_TTL = float(os.getenv('SUBMISSION_CACHE_LOCAL_TTL', '5'))
+
+# Logging configuration
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'json').lower()  # json or text
+# Per-level sampling for high-volume lines, e.g. "INFO=0.1,DEBUG=0.01".
+# WARNING and above are never sampled.
+LOG_SAMPLE_RATES = os.getenv('LOG_SAMPLE_RATES', '')
+
+# Traffic capture for replay_capture.py (hooks are only installed when
+# enabled). One file per worker; {pid} is replaced with the worker's pid.
+CAPTURE_ENABLED = os.getenv('CAPTURE_ENABLED', 'false').lower() == 'true'
+CAPTURE_PATH = os.getenv('CAPTURE_PATH', os.path.join('logs', 'capture', 'requests-{pid}.jsonl'))
+CAPTURE_SAMPLE_RATE = float(os.getenv('CAPTURE_SAMPLE_RATE', '1'))
+CAPTURE_MAX_BYTES = int(os.getenv('CAPTURE_MAX_BYTES', str(100 * 1024 * 1024)))
+CAPTURE_BACKUP_COUNT = int(os.getenv('CAPTURE_BACKUP_COUNT', '10'))
+# Set on instances that serve replay_capture.py; the app then refuses to start
+# unless the SMTP server and every recipient are overridden
+REPLAY_TARGET = os.getenv('REPLAY_TARGET', 'false').lower() == 'true'
+
+# Request profiling configuration (hooks are only installed when enabled)
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'false').lower() == 'true'
+PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', '0'))
+PROFILE_DIR = os.getenv('PROFILE_DIR', os.path.join('logs', 'profiles'))
+
+# Memory watchdog: RSS growth is tracked per route, and a worker whose RSS
+# passes MEMORY_BUDGET_MB (0 = no budget) is recycled by gunicorn's
+# post_request hook. /debug/memory traces this many frames per allocation.
+MEMORY_WATCHDOG_ENABLED = os.getenv('MEMORY_WATCHDOG_ENABLED', 'false').lower() == 'true'
+MEMORY_BUDGET_MB = float(os.getenv('MEMORY_BUDGET_MB', '0'))
+MEMORY_TRACE_FRAMES = int(os.getenv('MEMORY_TRACE_FRAMES', '1'))
+
+# Query instrumentation: statements slower than DB_SLOW_QUERY_MS (0 = off) are
+# logged with their parameter types, and a sample of them is re-run under
+# EXPLAIN (ANALYZE, BUFFERS) into DB_EXPLAIN_DIR, at most once per statement
+# per DB_EXPLAIN_INTERVAL seconds.
+DB_SLOW_QUERY_MS = float(os.getenv('DB_SLOW_QUERY_MS', '500'))
+DB_EXPLAIN_SAMPLE_RATE = float(os.getenv('DB_EXPLAIN_SAMPLE_RATE', '0.1'))
+DB_EXPLAIN_INTERVAL = float(os.getenv('DB_EXPLAIN_INTERVAL', '300'))
+DB_EXPLAIN_DIR = os.getenv('DB_EXPLAIN_DIR', os.path.join('logs', 'explain'))
+
+# Monthly submissions partitions: `flask partitions maintain` keeps this many
+# future months created and, with a retention (0 = keep everything), detaches
+# older months into the archive schema (or drops them with --drop).
+PARTITION_PREMAKE_MONTHS = int(os.getenv('PARTITION_PREMAKE_MONTHS', '3'))
+PARTITION_RETENTION_MONTHS = int(os.getenv('PARTITION_RETENTION_MONTHS', '0'))
+PARTITION_ARCHIVE_SCHEMA = os.getenv('PARTITION_ARCHIVE_SCHEMA', 'archive')
+
+# PDF storage configuration
+PDF_STORAGE_BACKEND = os.getenv('PDF_STORAGE_BACKEND', 'local').lower()  # local, s3 or postgres
+PDF_STORAGE_ROOT = os.getenv('PDF_STORAGE_ROOT')  # defaults to <instance>/pdfs
+PDF_S3_BUCKET = os.getenv('PDF_S3_BUCKET')
+PDF_S3_PREFIX = os.getenv('PDF_S3_PREFIX', 'pdfs/')
+PDF_S3_ENDPOINT_URL = os.getenv('PDF_S3_ENDPOINT_URL')  # e.g. a local MinIO for testing
+PDF_ARCHIVE_AFTER_DAYS = int(os.getenv('PDF_ARCHIVE_AFTER_DAYS', '90'))
+PDF_ARCHIVE_SEGMENT_MAX_BYTES = int(os.getenv('PDF_ARCHIVE_SEGMENT_MAX_BYTES', str(256 * 1024 * 1024)))
+
+# Supporting document uploads (/submission/<id>/documents)
+DOCUMENT_MAX_FILE_BYTES = int(os.getenv('DOCUMENT_MAX_FILE_BYTES', str(10 * 1024 * 1024)))
+DOCUMENT_MAX_SUBMISSION_BYTES = int(os.getenv('DOCUMENT_MAX_SUBMISSION_BYTES', str(25 * 1024 * 1024)))
+DOCUMENT_MAX_FILES = int(os.getenv('DOCUMENT_MAX_FILES', '10'))
+DOCUMENT_UPLOAD_TTL = int(os.getenv('DOCUMENT_UPLOAD_TTL', str(7 * 24 * 3600)))
+# Add each submission's documents to the digest ZIP bundle
+DIGEST_INCLUDE_DOCUMENTS = os.getenv('DIGEST_INCLUDE_DOCUMENTS', 'false').lower() == 'true'
+
+# Bundle export (/submissions/export, `flask pdfs export`). Merged PDFs are
+# assembled on disk before streaming, so their size is capped.
+EXPORT_MERGE_MAX_DOCUMENTS = int(os.getenv('EXPORT_MERGE_MAX_DOCUMENTS', '500'))
+
+# /stats responses are cached in-process for this many seconds
+STATS_CACHE_TTL = float(os.getenv('STATS_CACHE_TTL', '60'))
+
+# Server-sent events (/submission/<id>/events): keep-alive interval, how
+# long one stream stays open, and the client reconnect delay
+SSE_HEARTBEAT_INTERVAL = float(os.getenv('SSE_HEARTBEAT_INTERVAL', '15'))
+SSE_MAX_DURATION = float(os.getenv('SSE_MAX_DURATION', '300'))
+SSE_RETRY_MS = int(os.getenv('SSE_RETRY_MS', '5000'))
+
+# `flask ingest`: records per COPY batch
+INGEST_BATCH_SIZE = int(os.getenv('INGEST_BATCH_SIZE', '1000'))
 
 # Brand configuration
 LOGO_URL = "https://i.imgur.com/i6Lfiku.png"
@@ -151,6 +309,68 @@ def format_field_value(field_name: str, value: Any) -> str:
     else:
         return sanitize_for_pdf(value)
 
+# ======================
+# JSON Serialization
+# ======================
+
+USE_ORJSON = orjson is not None and JSON_PROVIDER == 'orjson'
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def json_dumps(obj, default=_json_default) -> str:
+    """Serialize to a JSON string, using orjson when it is available."""
+    if USE_ORJSON:
+        return orjson.dumps(obj, default=default, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(obj, default=default, ensure_ascii=False)
+
+def json_loads(data):
+    """Parse JSON from str, bytes or memoryview."""
+    if USE_ORJSON:
+        return orjson.loads(data)
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)
+
+def decode_json_value(value):
+    """Return a JSON column value decoded, whether or not the driver already decoded it."""
+    if value is None or isinstance(value, (dict, list)):
+        return value
+    return json_loads(value)
+
+def to_jsonb(value):
+    """Wrap a value for a JSONB query parameter, serialized with json_dumps."""
+    from psycopg2.extras import Json
+    return Json(value, dumps=json_dumps)
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson.
+
+    Keeps Flask's behaviour for sorted keys, HTTP-date datetimes and the
+    ``default`` hook, and falls back to the stdlib provider without orjson.
+    """
+    
+    def dumps(self, obj, **kwargs):
+        if not USE_ORJSON:
+            return super().dumps(obj, **kwargs)
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if kwargs.get('sort_keys', self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=kwargs.get('default', self.default), option=option).decode()
+    
+    def loads(self, s, **kwargs):
+        if not USE_ORJSON:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
 # ======================
 # Core Classes
 # ======================
@@ -171,7 +391,7 @@ class InsuranceSubmission:
         return {
             'id': self.id,
             'submission_type': self.submission_type,
-            'submission_data': json.dumps(self.submission_data),
+            'submission_data': json_dumps(self.submission_data),
             'created_at': self.created_at,
             'updated_at': self.updated_at,
             'email_sent': self.email_sent,
@@ -182,7 +402,7 @@ class InsuranceSubmission:
     
     @classmethod
     def from_dict(cls, data):
-        submission = cls(data['submission_type'], json.loads(data['submission_data']))
+        submission = cls(data['submission_type'], decode_json_value(data['submission_data']))
         submission.id = data['id']
         submission.created_at = data['created_at']
         submission.updated_at = data['updated_at']
@@ -194,18 +414,33 @@ class InsuranceSubmission:
 
 class PDFGenerator:
     def __init__(self):
+        from reportlab.lib.styles import getSampleStyleSheet
         self.styles = getSampleStyleSheet()
         self.setup_custom_styles()
         self.logo_data = self.get_logo_data()
     
     def get_logo_data(self) -> Optional[bytes]:
-        """Download logo and return as bytes with fallback to local logo."""
+        """Download logo and return as bytes with fallback to local logo.
+        
+        Returns None (the PDF uses the text logo) while the logo breaker is open.
+        """
+        import requests
+        if not logo_breaker.allow():
+            return None
         try:
             # Try to download from URL first
-            response = requests.get(LOGO_URL)
-            if response.status_code == 200:
-                return response.content
-            
+            response = requests.get(LOGO_URL, timeout=LOGO_FETCH_TIMEOUT)
+        except Exception as e:
+            logo_breaker.record_failure(e)
+            logger.warning("Could not load logo: %s", e)
+            return None
+        
+        if response.status_code == 200:
+            logo_breaker.record_success()
+            return response.content
+        logo_breaker.record_failure(f"HTTP {response.status_code}")
+        
+        try:
             # If download fails, try local fallback
             local_logo_path = os.path.join(os.path.dirname(__file__), 'static', 'logo.png')
             if os.path.exists(local_logo_path):
@@ -214,11 +449,15 @@ class PDFGenerator:
             
             return None
         except Exception as e:
-            logger.warning(f"Could not load logo: {str(e)}")
+            logger.warning("Could not load logo: %s", e)
             return None
     
     def setup_custom_styles(self):
         """Setup custom paragraph styles matching the brand."""
+        from reportlab.lib import colors
+        from reportlab.lib.enums import TA_CENTER
+        from reportlab.lib.styles import ParagraphStyle
+        
         self.styles.add(ParagraphStyle(
             name='CustomTitle',
             parent=self.styles['Heading1'],
@@ -318,6 +557,10 @@ class PDFGenerator:
     
     def generate_pdf(self, submission_type: str, data: Dict[str, Any], submission_id: str) -> io.BytesIO:
         """Generate professional PDF document with brand styling."""
+        from reportlab.lib import colors
+        from reportlab.lib.pagesizes import A4, inch
+        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
+        
         buffer = io.BytesIO()
         
         doc = SimpleDocTemplate(
@@ -340,7 +583,7 @@ class PDFGenerator:
                 story.append(logo)
                 story.append(Spacer(1, 10))
             except Exception as e:
-                logger.warning(f"Could not add logo to PDF: {str(e)}")
+                logger.warning("Could not add logo to PDF: %s", e)
         else:
             text_logo = Paragraph("<b>LifeLine Insurance</b>", self.styles['CustomTitle'])
             story.append(text_logo)
@@ -418,7 +661,7 @@ class PDFGenerator:
                 
                 story.extend(footer_content)
             except Exception as e:
-                logger.warning(f"Could not add logo to footer: {str(e)}")
+                logger.warning("Could not add logo to footer: %s", e)
         
         story.append(Spacer(1, 20))
         
@@ -471,211 +714,2867 @@ class PDFGenerator:
                     # Restore the state of the canvas
                     canvas.restoreState()
                 except Exception as e:
-                    logger.warning(f"Could not draw logos on page: {str(e)}")
+                    logger.warning("Could not draw logos on page: %s", e)
         
         doc.build(story, onFirstPage=add_header_footer, onLaterPages=add_header_footer)
         buffer.seek(0)
         return buffer
 
 # ======================
-# Database Functions
+# Logging
 # ======================
 
-def get_db_connection():
-    """Get a PostgreSQL database connection."""
-    conn = psycopg2.connect(
-        host=POSTGRES_HOST,
-        port=POSTGRES_PORT,
-        dbname=POSTGRES_DB,
-        user=POSTGRES_USER,
-        password=POSTGRES_PASSWORD,
-        cursor_factory=DictCursor
-    )
-    return conn
+request_id_var = contextvars.ContextVar('request_id', default='-')
 
-def init_database(app):
-    """Initialize PostgreSQL database and create tables if needed."""
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Create submissions table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS submissions (
-                id VARCHAR(36) PRIMARY KEY,
-                submission_type VARCHAR(20) NOT NULL,
-                submission_data JSONB NOT NULL,
-                created_at TIMESTAMP WITH TIME ZONE NOT NULL,
-                updated_at TIMESTAMP WITH TIME ZONE NOT NULL,
-                email_sent BOOLEAN DEFAULT FALSE,
-                customer_email_sent BOOLEAN DEFAULT FALSE,
-                pdf_generated BOOLEAN DEFAULT FALSE,
-                pdf_path TEXT
-            )
-        """)
-        
-        # Create indexes
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_submissions_id ON submissions (id)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_submissions_created_at ON submissions (created_at)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_submissions_type ON submissions (submission_type)")
+def get_request_id() -> str:
+    """Return the id of the request being handled ('-' outside a request)."""
+    return request_id_var.get()
+
+class RequestContextFilter(logging.Filter):
+    """Attach the current request id to every log record."""
+    
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+class SamplingFilter(logging.Filter):
+    """Keep only a fraction of records at the configured levels."""
+    
+    def __init__(self, rates: Dict[int, float]):
+        super().__init__()
+        self.rates = {level: rate for level, rate in rates.items() if level < logging.WARNING}
+    
+    def filter(self, record):
+        rate = self.rates.get(record.levelno)
+        return rate is None or random.random() < rate
+
+    @staticmethod
+    def parse_rates(spec: str) -> Dict[int, float]:
+        """Parse "INFO=0.1,DEBUG=0.01" into {logging.INFO: 0.1, ...}."""
+        rates = {}
+        for item in filter(None, (part.strip() for part in spec.split(','))):
+            level_name, _, rate = item.partition('=')
+            level = logging.getLevelName(level_name.strip().upper())
+            if isinstance(level, int) and rate:
+                rates[level] = min(max(float(rate), 0.0), 1.0)
+        return rates
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line."""
+    
+    RESERVED = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'request_id'}
+    
+    def format(self, record):
+        entry = {
+            'timestamp': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'request_id': getattr(record, 'request_id', '-'),
+        }
+        # Fields passed with extra={...}
+        for key, value in vars(record).items():
+            if key not in self.RESERVED:
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json_dumps(entry, default=str)
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread.
+    
+    The stock prepare() formats the message and traceback on the logging
+    thread and drops exc_info, so JsonFormatter never sees the exception.
+    Here only msg and args are merged, into a copy of the record.
+    """
+    
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+_log_listener = None
+
+def _start_log_listener(log_queue, handlers):
+    global _log_listener
+    _log_listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _log_listener.start()
+
+def configure_logging():
+    """Route application logging through a queue to a background writer thread.
+    
+    Request threads only filter the record and put it on the queue; JSON
+    formatting and I/O happen in a QueueListener thread. The listener is
+    restarted after fork so preloaded gunicorn workers keep logging.
+    """
+    if _log_listener is not None:
+        return
+    
+    output = logging.StreamHandler(sys.stdout)
+    if LOG_FORMAT == 'json':
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s'))
+    
+    log_queue = queue.SimpleQueue()
+    queue_handler = DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(RequestContextFilter())
+    sample_rates = SamplingFilter.parse_rates(LOG_SAMPLE_RATES)
+    if sample_rates:
+        queue_handler.addFilter(SamplingFilter(sample_rates))
+    
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(LOG_LEVEL)
+    
+    _start_log_listener(log_queue, [output])
+    atexit.register(lambda: _log_listener and _log_listener.stop())
+    os.register_at_fork(after_in_child=lambda: _start_log_listener(log_queue, [output]))
+
+# ======================
+# Profiling
+# ======================
+
+PROFILE_MAX_DEPTH = 64
+PROFILE_MIN_US = 1
+
+def _profile_frame_name(func) -> str:
+    filename, lineno, name = func
+    if filename == '~':
+        return name
+    return f"{name} ({os.path.basename(filename)}:{lineno})"
+
+def pstats_to_collapsed(stats) -> List[str]:
+    """Convert cProfile statistics to collapsed-stack flamegraph lines.
+    
+    cProfile records caller/callee edges rather than full stacks, so each
+    function's time is attributed down every path in proportion to the time
+    recorded on the edges along it. Values are microseconds.
+    """
+    raw = stats.stats
+    callees = {}
+    for func, (_cc, _nc, _tt, _ct, callers) in raw.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, {})[func] = edge
+    
+    totals = {}
+    
+    def walk(func, stack, on_stack, scale):
+        _cc, _nc, tt, ct, _callers = raw[func]
+        stack = stack + [_profile_frame_name(func)]
+        self_us = int(tt * scale * 1_000_000)
+        if self_us >= PROFILE_MIN_US:
+            key = ';'.join(stack)
+            totals[key] = totals.get(key, 0) + self_us
         
-        conn.commit()
-        cursor.close()
-        conn.close()
+        if len(stack) >= PROFILE_MAX_DEPTH:
+            return
         
-        logger.info("✅ Database tables created and indexes established")
+        for callee, edge in callees.get(func, {}).items():
+            callee_ct = raw[callee][3]
+            if callee in on_stack or callee_ct <= 0:
+                continue
+            callee_scale = edge[3] * scale / callee_ct
+            if callee_ct * callee_scale * 1_000_000 >= PROFILE_MIN_US:
+                walk(callee, stack, on_stack | {callee}, callee_scale)
+    
+    for func, (_cc, _nc, _tt, _ct, callers) in raw.items():
+        if not callers:
+            walk(func, [], {func}, 1.0)
+    
+    return [f"{stack} {value}" for stack, value in sorted(totals.items())]
+
+def save_profile(profiler, request_id: str, endpoint: str) -> str:
+    """Write a pstats file and a collapsed-stack file; return the pstats path."""
+    import pstats
+    
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    timestamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')
+    safe_endpoint = re.sub(r'[^A-Za-z0-9_]', '_', endpoint or 'unknown')
+    base = os.path.join(PROFILE_DIR, f"{timestamp}_{request_id}_{safe_endpoint}")
+    
+    stats = pstats.Stats(profiler)
+    stats.dump_stats(base + '.pstats')
+    with open(base + '.collapsed', 'w') as f:
+        f.write('\n'.join(pstats_to_collapsed(stats)) + '\n')
+    
+    return base + '.pstats'
+
+def should_profile_request() -> bool:
+    """Profile when an admin asks with X-Profile: 1, or by sampling."""
+    if request.headers.get('X-Profile') == '1' and is_admin_request():
         return True
-    except Exception as e:
-        logger.error(f"❌ Database initialization failed: {str(e)}")
-        return False
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+def register_profiling_hooks(app):
+    """Wrap selected requests in cProfile.
+    
+    Nothing is registered unless PROFILING_ENABLED or PROFILE_SAMPLE_RATE is
+    set, so disabled profiling adds no per-request work. Under gevent the
+    profile also contains time from other greenlets that ran on the worker.
+    """
+    if not PROFILING_ENABLED and PROFILE_SAMPLE_RATE <= 0:
+        return
+    
+    @app.before_request
+    def start_profiler():
+        if should_profile_request():
+            import cProfile
+            profiler = cProfile.Profile()
+            request.environ['insurance.profiler'] = profiler
+            profiler.enable()
+
+    @app.teardown_request
+    def stop_profiler(exc):
+        profiler = request.environ.pop('insurance.profiler', None)
+        if profiler is None:
+            return
+        
+        profiler.disable()
+        try:
+            path = save_profile(profiler, get_request_id(), request.endpoint)
+            logger.info("Saved request profile to %s", path, extra={'profile': path})
+        except Exception as e:
+            logger.error("Could not save request profile: %s", e)
 
 # ======================
-# Utility Functions
+# Memory Diagnostics
 # ======================
 
-def normalize_field_key(field: str) -> str:
-    """Normalize field names to match form data keys."""
-    return (field.replace("(", "")
-                .replace(")", "")
-                .replace("/", "")
-                .replace(",", "")
-                .replace("  ", " ")
-                .replace(" ", "_")
-                .lower())
+def current_rss() -> int:
+    """Return this process's resident set size in bytes.
+    
+    Reads /proc on Linux; elsewhere falls back to the peak RSS from getrusage.
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
 
-def get_fields_for_type(submission_type: str) -> List[str]:
-    """Get field list based on submission type."""
-    return INDIVIDUAL_FIELDS if submission_type == "individual" else COMPANY_FIELDS
+class MemoryWatchdog:
+    """Track RSS growth per endpoint and flag the worker once it exceeds its budget.
+    
+    Growth is measured around each request, so under gevent it also includes
+    allocations by requests running concurrently; compare routes over many
+    requests rather than single samples. gunicorn's post_request hook checks
+    ``restart_requested`` and lets the worker finish its in-flight requests
+    and exit, as it does after max_requests.
+    """
+    
+    def __init__(self, budget_bytes: int):
+        self.budget_bytes = budget_bytes
+        self.restart_requested = False
+        self.routes = {}
+        self._lock = threading.Lock()
+    
+    def record(self, endpoint: str, rss_before: int, rss_after: int) -> None:
+        growth = rss_after - rss_before
+        with self._lock:
+            route = self.routes.setdefault(endpoint, {'requests': 0, 'growth_bytes': 0, 'max_growth_bytes': 0})
+            route['requests'] += 1
+            route['growth_bytes'] += growth
+            route['max_growth_bytes'] = max(route['max_growth_bytes'], growth)
+        
+        if self.budget_bytes and rss_after > self.budget_bytes and not self.restart_requested:
+            self.restart_requested = True
+            logger.warning("Worker %s RSS %.1f MB is over the %.1f MB budget; restarting after in-flight requests",
+                           os.getpid(), rss_after / 1048576, self.budget_bytes / 1048576)
+    
+    def route_summary(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            routes = {endpoint: dict(route) for endpoint, route in self.routes.items()}
+        for route in routes.values():
+            route['avg_growth_kb'] = round(route['growth_bytes'] / route['requests'] / 1024, 1)
+            route['growth_mb'] = round(route.pop('growth_bytes') / 1048576, 2)
+            route['max_growth_kb'] = round(route.pop('max_growth_bytes') / 1024, 1)
+        return dict(sorted(routes.items(), key=lambda item: -item[1]['growth_mb']))
 
-def validate_submission_data_enhanced(submission_type: str, data: Dict[str, Any]) -> tuple[bool, str]:
-    """Enhanced validation with better error handling."""
-    if submission_type not in ["individual", "company"]:
-        return False, "Invalid submission type. Must be 'individual' or 'company'."
+memory_watchdog = MemoryWatchdog(int(MEMORY_BUDGET_MB * 1048576))
+
+def memory_restart_requested() -> bool:
+    """Whether this worker is over MEMORY_BUDGET_MB and should be recycled."""
+    return memory_watchdog.restart_requested
+
+def register_memory_hooks(app):
+    """Measure RSS around each request (only when the watchdog is enabled)."""
+    if not MEMORY_WATCHDOG_ENABLED and MEMORY_BUDGET_MB <= 0:
+        return
     
-    if not data:
-        return False, "Submission data cannot be empty."
-    
-    # Define required fields based on type
-    if submission_type == "individual":
-        required_fields = {
-            "full_name": "Full Name",
-            "email": "Email Address", 
-            "phone_number": "Phone Number"
-        }
-    else:
-        required_fields = {
-            "company_name": "Company Name",
-            "contact_email": "Contact Email",
-            "contact_phone_number": "Contact Phone Number"
-        }
+    @app.before_request
+    def measure_rss_before():
+        request.environ['insurance.rss_before'] = current_rss()
     
-    # Check required fields
-    for field_key, field_display in required_fields.items():
-        value = data.get(field_key, '').strip()
-        if not value or value == 'N/A':
-            return False, f"Required field '{field_display}' is missing or empty."
-    
-    # Email validation
-    email_field = "email" if submission_type == "individual" else "contact_email"
-    email = data.get(email_field, '').strip()
-    if email and email != 'N/A':
-        if '@' not in email or '.' not in email:
-            return False, f"Invalid email format: {email}"
-        
-        # Basic email regex
-        email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        if not re.match(email_pattern, email):
-            return False, f"Invalid email format: {email}"
-    
-    # Phone validation
-    phone_field = "phone_number" if submission_type == "individual" else "contact_phone_number"
-    phone = data.get(phone_field, '').strip()
-    if phone and phone != 'N/A':
-        # Remove common formatting characters
-        phone_clean = re.sub(r'[\s\-\(\)\.+]', '', phone)
-        if not phone_clean.isdigit() or len(phone_clean) < 10:
-            return False, f"Invalid phone number format: {phone}"
-    
-    return True, ""
+    @app.teardown_request
+    def measure_rss_after(exc):
+        rss_before = request.environ.pop('insurance.rss_before', None)
+        if rss_before is not None:
+            memory_watchdog.record(request.endpoint or 'unknown', rss_before, current_rss())
+
+# Baseline snapshot for /debug/memory diffs, per worker
+_memory_baseline = None
+
+def _trace_filters():
+    import tracemalloc
+    return [
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        tracemalloc.Filter(False, "<unknown>"),
+    ]
+
+def _format_stat(stat, diff: bool) -> Dict[str, Any]:
+    frames = [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback]
+    entry = {
+        'location': frames[0] if frames else '?',
+        'size_kb': round(stat.size / 1024, 1),
+        'count': stat.count,
+    }
+    if diff:
+        entry['size_diff_kb'] = round(stat.size_diff / 1024, 1)
+        entry['count_diff'] = stat.count_diff
+    if len(frames) > 1:
+        entry['traceback'] = frames
+    return entry
+
+def take_memory_baseline() -> None:
+    """Start tracemalloc if needed and keep a snapshot to diff later ones against."""
+    import tracemalloc
+    global _memory_baseline
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(MEMORY_TRACE_FRAMES)
+    _memory_baseline = (time.time(), tracemalloc.take_snapshot().filter_traces(_trace_filters()))
+
+def stop_memory_tracing() -> None:
+    import tracemalloc
+    global _memory_baseline
+    _memory_baseline = None
+    tracemalloc.stop()
+
+def memory_report(top: int = 25, group_by: str = 'lineno') -> Dict[str, Any]:
+    """Describe this worker's memory: RSS, per-route growth and top allocators."""
+    import tracemalloc
+    
+    report = {
+        'pid': os.getpid(),
+        'rss_mb': round(current_rss() / 1048576, 1),
+        'budget_mb': MEMORY_BUDGET_MB or None,
+        'restart_requested': memory_watchdog.restart_requested,
+        'routes': memory_watchdog.route_summary(),
+        'tracing': tracemalloc.is_tracing(),
+    }
+    if not report['tracing']:
+        return report
+    
+    current, peak = tracemalloc.get_traced_memory()
+    report['traced_mb'] = round(current / 1048576, 1)
+    report['traced_peak_mb'] = round(peak / 1048576, 1)
+    
+    snapshot = tracemalloc.take_snapshot().filter_traces(_trace_filters())
+    report['top'] = [_format_stat(stat, False) for stat in snapshot.statistics(group_by)[:top]]
+    if _memory_baseline is not None:
+        taken_at, baseline = _memory_baseline
+        report['baseline_age_s'] = round(time.time() - taken_at, 1)
+        report['diff'] = [_format_stat(stat, True) for stat in snapshot.compare_to(baseline, group_by)[:top]]
+    return report
 
 # ======================
-# Email Functions
+# Caching
 # ======================
 
-def send_email_with_attachment(subject: str, html_content: str, recipients: List[str], 
-                              cc: List[str] = None, pdf_attachment: Optional[io.BytesIO] = None) -> bool:
-    """Send email with PDF attachment using SMTP_SSL."""
+class LRUCache:
+    """Thread-safe, size-bounded LRU cache whose entries expire after a TTL."""
     
-    # Ensure CC recipient is always included (only for admin emails)
-    all_recipients = recipients[:]
-    if cc:
-        all_recipients.extend(cc)
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
     
-    msg = MIMEMultipart('mixed')
-    msg['From'] = f"LifeLine Insurance <{SMTP_USERNAME}>"
-    msg['To'] = ", ".join(recipients)
-    msg['Subject'] = subject
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            
+            self._entries.move_to_end(key)
+            return value
     
-    if cc:
-        msg['Cc'] = ", ".join(cc)
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
     
-    # Attach HTML content
-    msg.attach(MIMEText(html_content, 'html', 'utf-8'))
+    def invalidate(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
     
-    # Attach PDF if provided
-    if pdf_attachment:
-        pdf_attachment.seek(0)
-        part = MIMEApplication(
-            pdf_attachment.read(),
-            Name=f"insurance_submission_{datetime.now().date()}.pdf"
-        )
-        part['Content-Disposition'] = f'attachment; filename="insurance_submission_{datetime.now().date()}.pdf"'
-        msg.attach(part)
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+class SubmissionCache:
+    """Read-through cache of decoded submission records keyed by id.
     
-    try:
-        with smtplib.SMTP_SSL(SMTP_SERVER, SMTP_PORT, timeout=30) as server:
-            server.login(SMTP_USERNAME, SMTP_PASSWORD)
-            server.send_message(msg, to_addrs=all_recipients)
+    Records live in an in-process LRU/TTL cache. When ``redis_url`` is set a
+    shared Redis tier sits behind it so workers can reuse each other's reads;
+    Redis errors are logged and the cache falls back to in-process only.
+    """
+    
+    KEY_PREFIX = 'submission:'
+    
+    def __init__(self, max_size: int, ttl: float, redis_url: Optional[str] = None,
+                 local_ttl: Optional[float] = None):
+        self.ttl = ttl
+        self.redis_url = redis_url
+        self._redis = None
+        self.local = LRUCache(max_size, local_ttl if local_ttl is not None else ttl)
+    
+    def _shared(self):
+        if not self.redis_url:
+            return None
+        if self._redis is None:
+            try:
+                import redis
+                self._redis = redis.Redis.from_url(self.redis_url, socket_timeout=0.5)
+            except ImportError:
+                logger.warning("redis package not installed; submission cache is in-process only")
+                self.redis_url = None
+                return None
+        return self._redis
+    
+    @staticmethod
+    def _encode(record: Dict[str, Any]) -> str:
+        return json_dumps({
+            **record,
+            'created_at': record['created_at'].isoformat(),
+            'updated_at': record['updated_at'].isoformat()
+        })
+    
+    @staticmethod
+    def _decode(payload) -> Dict[str, Any]:
+        record = json_loads(payload)
+        record['created_at'] = datetime.fromisoformat(record['created_at'])
+        record['updated_at'] = datetime.fromisoformat(record['updated_at'])
+        return record
+    
+    def get(self, submission_id: str) -> Optional[Dict[str, Any]]:
+        record = self.local.get(submission_id)
+        if record is not None:
+            return record
         
-        logger.info(f"Email sent successfully to {len(recipients)} primary recipients and {len(cc) if cc else 0} CC recipients")
-        return True
+        shared = self._shared()
+        if shared is None:
+            return None
         
-    except Exception as e:
-        logger.error(f"Failed to send email: {str(e)}")
-        return False
+        try:
+            payload = shared.get(self.KEY_PREFIX + submission_id)
+        except Exception as e:
+            logger.warning("Shared submission cache read failed: %s", e)
+            return None
+        
+        if payload is None:
+            return None
+        
+        record = self._decode(payload)
+        self.local.set(submission_id, record)
+        return record
+    
+    def set(self, submission_id: str, record: Dict[str, Any]):
+        self.local.set(submission_id, record)
+        
+        shared = self._shared()
+        if shared is not None:
+            try:
+                shared.set(self.KEY_PREFIX + submission_id, self._encode(record), ex=int(self.ttl))
+            except Exception as e:
+                logger.warning("Shared submission cache write failed: %s", e)
+    
+    def invalidate(self, submission_id: str):
+        self.local.invalidate(submission_id)
+        
+        shared = self._shared()
+        if shared is not None:
+            try:
+                shared.delete(self.KEY_PREFIX + submission_id)
+            except Exception as e:
+                logger.warning("Shared submission cache invalidation failed: %s", e)
 
-def build_admin_email_html(submission_type: str, data: Dict[str, Any], submission_id: str) -> str:
-    """Build professional HTML email with submission data for admin team."""
-    fields = get_fields_for_type(submission_type)
+submission_cache = SubmissionCache(
+    SUBMISSION_CACHE_SIZE,
+    SUBMISSION_CACHE_TTL,
+    redis_url=SUBMISSION_CACHE_REDIS_URL,
+    local_ttl=SUBMISSION_CACHE_LOCAL_TTL
+)
+
+def submission_etag(record: Dict[str, Any]) -> str:
+    """Derive an ETag for a submission from its id and updated_at."""
+    return f"{record['id']}-{int(record['updated_at'].timestamp() * 1_000_000)}"
+
+# ======================
+# Circuit Breakers
+# ======================
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose circuit breaker is open."""
     
-    data_rows = ""
-    for field in fields:
-        field_key = normalize_field_key(field)
-        value = str(data.get(field_key, 'N/A'))
-        if len(value) > 100:
-            value = value[:97] + "..."
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} is unavailable (circuit breaker open)")
+        self.name = name
+        self.retry_after = retry_after
+
+class CircuitBreaker:
+    """Thread-safe circuit breaker for one external dependency.
+    
+    Closed: calls go through, and ``failure_threshold`` consecutive failures
+    open the breaker. Open: calls fail fast for ``reset_timeout`` seconds.
+    Half-open: a single probe call is let through; its success closes the
+    breaker and its failure opens it again. State is per process.
+    """
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+    
+    def __init__(self, name: str, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 reset_timeout: float = BREAKER_RESET_TIMEOUT):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        self.last_error = None
+        self.times_opened = 0
+        self.rejected = 0
+    
+    def _current_state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self._state
+    
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+    
+    def retry_after(self) -> float:
+        with self._lock:
+            if self._state != self.OPEN:
+                return 0.0
+            return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+    
+    def allow(self) -> bool:
+        """Return whether a call may proceed; in half-open state only one probe may."""
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._probing:
+                self._state = self.HALF_OPEN
+                self._probing = True
+                return True
+            self.rejected += 1
+            return False
+    
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info("Circuit breaker '%s' closed", self.name)
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probing = False
+    
+    def release(self) -> None:
+        """End a call whose outcome says nothing about the dependency.
         
-        data_rows += f"""
-            <tr>
-                <td style="padding:12px;font-weight:bold;color:#333;border-bottom:1px solid #eee;background:#f8f9fa;width:40%;">{field}</td>
-                <td style="padding:12px;color:#555;border-bottom:1px solid #eee;width:60%;">{value}</td>
-            </tr>
+        Nothing is counted; a half-open probe slot is freed so the next call
+        can probe instead.
         """
+        with self._lock:
+            self._probing = False
     
-    pdf_link = f"http://localhost:5000/download-pdf/{submission_id}"
+    def record_failure(self, error=None) -> None:
+        with self._lock:
+            self._failures += 1
+            self.last_error = str(error) if error is not None else None
+            if self._state == self.OPEN:
+                return
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probing = False
+                self.times_opened += 1
+                logger.warning("Circuit breaker '%s' opened after %s consecutive failure(s): %s",
+                               self.name, self._failures, self.last_error)
     
-    return f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>Insurance Submission - LifeLine</title>
-    </head>
-    <body style="margin:0;padding:0;font-family:Arial,sans-serif;background:#f5f5f5;">
-        <div style="max-width:800px;margin:20px auto;background:white;border-radius:8px;overflow:hidden;box-shadow:0 4px 6px rgba(0,0,0,0.1);">
-            <div style="background:white;padding:30px;text-align:center;">
-                <img src="{LOGO_URL}" width="80" alt="LifeLine Logo" style="display:block;margin:0 auto 15px auto;" />
+    def call(self, func, *args, **kwargs):
+        """Run ``func`` through the breaker, raising CircuitOpenError while it is open."""
+        if not self.allow():
+            raise CircuitOpenError(self.name, self.retry_after())
+        try:
+            result = func(*args, **kwargs)
+        except DeadlineExceeded:
+            self.release()
+            raise
+        except Exception as e:
+            self.record_failure(e)
+            raise
+        self.record_success()
+        return result
+    
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            state = self._current_state()
+            return {
+                'state': state,
+                'consecutive_failures': self._failures,
+                'failure_threshold': self.failure_threshold,
+                'retry_after': round(max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at)), 1)
+                               if state == self.OPEN else 0,
+                'times_opened': self.times_opened,
+                'rejected': self.rejected,
+                'last_error': self.last_error,
+            }
+
+smtp_breaker = CircuitBreaker('smtp')
+logo_breaker = CircuitBreaker('logo')
+database_breaker = CircuitBreaker('database')
+CIRCUIT_BREAKERS = {breaker.name: breaker for breaker in (smtp_breaker, logo_breaker, database_breaker)}
+
+# ======================
+# Request Deadlines
+# ======================
+
+class DeadlineExceeded(Exception):
+    """Raised when a stage cannot finish within the request's remaining budget."""
+    
+    def __init__(self, stage: str):
+        super().__init__(f"Request deadline exceeded before {stage}")
+        self.stage = stage
+
+class Deadline:
+    """Time budget for one request, checked by each stage before it starts.
+    
+    Stages (PDF render, SMTP) may use ``available()``: the time left minus
+    ``reserve``, which is held back so work that cannot finish can still be
+    queued and a response written. The database layer may use everything up
+    to the deadline itself (``remaining()``).
+    """
+    
+    def __init__(self, seconds: float, reserve: float = DEADLINE_RESERVE):
+        self.expires_at = time.monotonic() + seconds
+        self.reserve = reserve
+    
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+    
+    def available(self) -> float:
+        return max(0.0, self.remaining() - self.reserve)
+    
+    def timeout(self, cap: float) -> float:
+        """Return ``cap`` shortened to the budget a stage may still use."""
+        return min(cap, self.available())
+    
+    def check(self, stage: str, needed: float = 0.0) -> None:
+        if self.available() <= needed:
+            raise DeadlineExceeded(stage)
+
+deadline_var = contextvars.ContextVar('deadline', default=None)
+
+def current_deadline() -> Optional[Deadline]:
+    """Return the deadline of the request being handled (None in CLI commands and workers)."""
+    return deadline_var.get()
+
+# ======================
+# Query Instrumentation
+# ======================
+
+# Upper bounds (ms) of the per-statement latency histogram buckets
+QUERY_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, float('inf'))
+# Statements tracked per worker; anything beyond is counted under "other"
+QUERY_STATS_MAX_STATEMENTS = 500
+
+QUERY_LITERAL_PATTERN = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+QUERY_TABLE_PATTERN = re.compile(r'\b(?:FROM|INTO|UPDATE|COPY|JOIN)\s+([A-Za-z_][\w.]*)', re.IGNORECASE)
+EXPLAINABLE_VERBS = {'SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH'}
+
+@lru_cache(maxsize=1024)
+def normalize_query(query: str) -> str:
+    """Collapse whitespace and replace inline literals, so execute_values batches share one entry."""
+    query = QUERY_LITERAL_PATTERN.sub('?', ' '.join(query.split()))
+    # execute_values inlines its rows: "VALUES (?, ?), (?, ?), ..." -> "VALUES (?, ?) ..."
+    return re.sub(r'(\([?, ]+\))(?:, \([?, ]+\))+', r'\1 ...', query)
+
+def query_label(query: str) -> str:
+    """Short name for a statement: its verb and first table, e.g. "UPDATE submissions"."""
+    verb = query.split(None, 1)[0].upper() if query.strip() else '?'
+    table = QUERY_TABLE_PATTERN.search(query)
+    return f"{verb} {table.group(1)}" if table else verb
+
+def param_shape(params) -> Any:
+    """Describe bind parameters by type only; values may hold personal data."""
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {key: type(value).__name__ for key, value in params.items()}
+    if isinstance(params, (list, tuple)):
+        return [f"{type(value).__name__}[{len(value)}]" if isinstance(value, (list, tuple)) else type(value).__name__
+                for value in params]
+    return type(params).__name__
+
+class QueryStats:
+    """Per-worker latency histograms, keyed by route and normalized statement."""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+    
+    def record(self, endpoint: str, statement: str, duration_ms: float) -> None:
+        key = (endpoint, statement)
+        bucket = next(i for i, bound in enumerate(QUERY_BUCKETS_MS) if duration_ms <= bound)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                if len(self._entries) >= QUERY_STATS_MAX_STATEMENTS:
+                    key = (endpoint, 'other')
+                entry = self._entries.setdefault(key, {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                                                       'buckets': [0] * len(QUERY_BUCKETS_MS)})
+            entry['count'] += 1
+            entry['total_ms'] += duration_ms
+            entry['max_ms'] = max(entry['max_ms'], duration_ms)
+            entry['buckets'][bucket] += 1
+    
+    @staticmethod
+    def _quantile(buckets: List[int], count: int, fraction: float) -> float:
+        """Upper bound of the bucket holding the given quantile."""
+        target, seen = fraction * count, 0
+        for bound, hits in zip(QUERY_BUCKETS_MS, buckets):
+            seen += hits
+            if seen >= target:
+                return bound
+        return QUERY_BUCKETS_MS[-1]
+    
+    def snapshot(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            entries = [(key, dict(entry, buckets=list(entry['buckets']))) for key, entry in self._entries.items()]
+        
+        report = []
+        for (endpoint, statement), entry in entries:
+            count = entry['count']
+            quantiles = {f'p{int(q * 100)}_ms': self._quantile(entry['buckets'], count, q) for q in (0.5, 0.95, 0.99)}
+            report.append({
+                'endpoint': endpoint,
+                'label': query_label(statement),
+                'statement': statement[:300],
+                'count': count,
+                'total_ms': round(entry['total_ms'], 1),
+                'avg_ms': round(entry['total_ms'] / count, 2),
+                'max_ms': round(entry['max_ms'], 2),
+                **{key: (None if math.isinf(value) else value) for key, value in quantiles.items()},
+                'buckets': {('+Inf' if math.isinf(bound) else str(bound)): hits
+                            for bound, hits in zip(QUERY_BUCKETS_MS, entry['buckets']) if hits},
+            })
+        return sorted(report, key=lambda item: -item['total_ms'])
+    
+    def reset(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+query_stats = QueryStats()
+# Last EXPLAIN per statement, so a hot slow query is not re-analyzed every time
+_last_explain = {}
+
+def _query_endpoint() -> str:
+    if has_request_context():
+        return request.endpoint or 'unknown'
+    return 'background'
+
+def explain_statement(cursor, query, params, statement: str, duration_ms: float, endpoint: str) -> Optional[str]:
+    """Re-run a slow statement under EXPLAIN (ANALYZE, BUFFERS) and save the plan.
+    
+    ANALYZE executes the statement again, so writes are rolled back to a
+    savepoint (and skipped on autocommit connections). Uses a separate plain
+    cursor so the caller's results are untouched. Returns the file written.
+    """
+    import psycopg2
+    
+    conn = cursor.connection
+    is_write = statement.split(None, 1)[0].upper() != 'SELECT'
+    if is_write and conn.autocommit:
+        return None
+    prefix = "EXPLAIN (ANALYZE, BUFFERS) "
+    explain_query = (prefix.encode() + query) if isinstance(query, bytes) else prefix + query
+    
+    plain = conn.cursor(cursor_factory=psycopg2.extensions.cursor)
+    savepoint = not conn.autocommit
+    try:
+        if savepoint:
+            plain.execute("SAVEPOINT explain_sample")
+        plain.execute(explain_query, params)
+        plan = '\n'.join(row[0] for row in plain.fetchall())
+    except psycopg2.Error as e:
+        logger.warning("Could not EXPLAIN slow statement: %s", e, extra={'statement': query_label(statement)})
+        return None
+    finally:
+        if savepoint and not conn.closed:
+            try:
+                plain.execute("ROLLBACK TO SAVEPOINT explain_sample")
+                plain.execute("RELEASE SAVEPOINT explain_sample")
+            except psycopg2.Error:
+                pass
+        plain.close()
+    
+    os.makedirs(DB_EXPLAIN_DIR, exist_ok=True)
+    label = re.sub(r'[^\w.-]+', '_', query_label(statement)).strip('_').lower()
+    path = os.path.join(DB_EXPLAIN_DIR, f"{datetime.now(UTC).strftime('%Y%m%dT%H%M%S')}_{get_request_id()}_{label}.txt")
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f"-- endpoint: {endpoint}\n-- request_id: {get_request_id()}\n")
+        f.write(f"-- duration_ms: {duration_ms:.1f}\n-- params: {json_dumps(param_shape(params))}\n")
+        f.write(f"{statement}\n\n{plan}\n")
+    return path
+
+def record_query(cursor, query, params, duration_ms: float, explain: bool = True) -> None:
+    """Add a statement to the histograms; log it (and maybe EXPLAIN it) if slow."""
+    text = query.decode('utf-8', 'replace') if isinstance(query, bytes) else str(query)
+    statement = normalize_query(text)
+    endpoint = _query_endpoint()
+    query_stats.record(endpoint, statement, duration_ms)
+    
+    if DB_SLOW_QUERY_MS <= 0 or duration_ms < DB_SLOW_QUERY_MS:
+        return
+    logger.warning(
+        "Slow query (%.1f ms) on %s: %s", duration_ms, endpoint, query_label(statement),
+        extra={'endpoint': endpoint, 'statement': statement[:500], 'duration_ms': round(duration_ms, 1),
+               'params': param_shape(params)}
+    )
+    
+    if (not explain or cursor.name is not None or statement.split(None, 1)[0].upper() not in EXPLAINABLE_VERBS
+            or random.random() >= DB_EXPLAIN_SAMPLE_RATE):
+        return
+    now = time.monotonic()
+    if now - _last_explain.get(statement, -DB_EXPLAIN_INTERVAL) < DB_EXPLAIN_INTERVAL:
+        return
+    # Analyzing repeats the statement's work; only do it when the request can afford that
+    deadline = current_deadline()
+    if deadline is not None and deadline.available() < duration_ms / 1000:
+        return
+    if len(_last_explain) > QUERY_STATS_MAX_STATEMENTS:
+        _last_explain.clear()
+    _last_explain[statement] = now
+    try:
+        path = explain_statement(cursor, query, params, statement, duration_ms, endpoint)
+        if path:
+            logger.info("Saved query plan to %s", path, extra={'explain': path})
+    except OSError as e:
+        logger.error("Could not save query plan: %s", e)
+
+_instrumented_cursor_class = None
+
+def get_cursor_class():
+    """DictCursor subclass that times execute, executemany and copy_expert.
+    
+    Built on first use because psycopg2 is imported lazily.
+    """
+    global _instrumented_cursor_class
+    if _instrumented_cursor_class is not None:
+        return _instrumented_cursor_class
+    from psycopg2.extras import DictCursor
+    
+    class InstrumentedCursor(DictCursor):
+        def _timed(self, query, vars, explain, run, *args):
+            start = time.perf_counter()
+            try:
+                result = run(*args)
+            except Exception:
+                record_query(self, query, vars, (time.perf_counter() - start) * 1000, explain=False)
+                raise
+            record_query(self, query, vars, (time.perf_counter() - start) * 1000, explain=explain)
+            return result
+        
+        def execute(self, query, vars=None):
+            return self._timed(query, vars, True, super().execute, query, vars)
+        
+        def executemany(self, query, vars_list):
+            return self._timed(query, None, False, super().executemany, query, vars_list)
+        
+        def copy_expert(self, sql, file, size=8192):
+            return self._timed(sql, None, False, super().copy_expert, sql, file, size)
+    
+    _instrumented_cursor_class = InstrumentedCursor
+    return _instrumented_cursor_class
+
+# ======================
+# Database Functions
+# ======================
+
+_json_adapters_registered = False
+
+def register_json_adapters():
+    """Decode json/jsonb columns with json_loads for every connection."""
+    global _json_adapters_registered
+    if _json_adapters_registered:
+        return
+    from psycopg2.extras import register_default_json, register_default_jsonb
+    register_default_json(globally=True, loads=json_loads)
+    register_default_jsonb(globally=True, loads=json_loads)
+    _json_adapters_registered = True
+
+def get_db_connection():
+    """Get a PostgreSQL database connection.
+    
+    Raises CircuitOpenError without connecting while the database breaker is
+    open, and DeadlineExceeded once the current request is out of time.
+    """
+    import psycopg2
+    
+    register_json_adapters()
+    
+    # Inside a request, connecting and every statement are bounded by what
+    # is left of the request's deadline
+    connect_timeout, options = POSTGRES_CONNECT_TIMEOUT, None
+    deadline = current_deadline()
+    if deadline is not None:
+        remaining = deadline.remaining()
+        if remaining < 0.1:
+            raise DeadlineExceeded('database')
+        connect_timeout = max(1, min(connect_timeout, int(remaining)))
+        options = f"-c statement_timeout={int(remaining * 1000)}"
+    
+    conn = database_breaker.call(
+        psycopg2.connect,
+        host=POSTGRES_HOST,
+        port=POSTGRES_PORT,
+        dbname=POSTGRES_DB,
+        user=POSTGRES_USER,
+        password=POSTGRES_PASSWORD,
+        connect_timeout=connect_timeout,
+        options=options,
+        cursor_factory=get_cursor_class()
+    )
+    return conn
+
+# Full-text search configuration. Keys are weighted by how identifying they
+# are; the 'simple' configuration avoids stemming personal and company names.
+# The stored search_vector column is defined in migration c3540e316d57 and
+# must list the same fields.
+SEARCH_FIELD_WEIGHTS = {
+    'A': ["full_name", "company_name", "contact_person_name"],
+    'B': ["email", "contact_email", "occupation", "industry_type", "location", "company_address"],
+    'C': ["existing_medical_conditions", "regular_medications", "family_medical_history",
+          "specific_coverage_needs", "special_requirements", "preferred_hospitals"],
+}
+SEARCH_MAX_TERMS = 8
+
+def _search_text_expression(fields: List[str]) -> str:
+    """Build a SQL text expression concatenating the given submission_data keys."""
+    parts = [f"COALESCE(NULLIF(submission_data->>'{field}', 'N/A'), '')" for field in fields]
+    return " || ' ' || ".join(parts)
+
+SEARCH_DOCUMENT_EXPRESSION = _search_text_expression(
+    [field for fields in SEARCH_FIELD_WEIGHTS.values() for field in fields]
+)
+
+# submissions is partitioned by month on created_at (migration e5c81f3a7b62).
+# submission_ids maps each id to its created_at, so a lookup by id reads one
+# partition instead of probing every partition's primary key. Pass the id twice.
+SUBMISSION_BY_ID = "id = %s AND created_at = (SELECT created_at FROM submission_ids WHERE id = %s)"
+
+def get_database_url() -> str:
+    """Build a SQLAlchemy URL for the PostgreSQL database (used by Alembic)."""
+    from sqlalchemy.engine import URL
+    return URL.create(
+        "postgresql+psycopg2",
+        username=POSTGRES_USER,
+        password=POSTGRES_PASSWORD,
+        host=POSTGRES_HOST,
+        port=int(POSTGRES_PORT),
+        database=POSTGRES_DB
+    ).render_as_string(hide_password=False)
+
+def get_alembic_config():
+    """Load the Alembic configuration for the migrations directory."""
+    from alembic.config import Config
+    migrations_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+    config = Config(os.path.join(migrations_dir, 'alembic.ini'))
+    config.set_main_option('script_location', migrations_dir)
+    # Keep the application's logging configuration intact
+    config.attributes['configure_logger'] = False
+    return config
+
+def init_database(app):
+    """Bring the PostgreSQL schema up to date by applying pending migrations."""
+    try:
+        from alembic import command
+        command.upgrade(get_alembic_config(), 'head')
+        
+        logger.info("✅ Database migrations applied")
+        return True
+    except Exception as e:
+        logger.error("❌ Database initialization failed: %s", e)
+        return False
+
+SUBMISSION_COLUMNS = (
+    "id, submission_type, submission_data, created_at, updated_at, "
+    "email_sent, customer_email_sent, pdf_generated, pdf_path"
+)
+
+def get_submission_record(submission_id: str) -> Optional[Dict[str, Any]]:
+    """Fetch a decoded submission record, reading through the submission cache."""
+    record = submission_cache.get(submission_id)
+    if record is not None:
+        return record
+    
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute(f"SELECT {SUBMISSION_COLUMNS} FROM submissions WHERE {SUBMISSION_BY_ID}", (submission_id, submission_id))
+    row = cursor.fetchone()
+    
+    cursor.close()
+    conn.close()
+    
+    if row is None:
+        return None
+    
+    record = dict(row)
+    record['submission_data'] = decode_json_value(record['submission_data'])
+    
+    submission_cache.set(submission_id, record)
+    return record
+
+def update_submission(submission_id: str, **fields) -> None:
+    """Update columns of a submission, bump updated_at and invalidate its cached record."""
+    fields['updated_at'] = datetime.now(timezone.utc)
+    assignments = ", ".join(f"{column} = %s" for column in fields)
+    
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute(
+        f"UPDATE submissions SET {assignments} WHERE {SUBMISSION_BY_ID}",
+        (*fields.values(), submission_id, submission_id)
+    )
+    
+    conn.commit()
+    cursor.close()
+    conn.close()
+    
+    submission_cache.invalidate(submission_id)
+
+def find_submissions(email: Optional[str] = None, phone: Optional[str] = None,
+                     limit: int = 50) -> List[Dict[str, Any]]:
+    """Look up submissions by applicant email or phone using the promoted columns."""
+    conditions = []
+    params = []
+    
+    if email:
+        conditions.append("applicant_email = %s")
+        params.append(email.strip().lower())
+    if phone:
+        conditions.append("applicant_phone = %s")
+        params.append(normalize_phone(phone))
+    
+    if not conditions:
+        return []
+    
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute(
+        f"""
+        SELECT id, submission_type, applicant_email, applicant_phone, company_name, full_name,
+               created_at, email_sent, customer_email_sent, pdf_generated
+        FROM submissions
+        WHERE {' OR '.join(conditions)}
+        ORDER BY created_at DESC
+        LIMIT %s
+        """,
+        (*params, limit)
+    )
+    rows = [dict(row) for row in cursor.fetchall()]
+    
+    cursor.close()
+    conn.close()
+    
+    return rows
+
+def build_prefix_tsquery(query: str) -> str:
+    """Turn free text into a prefix-matching tsquery string ('diab:* & kig:*')."""
+    terms = re.findall(r'\w+', unicodedata.normalize('NFKC', query).lower())[:SEARCH_MAX_TERMS]
+    return ' & '.join(f"{term}:*" for term in terms)
+
+def search_submissions(query: str, submission_type: Optional[str] = None,
+                       limit: int = 20) -> List[Dict[str, Any]]:
+    """Ranked full-text search over the stored search_vector column.
+
+    Ranking and the LIMIT happen in the inner query so ts_headline only runs
+    for the rows actually returned. Highlighted terms are wrapped in <mark>.
+    """
+    tsquery = build_prefix_tsquery(query)
+    if not tsquery:
+        return []
+    
+    type_filter = "AND submission_type = %s" if submission_type else ""
+    params = [tsquery] + ([submission_type] if submission_type else []) + [limit]
+    
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute(
+        f"""
+        SELECT id, submission_type, created_at, applicant_email, company_name, full_name, rank,
+               ts_headline('simple', {SEARCH_DOCUMENT_EXPRESSION}, query,
+                           'StartSel=\x02, StopSel=\x03, MaxFragments=2, MaxWords=20, MinWords=5') AS snippet
+        FROM (
+            SELECT s.*, q.query, ts_rank_cd(s.search_vector, q.query) AS rank
+            FROM submissions s, to_tsquery('simple', %s) AS q(query)
+            WHERE s.search_vector @@ q.query {type_filter}
+            ORDER BY rank DESC, s.created_at DESC
+            LIMIT %s
+        ) AS ranked
+        ORDER BY rank DESC, created_at DESC
+        """,
+        params
+    )
+    rows = [dict(row) for row in cursor.fetchall()]
+    
+    cursor.close()
+    conn.close()
+    
+    # Escape user data before turning the sentinel markers into HTML
+    for row in rows:
+        row['snippet'] = (html.escape(row['snippet'] or '')
+                          .replace('\x02', '<mark>')
+                          .replace('\x03', '</mark>'))
+    
+    return rows
+
+# ======================
+# Partition Maintenance
+# ======================
+
+PARTITION_NAME_PATTERN = re.compile(r'^submissions_y(\d{4})m(\d{2})$')
+DEFAULT_PARTITION = 'submissions_default'
+# Stored submission columns (the generated ones are recomputed on insert)
+SUBMISSION_STORED_COLUMNS = ("id, submission_type, submission_data, created_at, updated_at, "
+                             "email_sent, customer_email_sent, pdf_generated, pdf_path")
+
+def add_months(month: date, count: int) -> date:
+    """Return the first day of the month ``count`` months after ``month``."""
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+def partition_name(month: date) -> str:
+    return f"submissions_y{month.year}m{month.month:02d}"
+
+def month_bounds(month: date) -> tuple:
+    """UTC start and end of a monthly partition."""
+    start = datetime(month.year, month.month, 1, tzinfo=timezone.utc)
+    end = datetime.combine(add_months(month, 1), datetime.min.time(), timezone.utc)
+    return start, end
+
+def list_partitions(cursor) -> List[Dict[str, Any]]:
+    """Return the attached partitions of submissions, oldest month first (DEFAULT last)."""
+    cursor.execute("""
+        SELECT c.relname AS name, c.reltuples::bigint AS approx_rows,
+               pg_total_relation_size(c.oid) AS bytes
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'submissions'::regclass
+    """)
+    partitions = []
+    for row in cursor.fetchall():
+        match = PARTITION_NAME_PATTERN.match(row['name'])
+        partitions.append({
+            'name': row['name'],
+            'month': date(int(match.group(1)), int(match.group(2)), 1) if match else None,
+            'approx_rows': max(row['approx_rows'], 0),
+            'bytes': row['bytes'],
+        })
+    return sorted(partitions, key=lambda item: (item['month'] is None, item['month'] or date.min))
+
+def create_partition(cursor, month: date) -> int:
+    """Create the partition for ``month``, moving its rows out of the DEFAULT partition.
+    
+    PostgreSQL refuses to create a partition while the DEFAULT partition
+    holds rows in its range, so those rows are deleted and re-inserted
+    around the CREATE (their NOTIFY 'persisted' event fires again). Returns
+    the number of rows moved.
+    """
+    start, end = month_bounds(month)
+    cursor.execute(f"CREATE TEMP TABLE partition_move (LIKE {DEFAULT_PARTITION}) ON COMMIT DROP")
+    cursor.execute(
+        f"""
+        WITH moved AS (
+            DELETE FROM {DEFAULT_PARTITION} WHERE created_at >= %s AND created_at < %s
+            RETURNING {SUBMISSION_STORED_COLUMNS}
+        )
+        INSERT INTO partition_move ({SUBMISSION_STORED_COLUMNS}) SELECT * FROM moved
+        """,
+        (start, end)
+    )
+    moved = cursor.rowcount
+    cursor.execute(
+        f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF submissions "
+        f"FOR VALUES FROM (%s) TO (%s)",
+        (start, end)
+    )
+    if moved:
+        cursor.execute(
+            f"INSERT INTO submissions ({SUBMISSION_STORED_COLUMNS}) "
+            f"SELECT {SUBMISSION_STORED_COLUMNS} FROM partition_move"
+        )
+    cursor.execute("DROP TABLE partition_move")
+    return moved
+
+def partition_pdf_paths(cursor, partition: Dict[str, Any]) -> List[str]:
+    """Return the stored PDF locators of a partition's rows."""
+    cursor.execute(f"SELECT pdf_path FROM {partition['name']} WHERE pdf_path IS NOT NULL")
+    return [row['pdf_path'] for row in cursor.fetchall()]
+
+def retire_partition(cursor, partition: Dict[str, Any], drop: bool) -> List[str]:
+    """Detach a month from submissions and drop it or move it to the archive schema.
+    
+    The month's submission_ids rows go with it, so its ids read as not found.
+    Stored PDFs are left in place; their locators are returned so they can
+    be archived or deleted separately.
+    """
+    pdf_paths = partition_pdf_paths(cursor, partition)
+    start, end = month_bounds(partition['month'])
+    cursor.execute(f"ALTER TABLE submissions DETACH PARTITION {partition['name']}")
+    cursor.execute("DELETE FROM submission_ids WHERE created_at >= %s AND created_at < %s", (start, end))
+    if drop:
+        cursor.execute(f"DROP TABLE {partition['name']}")
+    else:
+        cursor.execute(f"CREATE SCHEMA IF NOT EXISTS {PARTITION_ARCHIVE_SCHEMA}")
+        cursor.execute(f"ALTER TABLE {partition['name']} SET SCHEMA {PARTITION_ARCHIVE_SCHEMA}")
+    if pdf_paths:
+        logger.info("Retired %s with %s stored PDF(s) left in place", partition['name'], len(pdf_paths))
+    return pdf_paths
+
+def maintain_partitions(premake: int = PARTITION_PREMAKE_MONTHS, retention: int = PARTITION_RETENTION_MONTHS,
+                        drop: bool = False, dry_run: bool = False) -> Dict[str, List[str]]:
+    """Create partitions ahead of time, empty the DEFAULT partition and retire old months.
+    
+    Creates the current month and ``premake`` months after it, plus any month
+    with rows in the DEFAULT partition. With ``retention`` > 0, months that
+    ended more than ``retention`` months ago are detached, then archived or
+    dropped; in dry-run mode, stray months that would be created and then
+    retired are not listed as retired. Retiring a month leaves its stored
+    PDFs in place; their locators are reported under ``retired_pdfs``. Runs
+    in one transaction under an advisory lock.
+    """
+    current = datetime.now(timezone.utc).date().replace(day=1)
+    oldest_kept = add_months(current, -retention) if retention > 0 else None
+    
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT pg_advisory_xact_lock(hashtext('submission_partitions'))")
+        partitions = list_partitions(cursor)
+        existing = {partition['month'] for partition in partitions if partition['month']}
+        
+        cursor.execute(
+            f"SELECT DISTINCT date_trunc('month', created_at AT TIME ZONE 'UTC')::date AS month "
+            f"FROM {DEFAULT_PARTITION}"
+        )
+        stray = {row['month'] for row in cursor.fetchall()}
+        wanted = {add_months(current, offset) for offset in range(premake + 1)} | stray
+        
+        report = {'created': [], 'moved_rows': 0, 'retired': [], 'retired_pdfs': []}
+        for month in sorted(wanted - existing):
+            report['created'].append(partition_name(month))
+            if not dry_run:
+                report['moved_rows'] += create_partition(cursor, month)
+        
+        if oldest_kept is not None:
+            if report['created'] and not dry_run:
+                partitions = list_partitions(cursor)
+            for partition in partitions:
+                if partition['month'] and partition['month'] < oldest_kept:
+                    report['retired'].append(partition['name'])
+                    if dry_run:
+                        report['retired_pdfs'] += partition_pdf_paths(cursor, partition)
+                    else:
+                        report['retired_pdfs'] += retire_partition(cursor, partition, drop)
+        
+        if dry_run:
+            conn.rollback()
+        else:
+            conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+    
+    return report
+
+# ======================
+# PDF Storage
+# ======================
+
+class PDFStore:
+    """Interface for PDF storage backends.
+    
+    ``save`` returns an opaque locator that is stored in
+    ``submissions.pdf_path``; ``open`` returns a binary file-like object and
+    raises FileNotFoundError for unknown locators. Non-local backends prefix
+    their locators with a scheme (``s3:``, ``pg:``) so rows written by one
+    backend are never misread by another.
+    """
+    
+    SCHEME = None
+    CHUNK_SIZE = 64 * 1024
+    
+    @staticmethod
+    def filename_for(submission_id: str) -> str:
+        return f"insurance_submission_{submission_id}.pdf"
+    
+    def key_for(self, submission_id: str, created_at: datetime) -> str:
+        """Return the sharded key for a document."""
+        return '/'.join([
+            f"{created_at:%Y}", f"{created_at:%m}", submission_id[:2], self.filename_for(submission_id)
+        ])
+    
+    @staticmethod
+    def scheme_of(locator: str) -> Optional[str]:
+        match = re.match(r'^(s3|pg):', locator)
+        return match.group(1) if match else None
+    
+    def save(self, submission_id: str, created_at: datetime, data) -> str:
+        raise NotImplementedError
+    
+    def open(self, locator: str):
+        raise NotImplementedError
+    
+    def save_stream(self, key: str, source) -> str:
+        """Store a file object under a content-addressed ``key`` unless already stored."""
+        raise NotImplementedError
+    
+    def delete(self, locator: str):
+        raise NotImplementedError
+    
+    def exists(self, locator: str) -> bool:
+        try:
+            self.open(locator).close()
+            return True
+        except FileNotFoundError:
+            return False
+    
+    def local_path(self, locator: str) -> Optional[str]:
+        """Return a filesystem path when the document can be served with sendfile."""
+        return None
+    
+    def iter_chunks(self, locator: str, chunk_size: int = CHUNK_SIZE):
+        """Yield a document in chunks without reading it fully into memory."""
+        return iter_file_chunks(self.open(locator), chunk_size)
+
+class LocalPDFStore(PDFStore):
+    """Sharded on-disk PDF storage with zip archive segments for old documents.
+    
+    New documents are written to ``<root>/<yyyy>/<mm>/<id[:2]>/`` so no single
+    directory grows without bound. Compaction packs documents older than N
+    days into ``<root>/archive/<yyyy-mm>/segment-<n>.zip``; the zip central
+    directory indexes every member, so one document can be streamed out of a
+    segment without reading the rest.
+    
+    ``submissions.pdf_path`` holds a locator relative to the root, either
+    ``2025/07/ab/insurance_submission_<id>.pdf`` or
+    ``archive/2025-07/segment-0001.zip!insurance_submission_<id>.pdf``.
+    Absolute paths written by older versions are still readable.
+    """
+    
+    ARCHIVE_DIR = 'archive'
+    ARCHIVE_SEPARATOR = '!'
+    
+    def __init__(self, root: str):
+        self.root = root
+    
+    def is_archived(self, locator: str) -> bool:
+        return self.ARCHIVE_SEPARATOR in locator
+    
+    def local_path(self, locator: str) -> Optional[str]:
+        """Return the filesystem path of a loose document, or None if archived."""
+        if self.is_archived(locator):
+            return None
+        if os.path.isabs(locator):
+            return locator
+        return os.path.join(self.root, *locator.split('/'))
+    
+    def save(self, submission_id: str, created_at: datetime, data) -> str:
+        """Write a document atomically and return its locator."""
+        locator = self.key_for(submission_id, created_at)
+        path = self.local_path(locator)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        
+        tmp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        
+        return locator
+    
+    def save_stream(self, key: str, source) -> str:
+        path = self.local_path(key)
+        if os.path.exists(path):
+            return key
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        
+        tmp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+        with open(tmp_path, 'wb') as f:
+            shutil.copyfileobj(source, f, self.CHUNK_SIZE)
+        os.replace(tmp_path, path)
+        
+        return key
+    
+    def exists(self, locator: str) -> bool:
+        if not self.is_archived(locator):
+            return os.path.exists(self.local_path(locator))
+        
+        segment, member = locator.split(self.ARCHIVE_SEPARATOR, 1)
+        segment_path = os.path.join(self.root, *segment.split('/'))
+        if not os.path.exists(segment_path):
+            return False
+        with zipfile.ZipFile(segment_path) as archive:
+            return member in archive.NameToInfo
+    
+    def open(self, locator: str):
+        """Open a document for reading, whether loose or inside a segment."""
+        if not self.is_archived(locator):
+            return open(self.local_path(locator), 'rb')
+        
+        segment, member = locator.split(self.ARCHIVE_SEPARATOR, 1)
+        archive = zipfile.ZipFile(os.path.join(self.root, *segment.split('/')))
+        try:
+            # The member keeps the underlying file open after the archive is closed
+            return archive.open(member)
+        except KeyError:
+            raise FileNotFoundError(locator)
+        finally:
+            archive.close()
+    
+    def delete(self, locator: str):
+        """Remove a loose document; archived members are left in their segment."""
+        path = self.local_path(locator)
+        if path and os.path.exists(path):
+            os.remove(path)
+    
+    def _next_segment_path(self, month: str) -> str:
+        directory = os.path.join(self.root, self.ARCHIVE_DIR, month)
+        os.makedirs(directory, exist_ok=True)
+        existing = [name for name in os.listdir(directory) if re.match(r'^segment-\d+\.zip$', name)]
+        number = max((int(name[8:-4]) for name in existing), default=0) + 1
+        return os.path.join(directory, f"segment-{number:04d}.zip")
+    
+    def write_segment(self, month: str, documents: List[tuple]) -> Dict[str, str]:
+        """Pack ``(submission_id, locator)`` documents into a new segment.
+        
+        The segment is written under a temporary name, synced and renamed into
+        place, so a crash never leaves a partial segment that locators point
+        to. Returns the new locator for every packed submission.
+        """
+        segment_path = self._next_segment_path(month)
+        segment_locator = '/'.join([self.ARCHIVE_DIR, month, os.path.basename(segment_path)])
+        tmp_path = segment_path + '.tmp'
+        
+        relocated = {}
+        with zipfile.ZipFile(tmp_path, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=6) as archive:
+            for submission_id, locator in documents:
+                member = self.filename_for(submission_id)
+                with self.open(locator) as source, archive.open(member, 'w', force_zip64=True) as target:
+                    shutil.copyfileobj(source, target, self.CHUNK_SIZE)
+                relocated[submission_id] = f"{segment_locator}{self.ARCHIVE_SEPARATOR}{member}"
+        
+        with open(tmp_path, 'rb') as f:
+            os.fsync(f.fileno())
+        os.replace(tmp_path, segment_path)
+        
+        return relocated
+
+class S3PDFStore(PDFStore):
+    """PDF storage in an S3-compatible object store (AWS S3, MinIO, ...).
+    
+    Credentials come from the usual AWS environment variables or instance
+    role; ``endpoint_url`` points at a non-AWS server.
+    """
+    
+    SCHEME = 's3'
+    
+    def __init__(self, bucket: str, prefix: str = '', endpoint_url: Optional[str] = None):
+        import boto3
+        self.bucket = bucket
+        self.prefix = prefix
+        self.client = boto3.client('s3', endpoint_url=endpoint_url)
+    
+    def _object_key(self, locator: str) -> str:
+        return self.prefix + locator[len('s3:'):]
+    
+    def save(self, submission_id: str, created_at: datetime, data) -> str:
+        locator = f"s3:{self.key_for(submission_id, created_at)}"
+        self.client.put_object(
+            Bucket=self.bucket,
+            Key=self._object_key(locator),
+            Body=bytes(data),
+            ContentType='application/pdf'
+        )
+        return locator
+    
+    def save_stream(self, key: str, source) -> str:
+        locator = f"s3:{key}"
+        if not self.exists(locator):
+            # upload_fileobj streams large files as a multipart upload
+            self.client.upload_fileobj(source, self.bucket, self._object_key(locator))
+        return locator
+    
+    def open(self, locator: str):
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self._object_key(locator))['Body']
+        except self.client.exceptions.NoSuchKey:
+            raise FileNotFoundError(locator)
+    
+    def delete(self, locator: str):
+        self.client.delete_object(Bucket=self.bucket, Key=self._object_key(locator))
+
+class PostgresBlobReader(io.RawIOBase):
+    """Read a pdf_blobs row in ranges so large documents are never loaded whole."""
+    
+    def __init__(self, key: str, size: int):
+        self.key = key
+        self.size = size
+        self.position = 0
+        self.conn = get_db_connection()
+    
+    def readable(self):
+        return True
+    
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            size = self.size - self.position
+        size = min(size, self.size - self.position)
+        if size <= 0:
+            return b''
+        
+        cursor = self.conn.cursor()
+        # substring() positions are 1-based; STORAGE EXTERNAL makes this a slice read
+        cursor.execute(
+            "SELECT substring(data FROM %s FOR %s) FROM pdf_blobs WHERE key = %s",
+            (self.position + 1, size, self.key)
+        )
+        chunk = bytes(cursor.fetchone()[0])
+        cursor.close()
+        
+        self.position += len(chunk)
+        return chunk
+    
+    def close(self):
+        if not self.closed:
+            self.conn.close()
+        super().close()
+
+class PostgresPDFStore(PDFStore):
+    """PDF storage in the pdf_blobs table (bytea, uncompressed TOAST storage)."""
+    
+    SCHEME = 'pg'
+    
+    def save(self, submission_id: str, created_at: datetime, data) -> str:
+        import psycopg2
+        
+        locator = f"pg:{self.key_for(submission_id, created_at)}"
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute(
+            """
+            INSERT INTO pdf_blobs (key, data, size, created_at) VALUES (%s, %s, %s, %s)
+            ON CONFLICT (key) DO UPDATE SET data = EXCLUDED.data, size = EXCLUDED.size
+            """,
+            (locator, psycopg2.Binary(bytes(data)), len(data), datetime.now(timezone.utc))
+        )
+        
+        conn.commit()
+        cursor.close()
+        conn.close()
+        
+        return locator
+    
+    def save_stream(self, key: str, source) -> str:
+        import psycopg2
+        
+        locator = f"pg:{key}"
+        # bytea has no streaming insert; uploads are bounded by DOCUMENT_MAX_FILE_BYTES
+        data = source.read()
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute(
+            """
+            INSERT INTO pdf_blobs (key, data, size, created_at) VALUES (%s, %s, %s, %s)
+            ON CONFLICT (key) DO NOTHING
+            """,
+            (locator, psycopg2.Binary(data), len(data), datetime.now(timezone.utc))
+        )
+        
+        conn.commit()
+        cursor.close()
+        conn.close()
+        
+        return locator
+    
+    def open(self, locator: str):
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT size FROM pdf_blobs WHERE key = %s", (locator,))
+        row = cursor.fetchone()
+        cursor.close()
+        conn.close()
+        
+        if row is None:
+            raise FileNotFoundError(locator)
+        return PostgresBlobReader(locator, row['size'])
+    
+    def delete(self, locator: str):
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM pdf_blobs WHERE key = %s", (locator,))
+        conn.commit()
+        cursor.close()
+        conn.close()
+
+def create_pdf_store(instance_path: str) -> PDFStore:
+    """Build the PDF store selected by PDF_STORAGE_BACKEND."""
+    if PDF_STORAGE_BACKEND == 's3':
+        if not PDF_S3_BUCKET:
+            raise RuntimeError("PDF_S3_BUCKET must be set when PDF_STORAGE_BACKEND=s3")
+        return S3PDFStore(PDF_S3_BUCKET, PDF_S3_PREFIX, PDF_S3_ENDPOINT_URL)
+    if PDF_STORAGE_BACKEND == 'postgres':
+        return PostgresPDFStore()
+    if PDF_STORAGE_BACKEND != 'local':
+        raise RuntimeError(f"Unknown PDF_STORAGE_BACKEND '{PDF_STORAGE_BACKEND}'")
+    return LocalPDFStore(PDF_STORAGE_ROOT or os.path.join(instance_path, 'pdfs'))
+
+def iter_file_chunks(f, chunk_size: int = PDFStore.CHUNK_SIZE):
+    """Yield an open binary file in chunks and close it when done."""
+    try:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        f.close()
+
+def get_pdf_store(locator: Optional[str] = None) -> PDFStore:
+    """Return the configured PDF store, or the store that can read ``locator``.
+    
+    Unprefixed locators always belong to the local filesystem store, so rows
+    written before a backend switch remain readable on the node holding them.
+    """
+    store = current_app.extensions['pdf_store']
+    if locator is None or PDFStore.scheme_of(locator) == store.SCHEME:
+        return store
+    if PDFStore.scheme_of(locator) is None:
+        return LocalPDFStore(PDF_STORAGE_ROOT or os.path.join(current_app.instance_path, 'pdfs'))
+    raise FileNotFoundError(f"No PDF store configured for {locator}")
+
+def open_stored_pdf(submission_id: str, record: Dict[str, Any]) -> tuple:
+    """Return ``(record, local_path, stream)`` for a submission's stored PDF.
+    
+    Exactly one of ``local_path`` and ``stream`` is set. The record may come
+    from a cache that predates a compaction or relocation by another process,
+    so on a miss the entry is dropped and the row read again before giving
+    up with FileNotFoundError.
+    """
+    for attempt in range(2):
+        try:
+            store = get_pdf_store(record['pdf_path'])
+            local_path = store.local_path(record['pdf_path'])
+            if local_path is None:
+                return record, None, store.open(record['pdf_path'])
+            if not os.path.exists(local_path):
+                raise FileNotFoundError(local_path)
+            return record, local_path, None
+        except FileNotFoundError:
+            if attempt:
+                raise
+            submission_cache.invalidate(submission_id)
+            fresh = get_submission_record(submission_id)
+            if fresh is None or not fresh['pdf_path'] or fresh['pdf_path'] == record['pdf_path']:
+                raise
+            record = fresh
+
+def load_submission_pdf(submission_id: str, pdf_path: Optional[str]) -> bytes:
+    """Return a submission's PDF, rendering it if it was never stored or has gone missing."""
+    if pdf_path:
+        try:
+            document = get_pdf_store(pdf_path).open(pdf_path)
+            try:
+                return document.read()
+            finally:
+                document.close()
+        except FileNotFoundError:
+            logger.warning("Stored PDF %s for submission %s is missing; rendering it again",
+                           pdf_path, submission_id)
+    
+    record = get_submission_record(submission_id)
+    if record is None:
+        raise FileNotFoundError(f"Submission {submission_id} not found")
+    pdf_buffer = PDFGenerator().generate_pdf(record['submission_type'], record['submission_data'], submission_id)
+    return pdf_buffer.getvalue()
+
+def relocate_pdfs(locators: Dict[str, str]) -> None:
+    """Point submissions at new PDF locators without changing updated_at."""
+    if not locators:
+        return
+    
+    from psycopg2.extras import execute_values
+    
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    execute_values(
+        cursor,
+        """
+        UPDATE submissions AS s SET pdf_path = v.pdf_path
+        FROM (VALUES %s) AS v(id, pdf_path)
+        JOIN submission_ids i ON i.id = v.id
+        WHERE s.id = i.id AND s.created_at = i.created_at
+        """,
+        list(locators.items())
+    )
+    
+    conn.commit()
+    cursor.close()
+    conn.close()
+    
+    for submission_id in locators:
+        submission_cache.invalidate(submission_id)
+
+def iter_pdf_rows(where: str, params: tuple = (), batch_size: int = 1000):
+    """Stream (id, created_at, pdf_path) rows with a server-side cursor."""
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor(name=f"pdf_rows_{uuid.uuid4().hex[:8]}")
+        cursor.itersize = batch_size
+        cursor.execute(
+            f"SELECT id, created_at, pdf_path FROM submissions WHERE pdf_path IS NOT NULL AND {where} "
+            f"ORDER BY created_at",
+            params
+        )
+        for row in cursor:
+            yield row['id'], row['created_at'], row['pdf_path']
+        cursor.close()
+    finally:
+        conn.close()
+
+def migrate_pdf_layout(store: LocalPDFStore, dry_run: bool = False, batch_size: int = 500) -> Dict[str, int]:
+    """Move PDFs stored at absolute flat paths into the sharded layout.
+    
+    Files are copied, the new paths committed, and only then are the old
+    files removed, so an interrupted run never leaves a row pointing at a
+    path that does not exist.
+    """
+    stats = {'moved': 0, 'missing': 0}
+    pending = {}
+    
+    def flush():
+        relocate_pdfs({submission_id: locator for submission_id, (locator, _) in pending.items()})
+        for _, old_path in pending.values():
+            try:
+                os.remove(old_path)
+            except FileNotFoundError:
+                pass
+        pending.clear()
+    
+    for submission_id, created_at, pdf_path in iter_pdf_rows("pdf_path LIKE '/%%'"):
+        if not os.path.exists(pdf_path):
+            stats['missing'] += 1
+            continue
+        
+        locator = store.key_for(submission_id, created_at)
+        if not dry_run:
+            target = store.local_path(locator)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copy2(pdf_path, target)
+            pending[submission_id] = (locator, pdf_path)
+            if len(pending) >= batch_size:
+                flush()
+        stats['moved'] += 1
+    
+    flush()
+    return stats
+
+def compact_pdfs(store: LocalPDFStore, older_than_days: int, dry_run: bool = False,
+                 max_segment_bytes: int = PDF_ARCHIVE_SEGMENT_MAX_BYTES) -> Dict[str, int]:
+    """Pack loose PDFs older than ``older_than_days`` into monthly archive segments.
+    
+    Each segment is finalized before the database points at it, and loose
+    files are only deleted afterwards, so an interrupted run leaves every
+    document readable.
+    """
+    from datetime import timedelta
+    
+    cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+    stats = {'archived': 0, 'segments': 0, 'missing': 0}
+    
+    def flush(month, batch):
+        if not batch:
+            return
+        relocated = store.write_segment(month, batch)
+        relocate_pdfs(relocated)
+        for _, locator in batch:
+            store.delete(locator)
+        stats['archived'] += len(relocated)
+        stats['segments'] += 1
+    
+    month, batch, batch_bytes = None, [], 0
+    for submission_id, created_at, pdf_path in iter_pdf_rows(
+            "created_at < %s AND pdf_path NOT LIKE %s AND pdf_path !~ '^(s3|pg):'",
+            (cutoff, f"%{LocalPDFStore.ARCHIVE_SEPARATOR}%")):
+        path = store.local_path(pdf_path)
+        if not os.path.exists(path):
+            stats['missing'] += 1
+            continue
+        
+        row_month = f"{created_at:%Y-%m}"
+        size = os.path.getsize(path)
+        if row_month != month or (batch and batch_bytes + size > max_segment_bytes):
+            if not dry_run:
+                flush(month, batch)
+            elif batch:
+                stats['segments'] += 1
+                stats['archived'] += len(batch)
+            month, batch, batch_bytes = row_month, [], 0
+        
+        batch.append((submission_id, pdf_path))
+        batch_bytes += size
+    
+    if not dry_run:
+        flush(month, batch)
+    elif batch:
+        stats['segments'] += 1
+        stats['archived'] += len(batch)
+    
+    return stats
+
+# ======================
+# Bundle Export
+# ======================
+
+class ChunkSink(io.RawIOBase):
+    """Unseekable write buffer that hands written bytes back in chunks.
+    
+    ZipFile falls back to data descriptors on unseekable output, so a ZIP
+    written here can be streamed to the client while it is being built.
+    """
+    
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self._position = 0
+    
+    def writable(self):
+        return True
+    
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+    
+    def tell(self) -> int:
+        return self._position
+    
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+def iter_export_rows(submission_type: Optional[str] = None, date_from=None, date_to=None,
+                     limit: Optional[int] = None, batch_size: int = 500):
+    """Stream submissions matching the export filters with a server-side cursor.
+    
+    ``date_to`` is inclusive: the whole day is exported.
+    """
+    from datetime import timedelta
+    
+    conditions, params = [], []
+    if submission_type:
+        conditions.append("submission_type = %s")
+        params.append(submission_type)
+    if date_from:
+        conditions.append("created_at >= %s")
+        params.append(date_from)
+    if date_to:
+        conditions.append("created_at < %s")
+        params.append(date_to + timedelta(days=1))
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    limit_clause = f"LIMIT {int(limit)}" if limit else ""
+    
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor(name=f"export_rows_{uuid.uuid4().hex[:8]}")
+        cursor.itersize = batch_size
+        cursor.execute(
+            f"SELECT id, submission_type, created_at, pdf_path FROM submissions {where} "
+            f"ORDER BY created_at {limit_clause}",
+            params
+        )
+        for row in cursor:
+            yield dict(row)
+        cursor.close()
+    finally:
+        conn.close()
+
+def export_filename(row: Dict[str, Any]) -> str:
+    return f"{row['created_at']:%Y-%m-%d}_{row['submission_type']}_{row['id']}.pdf"
+
+def iter_submission_pdf(submission_id: str, pdf_path: Optional[str]):
+    """Yield a submission's PDF in chunks from its store, rendering it if missing."""
+    document = None
+    if pdf_path:
+        try:
+            document = get_pdf_store(pdf_path).open(pdf_path)
+        except FileNotFoundError:
+            pass
+    if document is not None:
+        yield from iter_file_chunks(document)
+    else:
+        yield load_submission_pdf(submission_id, None)
+
+def iter_zip_export(rows):
+    """Stream a ZIP of the given submissions' PDFs without holding the archive.
+    
+    Memory use is bounded by one chunk plus zlib state, whatever the number of
+    documents.
+    """
+    sink = ChunkSink()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as bundle:
+        for row in rows:
+            with bundle.open(export_filename(row), 'w', force_zip64=True) as member:
+                for chunk in iter_submission_pdf(row['id'], row['pdf_path']):
+                    member.write(chunk)
+                    data = sink.drain()
+                    if data:
+                        yield data
+            yield sink.drain()
+    yield sink.drain()
+
+def build_merged_pdf(rows: List[Dict[str, Any]]):
+    """Concatenate the submissions' PDFs into one document on a temporary file.
+    
+    Requires the optional pypdf package. Source documents are spooled to disk
+    while pypdf assembles the output; the returned file is positioned at 0.
+    """
+    try:
+        from pypdf import PdfReader, PdfWriter
+    except ImportError:
+        raise RuntimeError("Merged PDF export requires the pypdf package")
+    
+    writer = PdfWriter()
+    sources = []
+    try:
+        for row in rows:
+            source = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+            sources.append(source)
+            for chunk in iter_submission_pdf(row['id'], row['pdf_path']):
+                source.write(chunk)
+            source.seek(0)
+            writer.append(PdfReader(source), outline_item=export_filename(row)[:-4])
+        
+        output = tempfile.TemporaryFile()
+        writer.write(output)
+        output.seek(0)
+        return output
+    finally:
+        for source in sources:
+            source.close()
+
+# ======================
+# Supporting Documents
+# ======================
+
+# Leading bytes of the accepted upload types; the declared type is not trusted
+DOCUMENT_SIGNATURES = {
+    b'%PDF-': 'application/pdf',
+    b'\x89PNG\r\n\x1a\n': 'image/png',
+    b'\xff\xd8\xff': 'image/jpeg',
+}
+DOCUMENT_SNIFF_BYTES = 8
+
+class DocumentRejected(Exception):
+    """An upload that breaks a limit or is not an accepted file type."""
+    
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+class DocumentWriter:
+    """Hash, size-check and spool one uploaded file as its chunks arrive.
+    
+    Limits are checked on every chunk, so an oversized upload is rejected as
+    soon as it crosses the line rather than after it has been received.
+    """
+    
+    def __init__(self, filename: str, budget: int):
+        self.filename = secure_filename(filename or '') or 'document'
+        self.budget = budget
+        self.size = 0
+        self.content_type = None
+        self.head = b''
+        self.sha256 = hashlib.sha256()
+        self.spool = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    
+    def _sniff(self):
+        for signature, content_type in DOCUMENT_SIGNATURES.items():
+            if self.head.startswith(signature):
+                self.content_type = content_type
+                return
+        raise DocumentRejected(f"'{self.filename}' is not a PDF, PNG or JPEG file", 415)
+    
+    def write(self, data: bytes):
+        self.size += len(data)
+        if self.size > DOCUMENT_MAX_FILE_BYTES:
+            raise DocumentRejected(
+                f"'{self.filename}' exceeds the {DOCUMENT_MAX_FILE_BYTES // (1024 * 1024)} MB per-file limit", 413)
+        if self.size > self.budget:
+            raise DocumentRejected(
+                f"Documents for this submission exceed the {DOCUMENT_MAX_SUBMISSION_BYTES // (1024 * 1024)} MB limit", 413)
+        
+        if self.content_type is None:
+            self.head += data[:DOCUMENT_SNIFF_BYTES]
+            if len(self.head) >= DOCUMENT_SNIFF_BYTES:
+                self._sniff()
+        
+        self.sha256.update(data)
+        self.spool.write(data)
+    
+    def finish(self):
+        if self.content_type is None:
+            self._sniff()
+        self.spool.seek(0)
+    
+    def close(self):
+        self.spool.close()
+
+def list_documents(submission_ids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+    """Return the uploaded documents of each submission, oldest first."""
+    if not submission_ids:
+        return {}
+    
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute(
+        """
+        SELECT id, submission_id, filename, content_type, size, sha256, locator, created_at
+        FROM submission_documents
+        WHERE submission_id = ANY(%s)
+        ORDER BY created_at
+        """,
+        (list(submission_ids),)
+    )
+    documents = {}
+    for row in cursor.fetchall():
+        documents.setdefault(row['submission_id'], []).append(dict(row))
+    
+    cursor.close()
+    conn.close()
+    
+    return documents
+
+def store_document(submission_id: str, writer: DocumentWriter, store: PDFStore) -> Dict[str, Any]:
+    """Save a finished upload content-addressed by its hash and record it."""
+    digest = writer.sha256.hexdigest()
+    locator = store.save_stream(f"documents/{digest[:2]}/{digest}", writer.spool)
+    document = {
+        'id': str(uuid.uuid4()),
+        'submission_id': submission_id,
+        'filename': writer.filename,
+        'content_type': writer.content_type,
+        'size': writer.size,
+        'sha256': digest,
+        'locator': locator,
+        'created_at': datetime.now(timezone.utc),
+    }
+    
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute(
+        """
+        INSERT INTO submission_documents (id, submission_id, filename, content_type, size, sha256, locator, created_at)
+        VALUES (%(id)s, %(submission_id)s, %(filename)s, %(content_type)s, %(size)s, %(sha256)s, %(locator)s, %(created_at)s)
+        ON CONFLICT (submission_id, sha256) DO NOTHING
+        """,
+        document
+    )
+    
+    conn.commit()
+    cursor.close()
+    conn.close()
+    
+    return document
+
+def receive_documents(submission_id: str, stream, boundary: str) -> List[Dict[str, Any]]:
+    """Stream multipart file parts from ``stream`` into the document store.
+    
+    Files are parsed incrementally in PDFStore.CHUNK_SIZE reads, so memory use
+    does not grow with the upload. A file identical to one already attached
+    to the submission is reported with ``deduplicated`` and not stored again.
+    """
+    existing = list_documents([submission_id]).get(submission_id, [])
+    known = {document['sha256']: document for document in existing}
+    budget = DOCUMENT_MAX_SUBMISSION_BYTES - sum(document['size'] for document in existing)
+    store = get_pdf_store()
+    
+    # Non-file fields are discarded as they stream past, so only the part count is bounded
+    decoder = MultipartDecoder(boundary.encode(), max_parts=DOCUMENT_MAX_FILES + 20)
+    received = []
+    writer = None
+    try:
+        while True:
+            chunk = stream.read(PDFStore.CHUNK_SIZE)
+            decoder.receive_data(chunk or None)
+            event = decoder.next_event()
+            while not isinstance(event, (NeedData, Epilogue)):
+                if isinstance(event, File):
+                    if len(known) >= DOCUMENT_MAX_FILES:
+                        raise DocumentRejected(f"A submission can have at most {DOCUMENT_MAX_FILES} documents", 413)
+                    writer = DocumentWriter(event.filename, budget)
+                elif isinstance(event, Data) and writer is not None:
+                    writer.write(event.data)
+                    if not event.more_data:
+                        writer.finish()
+                        digest = writer.sha256.hexdigest()
+                        if digest in known:
+                            received.append({**known[digest], 'deduplicated': True})
+                        else:
+                            document = store_document(submission_id, writer, store)
+                            known[digest] = document
+                            budget -= document['size']
+                            received.append({**document, 'deduplicated': False})
+                        writer.close()
+                        writer = None
+                event = decoder.next_event()
+            if isinstance(event, Epilogue) or not chunk:
+                break
+    finally:
+        if writer is not None:
+            writer.close()
+    
+    return received
+
+# ======================
+# Analytics Rollups
+# ======================
+
+# submission_stats_daily holds one counter per (day, type, dimension, bucket).
+# Dimensions: 'total'; the range fields below and 'employees' (size bands);
+# 'admin_email' (sent/pending) and 'customer_email' (sent/failed) outcomes per
+# submission; 'admin_send' (ok/failed) per immediate admin message.
+STATS_RANGE_FIELDS = ["monthly_income_range", "preferred_monthly_premium_range"]
+EMPLOYEE_BANDS = [(1, 9), (10, 49), (50, 249), (250, None)]
+STATS_BUCKET_MAX_LENGTH = 100
+
+def range_bucket(value) -> str:
+    value = str(value or '').strip()
+    return value[:STATS_BUCKET_MAX_LENGTH] if value and value != 'N/A' else 'unspecified'
+
+def employee_band(value) -> str:
+    match = re.match(r'\s*(\d{1,9})', str(value or ''))
+    if match:
+        count = int(match.group(1))
+        for low, high in EMPLOYEE_BANDS:
+            if count >= low and (high is None or count <= high):
+                return f"{low}+" if high is None else f"{low}-{high}"
+    return 'unspecified'
+
+def _range_bucket_sql(field: str) -> str:
+    return (f"left(COALESCE(NULLIF(NULLIF(btrim(submission_data->>'{field}'), ''), 'N/A'), 'unspecified'), "
+            f"{STATS_BUCKET_MAX_LENGTH})")
+
+def _employee_band_sql() -> str:
+    count = "substring(submission_data->>'number_of_employees_seeking_coverage' FROM '^\\s*(\\d{1,9})')::bigint"
+    cases = []
+    for low, high in EMPLOYEE_BANDS:
+        if high is None:
+            cases.append(f"WHEN {count} >= {low} THEN '{low}+'")
+        else:
+            cases.append(f"WHEN {count} BETWEEN {low} AND {high} THEN '{low}-{high}'")
+    return f"CASE {' '.join(cases)} ELSE 'unspecified' END"
+
+def submission_stat_buckets(submission_type: str, data: Dict[str, Any]) -> List[tuple]:
+    """Return the (dimension, bucket) pairs a submission's form data counts toward."""
+    buckets = [('total', 'all')]
+    if submission_type == 'individual':
+        buckets.extend((field, range_bucket(data.get(field))) for field in STATS_RANGE_FIELDS)
+    else:
+        buckets.append(('employees', employee_band(data.get('number_of_employees_seeking_coverage'))))
+    return buckets
+
+def increment_stats(cursor, counts: List[tuple]) -> None:
+    """Add ``(day, submission_type, dimension, bucket, delta)`` rows to the rollup."""
+    from psycopg2.extras import execute_values
+    
+    execute_values(
+        cursor,
+        """
+        INSERT INTO submission_stats_daily (day, submission_type, dimension, bucket, count) VALUES %s
+        ON CONFLICT (day, submission_type, dimension, bucket)
+        DO UPDATE SET count = submission_stats_daily.count + EXCLUDED.count
+        """,
+        counts
+    )
+
+def record_submission_stats(submission: 'InsuranceSubmission', admin_email_sent: bool,
+                            customer_email_sent: bool, admin_send_results: Dict[str, bool]) -> None:
+    """Count a processed submission in the daily rollup.
+    
+    Failures are logged rather than raised; `flask stats backfill` can
+    rebuild any day from the submissions table.
+    """
+    day = submission.created_at.astimezone(timezone.utc).date()
+    buckets = submission_stat_buckets(submission.submission_type, submission.submission_data)
+    buckets.append(('admin_email', 'sent' if admin_email_sent else 'pending'))
+    buckets.append(('customer_email', 'sent' if customer_email_sent else 'failed'))
+    counts = [(day, submission.submission_type, dimension, bucket, 1) for dimension, bucket in buckets]
+    for sent in admin_send_results.values():
+        counts.append((day, submission.submission_type, 'admin_send', 'ok' if sent else 'failed', 1))
+    
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        increment_stats(cursor, counts)
+        conn.commit()
+        cursor.close()
+        conn.close()
+    except Exception as e:
+        logger.warning("Could not update stats rollup for %s: %s", submission.id, e)
+
+def backfill_stats(date_from, date_to) -> int:
+    """Rebuild the rollup for ``date_from``..``date_to`` (inclusive) from submissions.
+    
+    'admin_send' attempt counts are not recoverable from stored rows and are
+    left untouched. Returns the number of rollup rows written.
+    """
+    from datetime import timedelta
+    
+    lateral_values = ",\n".join(
+        ["('total', 'all')",
+         "('admin_email', CASE WHEN s.email_sent THEN 'sent' ELSE 'pending' END)",
+         "('customer_email', CASE WHEN s.customer_email_sent THEN 'sent' ELSE 'failed' END)"]
+        + [f"('{field}', CASE WHEN s.submission_type = 'individual' THEN {_range_bucket_sql(field)} END)"
+           for field in STATS_RANGE_FIELDS]
+        + [f"('employees', CASE WHEN s.submission_type = 'company' THEN {_employee_band_sql()} END)"]
+    )
+    
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    # Hold off concurrent increments so the rebuilt days are not counted twice
+    cursor.execute("LOCK TABLE submission_stats_daily IN SHARE ROW EXCLUSIVE MODE")
+    cursor.execute(
+        "DELETE FROM submission_stats_daily WHERE day BETWEEN %s AND %s AND dimension <> 'admin_send'",
+        (date_from, date_to)
+    )
+    cursor.execute(
+        f"""
+        INSERT INTO submission_stats_daily (day, submission_type, dimension, bucket, count)
+        SELECT (s.created_at AT TIME ZONE 'UTC')::date, s.submission_type, d.dimension, d.bucket, count(*)
+        FROM submissions s
+        CROSS JOIN LATERAL (VALUES {lateral_values}) AS d(dimension, bucket)
+        WHERE s.created_at >= %s AND s.created_at < %s AND d.bucket IS NOT NULL
+        GROUP BY 1, 2, 3, 4
+        """,
+        (datetime.combine(date_from, datetime.min.time(), timezone.utc),
+         datetime.combine(date_to + timedelta(days=1), datetime.min.time(), timezone.utc))
+    )
+    written = cursor.rowcount
+    
+    conn.commit()
+    cursor.close()
+    conn.close()
+    
+    stats_cache.clear()
+    return written
+
+stats_cache = LRUCache(max_size=256, ttl=STATS_CACHE_TTL)
+
+def get_stats(date_from, date_to, submission_type: Optional[str] = None) -> Dict[str, Any]:
+    """Summarize the rollup between two dates (inclusive), reading O(days) rows."""
+    cache_key = f"{date_from}:{date_to}:{submission_type or ''}"
+    cached = stats_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
+    type_filter = "AND submission_type = %s" if submission_type else ""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute(
+        f"""
+        SELECT day, submission_type, dimension, bucket, count
+        FROM submission_stats_daily
+        WHERE day BETWEEN %s AND %s {type_filter}
+        ORDER BY day
+        """,
+        (date_from, date_to, *([submission_type] if submission_type else []))
+    )
+    rows = cursor.fetchall()
+    
+    cursor.close()
+    conn.close()
+    
+    from datetime import timedelta
+    
+    daily = OrderedDict()
+    for offset in range((date_to - date_from).days + 1):
+        day = (date_from + timedelta(days=offset)).isoformat()
+        daily[day] = {'date': day, 'total': 0}
+    distributions = {field: {} for field in STATS_RANGE_FIELDS + ['employees']}
+    delivery = {'admin_email': {}, 'customer_email': {}, 'admin_send': {}}
+    for row in rows:
+        dimension, bucket, count = row['dimension'], row['bucket'], row['count']
+        if dimension == 'total':
+            day = daily[row['day'].isoformat()]
+            day[row['submission_type']] = day.get(row['submission_type'], 0) + count
+            day['total'] += count
+        elif dimension in distributions:
+            distributions[dimension][bucket] = distributions[dimension].get(bucket, 0) + count
+        elif dimension in delivery:
+            delivery[dimension][bucket] = delivery[dimension].get(bucket, 0) + count
+    
+    for outcome, success in (('admin_email', 'sent'), ('customer_email', 'sent'), ('admin_send', 'ok')):
+        total = sum(delivery[outcome].values())
+        delivery[outcome]['success_rate'] = round(delivery[outcome].get(success, 0) / total, 4) if total else None
+    
+    stats = {
+        'from': date_from.isoformat(),
+        'to': date_to.isoformat(),
+        'type': submission_type,
+        'total': sum(day['total'] for day in daily.values()),
+        'daily': list(daily.values()),
+        'distributions': distributions,
+        'email_delivery': delivery,
+    }
+    stats_cache.set(cache_key, stats)
+    return stats
+
+# ======================
+# Utility Functions
+# ======================
+
+def normalize_phone(phone: str) -> str:
+    """Reduce a phone number to its digits, matching the applicant_phone column."""
+    return re.sub(r'[^0-9]', '', phone or '')
+
+def is_admin_request() -> bool:
+    """Check the request for a valid admin API key."""
+    if not ADMIN_API_KEY:
+        return False
+    
+    token = request.headers.get('X-Admin-Token', '')
+    auth_header = request.headers.get('Authorization', '')
+    if not token and auth_header.startswith('Bearer '):
+        token = auth_header[len('Bearer '):]
+    
+    return bool(token) and hmac.compare_digest(token.encode(), ADMIN_API_KEY.encode())
+
+def require_admin(view):
+    """Restrict a route to callers presenting ADMIN_API_KEY."""
+    @wraps(view)
+    def wrapped(*args, **kwargs):
+        if not is_admin_request():
+            return jsonify({"error": "Unauthorized"}), 401
+        return view(*args, **kwargs)
+    return wrapped
+
+def sign_pdf_link(submission_id: str, expires: int, scope: str = '') -> str:
+    if not PDF_LINK_SECRET:
+        raise RuntimeError("PDF_LINK_SECRET or SECRET_KEY must be set to sign links")
+    message = f"{submission_id}:{expires}{':' + scope if scope else ''}".encode()
+    digest = hmac.new(PDF_LINK_SECRET.encode(), message, 'sha256').digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b'=').decode()
+
+def make_pdf_token(submission_id: str, ttl: int = PDF_LINK_TTL, scope: str = '') -> str:
+    """Return an expiring ``<expires>.<signature>`` token for a submission.
+    
+    Download tokens have no scope; other uses (``upload``) sign their scope in
+    so one kind of link cannot be used as another.
+    """
+    expires = int(time.time()) + ttl
+    return f"{expires}.{sign_pdf_link(submission_id, expires, scope)}"
+
+def verify_pdf_token(submission_id: str, token: str, scope: str = '') -> bool:
+    """Check a token's signature, scope and expiry; always False without a secret."""
+    if not PDF_LINK_SECRET:
+        return False
+    expires, _, signature = token.partition('.')
+    if not expires.isdigit() or int(expires) < time.time():
+        return False
+    return hmac.compare_digest(signature, sign_pdf_link(submission_id, int(expires), scope))
+
+def pdf_download_path(submission_id: str) -> str:
+    """Return the signed, relative download path for a submission's PDF.
+    
+    Unsigned when no secret is configured; REQUIRE_SIGNED_PDF_LINKS cannot be
+    enabled in that case (see create_app).
+    """
+    if not PDF_LINK_SECRET:
+        return f"/download-pdf/{submission_id}"
+    return f"/download-pdf/{submission_id}?token={make_pdf_token(submission_id)}"
+
+def normalize_field_key(field: str) -> str:
+    """Normalize field names to match form data keys."""
+    return (field.replace("(", "")
+                .replace(")", "")
+                .replace("/", "")
+                .replace(",", "")
+                .replace("  ", " ")
+                .replace(" ", "_")
+                .lower())
+
+def get_fields_for_type(submission_type: str) -> List[str]:
+    """Get field list based on submission type."""
+    return INDIVIDUAL_FIELDS if submission_type == "individual" else COMPANY_FIELDS
+
+# Declarative submission schemas, compiled once by compile_schema(). Field
+# options: required, label, type (string, integer, count, date), format
+# (email, phone), enum, min/max (integers and counts) and max_length. A count
+# is a number or a range such as "10-49" or "250+", as the forms send them.
+# Keys not listed are only held to MAX_FIELD_LENGTH.
+MAX_FIELD_LENGTH = 2000
+PAYMENT_FREQUENCIES = ["monthly", "quarterly", "semi-annually", "bi-annually", "annually", "yearly"]
+
+SUBMISSION_SCHEMAS = {
+    'individual': {
+        'full_name': {'required': True, 'max_length': 200},
+        'email': {'required': True, 'label': 'Email Address', 'format': 'email', 'max_length': 254},
+        'phone_number': {'required': True, 'format': 'phone', 'max_length': 32},
+        'age': {'type': 'integer', 'min': 0, 'max': 120},
+        'number_of_dependents': {'type': 'integer', 'min': 0, 'max': 50},
+        'location': {'max_length': 200},
+        'occupation': {'max_length': 200},
+        'frequency_of_hospital_visits': {'enum': ["rarely", "occasionally", "yearly", "quarterly",
+                                                  "monthly", "weekly", "frequently"]},
+        'preferred_payment_frequency': {'enum': PAYMENT_FREQUENCIES},
+        'priority': {'max_length': 200},
+    },
+    'company': {
+        'company_name': {'required': True, 'max_length': 200},
+        'contact_email': {'required': True, 'format': 'email', 'max_length': 254},
+        'contact_phone_number': {'required': True, 'format': 'phone', 'max_length': 32},
+        'contact_person_name': {'max_length': 200},
+        'number_of_employees_seeking_coverage': {'type': 'count', 'min': 1, 'max': 1000000},
+        'years_in_operation': {'type': 'integer', 'min': 0, 'max': 500},
+        'preferred_coverage_start_date': {'type': 'date'},
+        'registration_number': {'max_length': 100},
+        'policy_duration': {'max_length': 100},
+    },
+}
+
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+PHONE_FORMATTING_PATTERN = re.compile(r'[\s\-\(\)\.+]')
+INTEGER_PATTERN = re.compile(r'^\d+$')
+COUNT_PATTERN = re.compile(r'^(\d{1,9})\s*(?:-\s*\d{1,9}|\+)?$')
+DATE_PATTERN = re.compile(r'^(\d{4}-\d{2}-\d{2}|\d{2}/\d{2}/\d{4})$')
+ENUM_NORMALIZE_PATTERN = re.compile(r'[\s_\-]+')
+
+def _valid_phone(value: str) -> bool:
+    digits = PHONE_FORMATTING_PATTERN.sub('', value)
+    return digits.isdigit() and len(digits) >= 10
+
+def _compile_field(key: str, spec: Dict[str, Any]) -> tuple:
+    """Turn one field spec into (key, label, required, checks).
+
+    Each check is a ``(predicate, message, enforced)`` triple; type and enum
+    checks are only enforced when SCHEMA_CHECK_MODE is 'enforce'.
+    """
+    label = spec.get('label') or key.replace('_', ' ').title()
+    checks = []
+    strict = SCHEMA_CHECK_MODE == 'enforce'
+    low, high = spec.get('min'), spec.get('max')
+    
+    def in_range(number: int) -> bool:
+        return (low is None or number >= low) and (high is None or number <= high)
+    
+    max_length = spec.get('max_length', MAX_FIELD_LENGTH)
+    checks.append((lambda v, n=max_length: len(v) <= n,
+                   f"'{label}' must be at most {max_length} characters.", True))
+    
+    if spec.get('format') == 'email':
+        checks.append((lambda v: EMAIL_PATTERN.match(v) is not None, "Invalid email format: {value}", True))
+    elif spec.get('format') == 'phone':
+        checks.append((_valid_phone, "Invalid phone number format: {value}", True))
+    
+    if spec.get('type') == 'integer':
+        checks.append((INTEGER_PATTERN.match, f"'{label}' must be a whole number.", strict))
+        checks.append((lambda v: not v.isdigit() or in_range(int(v)),
+                       f"'{label}' must be between {low} and {high}.", strict))
+    elif spec.get('type') == 'count':
+        checks.append((COUNT_PATTERN.match, f"'{label}' must be a number or a range such as 10-49.", strict))
+        checks.append((lambda v: not COUNT_PATTERN.match(v) or in_range(int(COUNT_PATTERN.match(v).group(1))),
+                       f"'{label}' must be between {low} and {high}.", strict))
+    elif spec.get('type') == 'date':
+        checks.append((DATE_PATTERN.match, f"'{label}' must be a date (YYYY-MM-DD).", strict))
+    
+    if 'enum' in spec:
+        allowed = frozenset(ENUM_NORMALIZE_PATTERN.sub('-', option.lower()) for option in spec['enum'])
+        checks.append((lambda v: ENUM_NORMALIZE_PATTERN.sub('-', v.lower()) in allowed,
+                       f"'{label}' must be one of: {', '.join(spec['enum'])}.",
+                       strict))
+    
+    return key, label, spec.get('required', False), tuple(checks)
+
+def compile_schema(schema: Dict[str, Dict[str, Any]]) -> tuple:
+    return tuple(_compile_field(key, spec) for key, spec in schema.items())
+
+COMPILED_SCHEMAS = {
+    submission_type: compile_schema(schema) for submission_type, schema in SUBMISSION_SCHEMAS.items()
+}
+
+def validate_submission(submission_type: str, data: Dict[str, Any]) -> List[Dict[str, str]]:
+    """Validate cleaned submission data and return every error found.
+
+    Each error is ``{"field": key, "message": text}``; an empty list means the
+    submission is valid. Expects data from clean_form_data (string values,
+    'N/A' for blanks).
+    """
+    fields = COMPILED_SCHEMAS.get(submission_type)
+    if fields is None:
+        return [{"field": "type", "message": "Invalid submission type. Must be 'individual' or 'company'."}]
+    if not data:
+        return [{"field": "data", "message": "Submission data cannot be empty."}]
+    
+    errors = []
+    for key, label, required, checks in fields:
+        value = data.get(key)
+        if value is not None:
+            value = str(value).strip()
+        if not value or value == 'N/A':
+            if required:
+                errors.append({"field": key, "message": f"Required field '{label}' is missing or empty."})
+            continue
+        
+        for predicate, message, enforced in checks:
+            if not predicate(value):
+                if enforced:
+                    errors.append({"field": key, "message": message.format(value=value)})
+                    break
+                logger.warning("Unexpected value for %s: %s", key, message)
+    
+    for key, value in data.items():
+        if key not in SUBMISSION_SCHEMAS[submission_type] and isinstance(value, str) and len(value) > MAX_FIELD_LENGTH:
+            errors.append({"field": key, "message": f"'{key}' must be at most {MAX_FIELD_LENGTH} characters."})
+    
+    return errors
+
+def validate_submission_data_enhanced(submission_type: str, data: Dict[str, Any]) -> tuple[bool, str]:
+    """Validate a submission, returning (is_valid, all error messages joined)."""
+    errors = validate_submission(submission_type, data)
+    return not errors, " ".join(error['message'] for error in errors)
+
+# ======================
+# Email Functions
+# ======================
+
+def send_email_with_attachment(subject: str, html_content: str, recipients: List[str], 
+                              cc: List[str] = None, pdf_attachment: Optional[io.BytesIO] = None,
+                              timeout: float = 30,
+                              attachments: Optional[List[tuple]] = None) -> bool:
+    """Send email with PDF attachment using SMTP_SSL.
+    
+    ``attachments`` takes extra ``(filename, bytes)`` pairs, e.g. a digest's
+    zipped PDF bundle. Returns False at once while the SMTP breaker is open.
+    A timeout shorter than NOTIFICATION_TIMEOUT (cut down to the request's
+    deadline) is not counted against the breaker when it expires.
+    """
+    import smtplib
+    from email.mime.application import MIMEApplication
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.text import MIMEText
+    
+    # Ensure CC recipient is always included (only for admin emails)
+    all_recipients = recipients[:]
+    if cc:
+        all_recipients.extend(cc)
+    
+    msg = MIMEMultipart('mixed')
+    msg['From'] = f"LifeLine Insurance <{SMTP_USERNAME}>"
+    msg['To'] = ", ".join(recipients)
+    msg['Subject'] = subject
+    
+    if cc:
+        msg['Cc'] = ", ".join(cc)
+    
+    # Attach HTML content
+    msg.attach(MIMEText(html_content, 'html', 'utf-8'))
+    
+    # Attach PDF if provided
+    if pdf_attachment:
+        pdf_attachment.seek(0)
+        part = MIMEApplication(
+            pdf_attachment.read(),
+            Name=f"insurance_submission_{datetime.now().date()}.pdf"
+        )
+        part['Content-Disposition'] = f'attachment; filename="insurance_submission_{datetime.now().date()}.pdf"'
+        msg.attach(part)
+    
+    for filename, content in attachments or []:
+        part = MIMEApplication(content, Name=filename)
+        part['Content-Disposition'] = f'attachment; filename="{filename}"'
+        msg.attach(part)
+    
+    if not smtp_breaker.allow():
+        logger.warning("SMTP circuit breaker open; not sending email to %s recipient(s)", len(all_recipients))
+        return False
+    
+    try:
+        with smtplib.SMTP_SSL(SMTP_SERVER, SMTP_PORT, timeout=timeout) as server:
+            server.login(SMTP_USERNAME, SMTP_PASSWORD)
+            server.send_message(msg, to_addrs=all_recipients)
+        
+        smtp_breaker.record_success()
+        logger.info("Email sent successfully to %s primary recipients and %s CC recipients",
+                    len(recipients), len(cc) if cc else 0)
+        return True
+    
+    except smtplib.SMTPRecipientsRefused as e:
+        # The server is up; only these addresses were refused
+        smtp_breaker.record_success()
+        logger.error("Failed to send email: %s", e)
+        return False
+    
+    except TimeoutError as e:
+        if timeout < NOTIFICATION_TIMEOUT:
+            smtp_breaker.release()
+        else:
+            smtp_breaker.record_failure(e)
+        logger.error("Failed to send email within %ss: %s", timeout, e)
+        return False
+        
+    except Exception as e:
+        smtp_breaker.record_failure(e)
+        logger.error("Failed to send email: %s", e)
+        return False
+
+_notification_executor = None
+_notification_executor_lock = threading.Lock()
+
+def get_notification_executor() -> ThreadPoolExecutor:
+    """Return the shared, bounded thread pool used for outgoing email.
+
+    The pool is created lazily so that it is built inside each gunicorn worker
+    rather than in the preloaded master process.
+    """
+    global _notification_executor
+    if _notification_executor is None:
+        with _notification_executor_lock:
+            if _notification_executor is None:
+                _notification_executor = ThreadPoolExecutor(
+                    max_workers=NOTIFICATION_MAX_WORKERS,
+                    thread_name_prefix='notify'
+                )
+    return _notification_executor
+
+def dispatch_notifications(messages: Dict[str, Dict[str, Any]],
+                           timeout: float = NOTIFICATION_TIMEOUT) -> tuple:
+    """Send independent email messages concurrently and collect the results.
+
+    ``messages`` maps a caller-chosen key to keyword arguments for
+    ``send_email_with_attachment``. Every message runs in its own SMTP session,
+    so the total wait is bounded by ``timeout`` instead of the sum of all sends.
+    
+    Returns ``(results, running)``: ``results`` maps each finished message to
+    whether it was sent, and ``running`` maps messages still in flight after
+    ``timeout`` to their futures. A running send cannot be cancelled and may
+    still deliver, so callers must not treat it as failed; see
+    ``settle_late_notifications``.
+    """
+    executor = get_notification_executor()
+    futures = {
+        key: executor.submit(send_email_with_attachment, timeout=timeout, **kwargs)
+        for key, kwargs in messages.items()
+    }
+    
+    deadline = time.monotonic() + timeout
+    results, running = {}, {}
+    for key, future in futures.items():
+        try:
+            results[key] = future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except FutureTimeoutError:
+            if future.cancel():
+                # Never started (pool saturated), so nothing was sent
+                results[key] = False
+            else:
+                running[key] = future
+            logger.warning("Notification '%s' did not finish within %ss", key, timeout)
+        except Exception as e:
+            logger.error("Notification '%s' failed: %s", key, e)
+            results[key] = False
+    
+    return results, running
+
+def settle_late_notifications(submission: 'InsuranceSubmission', messages: Dict[str, Dict[str, Any]],
+                              running: Dict[str, Any], admin_ok: bool) -> None:
+    """Record the real outcome of sends still running when process_submission stopped waiting.
+    
+    A late failure is queued like an immediate one; a late customer
+    confirmation is marked sent. ``email_sent`` is set once the last running
+    admin message succeeds, provided ``admin_ok`` says nothing else of the
+    submission's admin notifications failed or was queued. The stats rollup
+    is corrected to match. Runs in the notification pool's threads.
+    """
+    lock = threading.Lock()
+    remaining = set(running)
+    state = {'admin_ok': admin_ok}
+    day = submission.created_at.astimezone(timezone.utc).date()
+    
+    def count(*changes):
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        increment_stats(cursor, [(day, submission.submission_type, dimension, bucket, delta)
+                                 for dimension, bucket, delta in changes])
+        conn.commit()
+        cursor.close()
+        conn.close()
+    
+    def finished(key, future):
+        try:
+            sent = future.result()
+        except Exception:
+            sent = False
+        with lock:
+            remaining.discard(key)
+            if key != 'customer' and not sent:
+                state['admin_ok'] = False
+            admin_done = key != 'customer' and not any(other != 'customer' for other in remaining)
+        
+        try:
+            if key == 'customer':
+                if sent:
+                    update_submission(submission.id, customer_email_sent=True)
+                    # record_submission_stats counted it as failed; move it to sent
+                    count(('customer_email', 'failed', -1), ('customer_email', 'sent', 1))
+                else:
+                    enqueue_notifications(submission.id, messages[key]['recipients'], kind='confirmation')
+                logger.info("Late customer confirmation for %s %s", submission.id, 'sent' if sent else 'failed; queued')
+                return
+            # record_submission_stats left running sends out of admin_send and
+            # counted the submission's admin email as pending
+            changes = [('admin_send', 'ok' if sent else 'failed', 1)]
+            if not sent:
+                enqueue_notifications(submission.id, message_recipients(messages[key]))
+            elif admin_done and state['admin_ok']:
+                update_submission(submission.id, email_sent=True)
+                changes += [('admin_email', 'pending', -1), ('admin_email', 'sent', 1)]
+            count(*changes)
+            logger.info("Late admin notification '%s' for %s %s", key, submission.id,
+                        'sent' if sent else 'failed; queued')
+        except Exception as e:
+            logger.error("Could not record late notification '%s' for %s: %s", key, submission.id, e)
+    
+    for key, future in running.items():
+        future.add_done_callback(lambda future, key=key: finished(key, future))
+
+def build_admin_notifications(subject: str, html_content: str,
+                              pdf_bytes: Optional[bytes] = None) -> Dict[str, Dict[str, Any]]:
+    """Build the admin notification messages for a submission.
+
+    By default a single message goes to ``PRIMARY_RECIPIENTS`` with
+    ``CC_RECIPIENT`` copied. With ``NOTIFY_PER_INSURER`` enabled each insurer
+    (and the CC address) gets its own message, so one slow or bouncing domain
+    cannot hold up the others. Keys are prefixed with ``admin``. Recipients in
+    ``DIGEST_RECIPIENTS`` are left out; they are queued for their digest.
+    Recipients in ``PDF_LINK_RECIPIENTS`` get the message without the PDF
+    attached (the email's signed download link replaces it), in a separate
+    ``admin:links`` message when not notifying per insurer.
+    """
+    def message(recipients, cc=None, attach=True):
+        return {
+            'subject': subject,
+            'html_content': html_content,
+            'recipients': recipients,
+            'cc': cc,
+            'pdf_attachment': io.BytesIO(pdf_bytes) if pdf_bytes is not None and attach else None
+        }
+    
+    primary = [recipient for recipient in PRIMARY_RECIPIENTS if not is_digest_recipient(recipient)]
+    cc = [] if is_digest_recipient(CC_RECIPIENT) else [CC_RECIPIENT]
+    
+    if NOTIFY_PER_INSURER:
+        return {
+            f"admin:{recipient}": message([recipient], attach=not wants_pdf_link(recipient))
+            for recipient in primary + cc
+        }
+    
+    messages = {}
+    for key, attach in (('admin', True), ('admin:links', False)):
+        group = [recipient for recipient in primary if wants_pdf_link(recipient) != attach]
+        group_cc = [recipient for recipient in cc if wants_pdf_link(recipient) != attach]
+        if group:
+            messages[key] = message(group, group_cc or None, attach)
+        elif group_cc:
+            messages[key] = message(group_cc, attach=attach)
+    return messages
+
+def wants_pdf_link(recipient: str) -> bool:
+    return '*' in PDF_LINK_RECIPIENTS or recipient.lower() in PDF_LINK_RECIPIENTS
+
+def message_recipients(message: Dict[str, Any]) -> List[str]:
+    """Return every address a notification message is delivered to."""
+    return list(message['recipients']) + list(message.get('cc') or [])
+
+def pdf_download_url(submission_id: str) -> str:
+    """Return the signed, absolute download link placed in notification emails."""
+    return f"{PUBLIC_BASE_URL}{pdf_download_path(submission_id)}"
+
+def build_admin_email_html(submission_type: str, data: Dict[str, Any], submission_id: str) -> str:
+    """Build professional HTML email with submission data for admin team."""
+    fields = get_fields_for_type(submission_type)
+    
+    data_rows = ""
+    for field in fields:
+        field_key = normalize_field_key(field)
+        value = str(data.get(field_key, 'N/A'))
+        if len(value) > 100:
+            value = value[:97] + "..."
+        
+        data_rows += f"""
+            <tr>
+                <td style="padding:12px;font-weight:bold;color:#333;border-bottom:1px solid #eee;background:#f8f9fa;width:40%;">{field}</td>
+                <td style="padding:12px;color:#555;border-bottom:1px solid #eee;width:60%;">{value}</td>
+            </tr>
+        """
+    
+    pdf_link = pdf_download_url(submission_id)
+    
+    return f"""
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <meta charset="UTF-8">
+        <meta name="viewport" content="width=device-width, initial-scale=1.0">
+        <title>Insurance Submission - LifeLine</title>
+    </head>
+    <body style="margin:0;padding:0;font-family:Arial,sans-serif;background:#f5f5f5;">
+        <div style="max-width:800px;margin:20px auto;background:white;border-radius:8px;overflow:hidden;box-shadow:0 4px 6px rgba(0,0,0,0.1);">
+            <div style="background:white;padding:30px;text-align:center;">
+                <img src="{LOGO_URL}" width="80" alt="LifeLine Logo" style="display:block;margin:0 auto 15px auto;" />
                 <h1 style="color:linear-gradient(135deg,{BRAND_COLOR},{BRAND_COLOR_SECONDARY});margin:0;font-size:28px;line-height:1.3;text-shadow:0 2px 4px rgba(0,0,0,0.3);">New Insurance Request</h1>
                 <p style="color:linear-gradient(135deg,{BRAND_COLOR},{BRAND_COLOR_SECONDARY});margin:8px 0 0 0;font-size:16px;">Submission Type: {submission_type.title()}</p>
             </div>
@@ -815,23 +3714,1084 @@ def build_customer_confirmation_email(submission_type: str, data: Dict[str, Any]
                 </div>
             </div>
             
-            <div style="background:#f8f9fa;padding:25px;text-align:center;border-top:1px solid #eee;">
-                <div style="margin-bottom:15px;">
-                    <img src="{LOGO_URL}" width="40" alt="LifeLine Logo" style="opacity:0.7;" />
-                </div>
-                <p style="margin:0;color:#888;font-size:14px;line-height:1.5;">
-                    <strong>LifeLine Insurance Services</strong><br>
-                    Professional Insurance Solutions | Trusted Coverage<br>
-                    This is an automated confirmation. Please save this email for your records.
-                </p>
-                <p style="margin:10px 0 0 0;color:#aaa;font-size:12px;">
-                    © {datetime.now().year} LifeLine Insurance Services. All rights reserved.
-                </p>
-            </div>
-        </div>
-    </body>
-    </html>
+            <div style="background:#f8f9fa;padding:25px;text-align:center;border-top:1px solid #eee;">
+                <div style="margin-bottom:15px;">
+                    <img src="{LOGO_URL}" width="40" alt="LifeLine Logo" style="opacity:0.7;" />
+                </div>
+                <p style="margin:0;color:#888;font-size:14px;line-height:1.5;">
+                    <strong>LifeLine Insurance Services</strong><br>
+                    Professional Insurance Solutions | Trusted Coverage<br>
+                    This is an automated confirmation. Please save this email for your records.
+                </p>
+                <p style="margin:10px 0 0 0;color:#aaa;font-size:12px;">
+                    © {datetime.now().year} LifeLine Insurance Services. All rights reserved.
+                </p>
+            </div>
+        </div>
+    </body>
+    </html>
+    """
+
+# ======================
+# Notification Digests
+# ======================
+
+def is_digest_recipient(recipient: str) -> bool:
+    return recipient.lower() in DIGEST_RECIPIENTS
+
+def get_digest_recipients() -> List[str]:
+    """Return the admin recipients (primary and CC) configured for digest delivery."""
+    return [recipient for recipient in PRIMARY_RECIPIENTS + [CC_RECIPIENT] if is_digest_recipient(recipient)]
+
+def enqueue_notifications(submission_id: str, recipients: List[str], kind: str = 'digest') -> None:
+    """Queue a submission for the next digest of each recipient.
+    
+    ``kind='confirmation'`` instead queues a customer confirmation that could
+    not be sent, and ``kind='process'`` (recipient ``'*'``) a submission whose
+    PDF and notifications were deferred; both are handled by
+    `flask notifications retry`.
+    """
+    if not recipients:
+        return
+    
+    from psycopg2.extras import execute_values
+    
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    execute_values(
+        cursor,
+        """
+        INSERT INTO notification_queue (submission_id, recipient, kind) VALUES %s
+        ON CONFLICT (kind, recipient, submission_id) WHERE sent_at IS NULL DO NOTHING
+        """,
+        [(submission_id, recipient, kind) for recipient in recipients]
+    )
+    if kind == 'digest':
+        # Delivered on commit; lets event streams settle without waiting for the digest
+        cursor.execute("SELECT pg_notify(%s, %s)", (SUBMISSION_EVENTS_CHANNEL,
+                                                    json_dumps({'id': submission_id, 'event': 'email_queued'})))
+    
+    conn.commit()
+    cursor.close()
+    conn.close()
+
+def fetch_pending_notifications() -> Dict[str, List[Dict[str, Any]]]:
+    """Return the unsent queued notifications grouped by recipient, oldest first.
+    
+    Rows that already failed NOTIFICATION_MAX_ATTEMPTS times are left out.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute(
+        """
+        SELECT q.id AS queue_id, q.recipient, s.id, s.submission_type, s.created_at,
+               s.full_name, s.company_name, s.applicant_email, s.applicant_phone, s.pdf_path
+        FROM notification_queue q
+        JOIN submission_ids i ON i.id = q.submission_id
+        JOIN submissions s ON s.id = i.id AND s.created_at = i.created_at
+        WHERE q.sent_at IS NULL AND q.kind = 'digest' AND q.attempts < %s
+        ORDER BY q.recipient, s.created_at
+        """,
+        (NOTIFICATION_MAX_ATTEMPTS,)
+    )
+    pending = {}
+    for row in cursor.fetchall():
+        pending.setdefault(row['recipient'], []).append(dict(row))
+    
+    cursor.close()
+    conn.close()
+    
+    return pending
+
+def record_digest_results(sent_ids: List[int], failed: Dict[int, str]) -> int:
+    """Mark delivered queue rows as sent and flip email_sent in bulk.
+    
+    A submission's ``email_sent`` only becomes true once no recipient is
+    still owed a notification for it. ``failed`` maps the queue ids of
+    undelivered rows to the error; they stay pending for the next run with
+    one more attempt counted. Returns the number of submissions updated.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    completed = []
+    if sent_ids:
+        cursor.execute(
+            "UPDATE notification_queue SET sent_at = now(), attempts = attempts + 1 WHERE id = ANY(%s) "
+            "RETURNING submission_id",
+            (sent_ids,)
+        )
+        submission_ids = list({row['submission_id'] for row in cursor.fetchall()})
+        cursor.execute(
+            """
+            UPDATE submissions s SET email_sent = TRUE, updated_at = now()
+            FROM submission_ids i
+            WHERE i.id = ANY(%s) AND s.id = i.id AND s.created_at = i.created_at AND NOT s.email_sent
+              AND NOT EXISTS (
+                  SELECT 1 FROM notification_queue q
+                  WHERE q.submission_id = s.id AND q.sent_at IS NULL AND q.kind = 'digest'
+              )
+            RETURNING s.id, s.submission_type, s.created_at
+            """,
+            (submission_ids,)
+        )
+        rows = cursor.fetchall()
+        completed = [row['id'] for row in rows]
+        if rows:
+            # Move the submissions from 'pending' to 'sent' in the stats rollup
+            counts = {}
+            for row in rows:
+                key = (row['created_at'].astimezone(timezone.utc).date(), row['submission_type'])
+                counts[key] = counts.get(key, 0) + 1
+            increment_stats(cursor, [
+                (day, submission_type, 'admin_email', bucket, delta * count)
+                for (day, submission_type), count in counts.items()
+                for bucket, delta in (('pending', -1), ('sent', 1))
+            ])
+    
+    errors = {}
+    for queue_id, error in failed.items():
+        errors.setdefault(error, []).append(queue_id)
+    for error, queue_ids in errors.items():
+        cursor.execute(
+            "UPDATE notification_queue SET attempts = attempts + 1, last_error = %s WHERE id = ANY(%s)",
+            (error, queue_ids)
+        )
+    
+    conn.commit()
+    cursor.close()
+    conn.close()
+    
+    for submission_id in completed:
+        submission_cache.invalidate(submission_id)
+    return len(completed)
+
+def build_digest_bundle(rows: List[Dict[str, Any]],
+                        max_bytes: int = DIGEST_MAX_ATTACHMENT_BYTES) -> Optional[bytes]:
+    """Zip the PDFs (and, with DIGEST_INCLUDE_DOCUMENTS, uploaded documents) for a digest.
+    
+    Returns None when the bundle would be larger than ``max_bytes``.
+    """
+    documents = list_documents([row['id'] for row in rows]) if DIGEST_INCLUDE_DOCUMENTS else {}
+    
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as bundle:
+        for row in rows:
+            bundle.writestr(f"insurance_submission_{row['id'][:8]}.pdf",
+                            load_submission_pdf(row['id'], row['pdf_path']))
+            for document in documents.get(row['id'], []):
+                source = get_pdf_store(document['locator']).open(document['locator'])
+                member = f"documents/{row['id'][:8]}/{document['sha256'][:8]}_{document['filename']}"
+                with bundle.open(member, 'w') as target:
+                    try:
+                        shutil.copyfileobj(source, target, PDFStore.CHUNK_SIZE)
+                    finally:
+                        source.close()
+            if buffer.tell() > max_bytes:
+                return None
+    return buffer.getvalue()
+
+def build_digest_email_html(rows: List[Dict[str, Any]], include_links: bool) -> str:
+    """Build the digest summary email listing every submission in the period."""
+    link_header = (
+        '<th style="padding:12px;color:white;text-align:left;font-size:13px;">PDF</th>'
+        if include_links else ''
+    )
+    
+    table_rows = ""
+    for row in rows:
+        applicant = row['full_name'] or row['company_name'] or 'N/A'
+        link_cell = (
+            f'<td style="padding:10px;border-bottom:1px solid #eee;">'
+            f'<a href="{pdf_download_url(row["id"])}" style="color:{BRAND_COLOR};font-weight:bold;">Download</a></td>'
+            if include_links else ''
+        )
+        table_rows += f"""
+            <tr>
+                <td style="padding:10px;color:#333;border-bottom:1px solid #eee;font-family:monospace;">{row['id'][:8]}</td>
+                <td style="padding:10px;color:#555;border-bottom:1px solid #eee;">{row['submission_type'].title()}</td>
+                <td style="padding:10px;color:#555;border-bottom:1px solid #eee;">{html.escape(applicant)}</td>
+                <td style="padding:10px;color:#555;border-bottom:1px solid #eee;">{html.escape(row['applicant_email'] or 'N/A')}</td>
+                <td style="padding:10px;color:#555;border-bottom:1px solid #eee;">{html.escape(row['applicant_phone'] or 'N/A')}</td>
+                <td style="padding:10px;color:#555;border-bottom:1px solid #eee;">{row['created_at']:%Y-%m-%d %H:%M} UTC</td>
+                {link_cell}
+            </tr>
+        """
+    
+    documents_note = (
+        "Use the download links to retrieve each application PDF."
+        if include_links else
+        "The application PDFs are attached as a single ZIP archive."
+    )
+    
+    return f"""
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <meta charset="UTF-8">
+        <meta name="viewport" content="width=device-width, initial-scale=1.0">
+        <title>Insurance Submissions Digest - LifeLine</title>
+    </head>
+    <body style="margin:0;padding:0;font-family:Arial,sans-serif;background:#f5f5f5;">
+        <div style="max-width:900px;margin:20px auto;background:white;border-radius:8px;overflow:hidden;box-shadow:0 4px 6px rgba(0,0,0,0.1);">
+            <div style="background:white;padding:30px;text-align:center;">
+                <img src="{LOGO_URL}" width="80" alt="LifeLine Logo" style="display:block;margin:0 auto 15px auto;" />
+                <h1 style="color:{BRAND_COLOR};margin:0;font-size:28px;line-height:1.3;">Insurance Requests Digest</h1>
+                <p style="color:#666;margin:8px 0 0 0;font-size:16px;">{len(rows)} new submission(s) since the last digest</p>
+            </div>
+            
+            <div style="padding:30px;">
+                <p style="color:#555;margin-bottom:25px;font-size:16px;line-height:1.6;">
+                    The following insurance requests were submitted via LifeLine Insurance Services. {documents_note}
+                </p>
+                
+                <div style="overflow-x:auto;margin:25px 0;">
+                    <table style="width:100%;border-collapse:collapse;border:1px solid #ddd;background:white;font-size:13px;">
+                        <thead>
+                            <tr style="background:{BRAND_COLOR};">
+                                <th style="padding:12px;color:white;text-align:left;font-size:13px;">Reference</th>
+                                <th style="padding:12px;color:white;text-align:left;font-size:13px;">Type</th>
+                                <th style="padding:12px;color:white;text-align:left;font-size:13px;">Applicant</th>
+                                <th style="padding:12px;color:white;text-align:left;font-size:13px;">Email</th>
+                                <th style="padding:12px;color:white;text-align:left;font-size:13px;">Phone</th>
+                                <th style="padding:12px;color:white;text-align:left;font-size:13px;">Submitted</th>
+                                {link_header}
+                            </tr>
+                        </thead>
+                        <tbody>
+                            {table_rows}
+                        </tbody>
+                    </table>
+                </div>
+            </div>
+            
+            <div style="background:#f8f9fa;padding:25px;text-align:center;border-top:1px solid #eee;">
+                <p style="margin:0;color:#888;font-size:14px;line-height:1.5;">
+                    <strong>LifeLine Insurance Services</strong><br>
+                    This is an automated notification. Please do not reply to this email.
+                </p>
+                <p style="margin:10px 0 0 0;color:#aaa;font-size:12px;">
+                    © {datetime.now().year} LifeLine Insurance Services. All rights reserved.
+                </p>
+            </div>
+        </div>
+    </body>
+    </html>
+    """
+
+def send_digests(dry_run: bool = False, failed_only: bool = False) -> Dict[str, int]:
+    """Send one digest email per recipient covering all of their queued submissions.
+    
+    Recipients owed the same set of submissions share one ZIP bundle, which
+    is built once. Bundles over ``DIGEST_MAX_ATTACHMENT_BYTES`` are replaced
+    by download links. ``failed_only`` limits the run to immediate-mode
+    recipients, whose queue rows are sends that failed.
+    """
+    pending = fetch_pending_notifications()
+    if failed_only:
+        pending = {recipient: rows for recipient, rows in pending.items() if not is_digest_recipient(recipient)}
+    stats = {'recipients': 0, 'failed': 0, 'notifications': 0, 'completed': 0}
+    sent_ids, failed = [], {}
+    bundles = {}
+    
+    for recipient, rows in pending.items():
+        stats['notifications'] += len(rows)
+        if dry_run:
+            stats['recipients'] += 1
+            continue
+        
+        bundle = None
+        if DIGEST_ATTACHMENT == 'zip':
+            bundle_key = tuple(row['id'] for row in rows)
+            if bundle_key not in bundles:
+                bundles[bundle_key] = build_digest_bundle(rows)
+            bundle = bundles[bundle_key]
+        
+        period = f"{rows[0]['created_at']:%Y-%m-%d}"
+        if rows[-1]['created_at'].date() != rows[0]['created_at'].date():
+            period += f" to {rows[-1]['created_at']:%Y-%m-%d}"
+        
+        sent = send_email_with_attachment(
+            subject=f"Insurance Requests Digest - {len(rows)} submission(s), {period}",
+            html_content=build_digest_email_html(rows, include_links=bundle is None),
+            recipients=[recipient],
+            attachments=[(f"insurance_submissions_{period.replace(' ', '_')}.zip", bundle)] if bundle else None,
+            timeout=NOTIFICATION_TIMEOUT
+        )
+        if sent:
+            stats['recipients'] += 1
+            sent_ids.extend(row['queue_id'] for row in rows)
+        else:
+            stats['failed'] += 1
+            failed.update((row['queue_id'], "SMTP send failed") for row in rows)
+    
+    if not dry_run:
+        stats['completed'] = record_digest_results(sent_ids, failed)
+    return stats
+
+def retry_confirmations() -> Dict[str, int]:
+    """Re-send queued customer confirmations, oldest first.
+    
+    Stops early while the SMTP breaker is open, leaving the rest queued.
+    Rows are given up after NOTIFICATION_MAX_ATTEMPTS tries.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        """
+        SELECT q.id AS queue_id, q.recipient, s.id, s.submission_type, s.submission_data, s.created_at
+        FROM notification_queue q
+        JOIN submission_ids i ON i.id = q.submission_id
+        JOIN submissions s ON s.id = i.id AND s.created_at = i.created_at
+        WHERE q.sent_at IS NULL AND q.kind = 'confirmation' AND q.attempts < %s
+        ORDER BY q.created_at
+        """,
+        (NOTIFICATION_MAX_ATTEMPTS,)
+    )
+    rows = cursor.fetchall()
+    cursor.close()
+    conn.close()
+    
+    stats = {'sent': 0, 'failed': 0, 'deferred': 0}
+    sent, failed = [], []
+    for row in rows:
+        if smtp_breaker.state == CircuitBreaker.OPEN:
+            stats['deferred'] = len(rows) - stats['sent'] - stats['failed']
+            break
+        data = decode_json_value(row['submission_data'])
+        if send_email_with_attachment(
+            subject=f"Application Confirmation - LifeLine Insurance ({row['id'][:8]})",
+            html_content=build_customer_confirmation_email(row['submission_type'], data, row['id']),
+            recipients=[row['recipient']],
+            timeout=NOTIFICATION_TIMEOUT
+        ):
+            stats['sent'] += 1
+            sent.append(row)
+        else:
+            stats['failed'] += 1
+            failed.append(row['queue_id'])
+    
+    if not sent and not failed:
+        return stats
+    
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    if sent:
+        cursor.execute("UPDATE notification_queue SET sent_at = now(), attempts = attempts + 1 WHERE id = ANY(%s)",
+                       ([row['queue_id'] for row in sent],))
+        cursor.execute(
+            "UPDATE submissions s SET customer_email_sent = TRUE, updated_at = now() FROM submission_ids i "
+            "WHERE i.id = ANY(%s) AND s.id = i.id AND s.created_at = i.created_at AND NOT s.customer_email_sent "
+            "RETURNING s.id, s.submission_type, s.created_at",
+            ([row['id'] for row in sent],)
+        )
+        updated = cursor.fetchall()
+        # Move the submissions from 'failed' to 'sent' in the stats rollup
+        increment_stats(cursor, [
+            (row['created_at'].astimezone(timezone.utc).date(), row['submission_type'], 'customer_email', bucket, delta)
+            for row in updated for bucket, delta in (('failed', -1), ('sent', 1))
+        ])
+    if failed:
+        cursor.execute(
+            "UPDATE notification_queue SET attempts = attempts + 1, last_error = 'SMTP send failed' WHERE id = ANY(%s)",
+            (failed,)
+        )
+    conn.commit()
+    cursor.close()
+    conn.close()
+    
+    for row in sent:
+        submission_cache.invalidate(row['id'])
+    return stats
+
+def resume_deferred_submissions() -> Dict[str, int]:
+    """Finish submissions whose PDF and notifications were deferred by a request deadline."""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT id AS queue_id, submission_id FROM notification_queue "
+        "WHERE sent_at IS NULL AND kind = 'process' AND attempts < %s ORDER BY created_at",
+        (NOTIFICATION_MAX_ATTEMPTS,)
+    )
+    rows = cursor.fetchall()
+    cursor.close()
+    conn.close()
+    
+    stats = {'processed': 0, 'failed': 0}
+    for row in rows:
+        error = None
+        try:
+            record = get_submission_record(row['submission_id'])
+            if record is not None:
+                process_submission(InsuranceSubmission.from_dict(record))
+        except Exception as e:
+            logger.error("Could not resume submission %s: %s", row['submission_id'], e)
+            error = str(e)
+        
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        if error is None:
+            cursor.execute("UPDATE notification_queue SET sent_at = now(), attempts = attempts + 1 WHERE id = %s",
+                           (row['queue_id'],))
+            stats['processed'] += 1
+        else:
+            cursor.execute("UPDATE notification_queue SET attempts = attempts + 1, last_error = %s WHERE id = %s",
+                           (error, row['queue_id']))
+            stats['failed'] += 1
+        conn.commit()
+        cursor.close()
+        conn.close()
+    return stats
+
+# ======================
+# Submission Processing
+# ======================
+
+def process_submission(submission: InsuranceSubmission, notify: bool = True) -> Dict[str, Any]:
+    """Generate, store and announce the PDF of a submission already saved to the database.
+    
+    Shared by /submit, `flask ingest` and the resume of deferred submissions.
+    Stages the submission already records (pdf_generated, email_sent,
+    customer_email_sent) are skipped, so a resume never repeats a send. With
+    ``notify`` off only the PDF is produced and the submission is counted in
+    the stats rollup. Inside a request, raises DeadlineExceeded if too little
+    budget is left to render the PDF, and limits the email wait to what
+    remains; emails that do not go out in time are queued like failed sends.
+    """
+    deadline = current_deadline()
+    if submission.pdf_generated and submission.pdf_path:
+        pdf_buffer = io.BytesIO(load_submission_pdf(submission.id, submission.pdf_path))
+    else:
+        if deadline is not None:
+            deadline.check('pdf', DEADLINE_PDF_MIN)
+        pdf_generator = PDFGenerator()
+        pdf_buffer = pdf_generator.generate_pdf(submission.submission_type, submission.submission_data, submission.id)
+    
+    # From here on the deadline only bounds the email wait. Letting it cut
+    # short the bookkeeping after a send would queue a resume that sends again.
+    deadline_token = deadline_var.set(None)
+    try:
+        return finish_submission(submission, pdf_buffer, deadline, notify)
+    finally:
+        deadline_var.reset(deadline_token)
+        pdf_buffer.close()
+
+def finish_submission(submission: InsuranceSubmission, pdf_buffer: io.BytesIO,
+                      deadline: Optional[Deadline], notify: bool) -> Dict[str, Any]:
+    """Store a rendered PDF and send the notifications process_submission has not yet recorded."""
+    submission_type, data = submission.submission_type, submission.submission_data
+    
+    if not (submission.pdf_generated and submission.pdf_path):
+        pdf_path = get_pdf_store().save(submission.id, submission.created_at, pdf_buffer.getbuffer())
+        
+        # Update submission with PDF info
+        update_submission(submission.id, pdf_generated=True, pdf_path=pdf_path)
+        
+        logger.info("PDF generated and saved for submission %s", submission.id)
+    
+    if not notify:
+        record_submission_stats(submission, False, False, {})
+        return {'admin_email_sent': False, 'admin_notifications_queued': 0, 'customer_email_sent': False}
+    
+    # Send admin and customer emails concurrently
+    messages = {}
+    if not submission.email_sent:
+        admin_email_html = build_admin_email_html(submission_type, data, submission.id)
+        messages = build_admin_notifications(
+            subject=f"New {submission_type.title()} Insurance Request - {submission.id[:8]}",
+            html_content=admin_email_html,
+            pdf_bytes=pdf_buffer.getvalue()
+        )
+    
+    customer_email = data.get('email' if submission_type == 'individual' else 'contact_email', '').strip()
+    if submission.customer_email_sent:
+        customer_email = ''
+    elif customer_email:
+        messages['customer'] = {
+            'subject': f"Application Confirmation - LifeLine Insurance ({submission.id[:8]})",
+            'html_content': build_customer_confirmation_email(submission_type, data, submission.id),
+            'recipients': [customer_email]
+        }
+    else:
+        logger.warning("No customer email found for confirmation")
+    
+    timeout = deadline.timeout(NOTIFICATION_TIMEOUT) if deadline is not None else NOTIFICATION_TIMEOUT
+    if timeout >= 1:
+        results, running = dispatch_notifications(messages, timeout=timeout)
+    else:
+        logger.warning("No request budget left to email submission %s; queueing notifications", submission.id)
+        results, running = {key: False for key in messages}, {}
+    
+    admin_results = {key: sent for key, sent in results.items() if key.startswith('admin')}
+    failed_admin = [key for key, sent in admin_results.items() if not sent]
+    running_admin = [key for key in running if key.startswith('admin')]
+    if failed_admin and len(failed_admin) < len(admin_results):
+        logger.warning("Admin notifications failed for: %s", ', '.join(failed_admin))
+    
+    # Digest recipients, and anyone whose immediate email failed, get
+    # this submission in their next digest
+    queued_recipients = [] if submission.email_sent else get_digest_recipients() + [
+        recipient for key in failed_admin for recipient in message_recipients(messages[key])
+    ]
+    enqueue_notifications(submission.id, queued_recipients)
+    admin_email_sent = submission.email_sent or (bool(admin_results) and not queued_recipients and not running_admin)
+    
+    customer_email_sent = submission.customer_email_sent or results.get('customer', False)
+    if customer_email:
+        if customer_email_sent:
+            logger.info("Customer confirmation email sent to %s", customer_email)
+        elif 'customer' in running:
+            logger.warning("Customer confirmation email to %s still sending; recording its outcome when done",
+                           customer_email)
+        else:
+            logger.warning("Failed to send customer confirmation email to %s; queued for retry", customer_email)
+            enqueue_notifications(submission.id, [customer_email], kind='confirmation')
+    
+    # Update submission with email status. Only set flags: a late send may
+    # already have marked the submission, and must not be overwritten.
+    sent_flags = {'email_sent': admin_email_sent, 'customer_email_sent': customer_email_sent}
+    sent_flags = {flag: True for flag, sent in sent_flags.items() if sent}
+    if sent_flags:
+        update_submission(submission.id, **sent_flags)
+        
+    record_submission_stats(submission, admin_email_sent, customer_email_sent, admin_results)
+    if running:
+        settle_late_notifications(submission, messages, running, admin_ok=not queued_recipients)
+    
+    if admin_email_sent:
+        logger.info("Admin email sent successfully for submission %s", submission.id)
+    elif failed_admin:
+        logger.warning("Admin email sending failed for submission %s", submission.id)
+    else:
+        logger.info("Submission %s queued for %s digest recipient(s)", submission.id, len(queued_recipients))
+    
+    return {
+        'admin_email_sent': admin_email_sent,
+        'admin_notifications_queued': len(queued_recipients),
+        'customer_email_sent': customer_email_sent,
+    }
+
+# ======================
+# Bulk Ingest
+# ======================
+
+# Records without an "id" get one derived from the line text, so re-running
+# an ingest over the same file skips what was already loaded.
+INGEST_NAMESPACE = uuid.UUID('6f1c2b0e-8d1a-4c57-9a43-2f7e5b9d0c11')
+
+def parse_ingest_record(line: bytes) -> InsuranceSubmission:
+    """Build a cleaned, validated submission from one JSONL line.
+    
+    A line holds a /submit request body ({"type": ..., "data": {...}}), plus
+    optional "id" and "created_at" (ISO 8601) captured with it. Raises
+    ValueError with the reject reason.
+    """
+    try:
+        content = json_loads(line)
+    except ValueError as e:
+        raise ValueError(f"Invalid JSON: {e}")
+    if not isinstance(content, dict):
+        raise ValueError("Record must be a JSON object")
+    
+    submission_type = str(content.get("type") or "").strip().lower()
+    raw_data = content.get("data")
+    if not isinstance(raw_data, dict) or not raw_data:
+        raise ValueError("Record has no form data")
+    
+    data = clean_form_data(raw_data)
+    is_valid, error_message = validate_submission_data_enhanced(submission_type, data)
+    if not is_valid:
+        raise ValueError(error_message)
+    
+    submission = InsuranceSubmission(submission_type, data)
+    if content.get("id"):
+        try:
+            submission.id = str(uuid.UUID(str(content["id"])))
+        except ValueError:
+            raise ValueError("Invalid id")
+    else:
+        submission.id = str(uuid.uuid5(INGEST_NAMESPACE, line.decode('utf-8', 'replace').strip()))
+    
+    if content.get("created_at"):
+        try:
+            created_at = datetime.fromisoformat(str(content["created_at"]))
+        except ValueError:
+            raise ValueError("Invalid created_at")
+        submission.created_at = created_at if created_at.tzinfo else created_at.replace(tzinfo=timezone.utc)
+    return submission
+
+def copy_submissions(cursor, submissions: List[InsuranceSubmission]) -> List[str]:
+    """Load submissions with a single COPY, skipping ids already in the table.
+    
+    Rows are copied into a session temp table and moved across with one
+    INSERT ... SELECT; the submission_ids trigger drops rows whose id is
+    already taken. Returns the ids actually inserted.
+    """
+    import csv
+    
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for submission in submissions:
+        writer.writerow((
+            submission.id, submission.submission_type, json_dumps(submission.submission_data),
+            submission.created_at.isoformat(), submission.updated_at.isoformat()
+        ))
+    buffer.seek(0)
+    
+    cursor.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS ingest_batch (
+            id VARCHAR(36),
+            submission_type VARCHAR(20),
+            submission_data JSONB,
+            created_at TIMESTAMP WITH TIME ZONE,
+            updated_at TIMESTAMP WITH TIME ZONE
+        ) ON COMMIT DELETE ROWS
+    """)
+    cursor.copy_expert(
+        "COPY ingest_batch (id, submission_type, submission_data, created_at, updated_at) "
+        "FROM STDIN WITH (FORMAT csv)",
+        buffer
+    )
+    cursor.execute("""
+        INSERT INTO submissions (
+            id, submission_type, submission_data, created_at, updated_at,
+            email_sent, customer_email_sent, pdf_generated
+        )
+        SELECT id, submission_type, submission_data, created_at, updated_at, FALSE, FALSE, FALSE
+        FROM ingest_batch
+        RETURNING id
+    """)
+    return [row['id'] for row in cursor.fetchall()]
+
+def _init_ingest_worker():
+    """Give each post-processing worker its own app context (PDF store, config)."""
+    create_app().app_context().push()
+
+def ingest_submissions(path: str, rejects_path: str, batch_size: int = INGEST_BATCH_SIZE,
+                       post_process: bool = True, notify: bool = True, workers: int = 0) -> Dict[str, Any]:
+    """Stream a JSONL file into the submissions table.
+    
+    Valid records are loaded in COPY batches of ``batch_size``; invalid ones
+    are written to ``rejects_path`` as {"line", "reason", "record"} lines.
+    Inserted submissions are then handed to process_submission(), in a pool
+    of ``workers`` processes (or inline with 0) while loading continues.
+    """
+    import psycopg2
+    from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+    import multiprocessing
+    
+    stats = {'read': 0, 'inserted': 0, 'duplicates': 0, 'rejected': 0,
+             'processed': 0, 'failed': 0, 'load_seconds': 0.0}
+    rejects = None
+    
+    def reject(line_no, reason, line):
+        nonlocal rejects
+        if rejects is None:
+            rejects = open(rejects_path, 'w', encoding='utf-8')
+        rejects.write(json_dumps({'line': line_no, 'reason': reason,
+                                  'record': line.decode('utf-8', 'replace').rstrip('\r\n')}) + "\n")
+        stats['rejected'] += 1
+    
+    def load(cursor, batch):
+        try:
+            inserted = copy_submissions(cursor, [submission for _, _, submission in batch])
+            conn.commit()
+        except psycopg2.DataError as e:
+            # One bad value fails the whole COPY; retry row by row to find it
+            conn.rollback()
+            if len(batch) == 1:
+                line_no, line, _ = batch[0]
+                reject(line_no, f"Database rejected record: {str(e).strip()}", line)
+                return []
+            return [submission_id for entry in batch for submission_id in load(cursor, [entry])]
+        stats['inserted'] += len(inserted)
+        stats['duplicates'] += len(batch) - len(inserted)
+        return inserted
+    
+    executor = None
+    if post_process and workers > 0:
+        executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                       initializer=_init_ingest_worker)
+    pending = {}
+    
+    def collect(futures):
+        for future in futures:
+            submission_id = pending.pop(future)
+            try:
+                future.result()
+                stats['processed'] += 1
+            except Exception as e:
+                stats['failed'] += 1
+                logger.error("Post-processing failed for submission %s: %s", submission_id, e)
+    
+    def post(submissions):
+        for submission in submissions:
+            if executor is None:
+                try:
+                    process_submission(submission, notify=notify)
+                    stats['processed'] += 1
+                except Exception as e:
+                    stats['failed'] += 1
+                    logger.error("Post-processing failed for submission %s: %s", submission.id, e)
+                continue
+            pending[executor.submit(process_submission, submission, notify)] = submission.id
+            # Bound the backlog so a large file is not held in memory
+            if len(pending) >= workers * 8:
+                collect(wait(pending, return_when=FIRST_COMPLETED).done)
+    
+    def flush(cursor, batch):
+        inserted = set(load(cursor, batch))
+        if post_process:
+            post([submission for _, _, submission in batch if submission.id in inserted])
+    
+    started = time.perf_counter()
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        with open(path, 'rb') as f:
+            batch = []
+            for line_no, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                stats['read'] += 1
+                try:
+                    batch.append((line_no, line, parse_ingest_record(line)))
+                except ValueError as e:
+                    reject(line_no, str(e), line)
+                    continue
+                if len(batch) >= batch_size:
+                    flush(cursor, batch)
+                    batch = []
+            if batch:
+                flush(cursor, batch)
+        stats['load_seconds'] = time.perf_counter() - started
+        
+        if executor is not None:
+            collect(wait(pending).done)
+    finally:
+        cursor.close()
+        conn.close()
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        if rejects is not None:
+            rejects.close()
+    
+    stats['seconds'] = time.perf_counter() - started
+    return stats
+
+# ======================
+# Submission Events
+# ======================
+
+SUBMISSION_EVENTS_CHANNEL = 'submission_events'
+# 'email_queued' is published by enqueue_notifications when insurers will get
+# the submission in a digest rather than by email now
+SUBMISSION_EVENT_STATES = ('persisted', 'pdf_generated', 'email_queued', 'email_sent', 'customer_email_sent')
+
+def fetch_submission_state(submission_id: str) -> Optional[Dict[str, bool]]:
+    """Read which processing states a submission has reached, bypassing the cache."""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        f"""
+        SELECT pdf_generated, email_sent, customer_email_sent,
+               COALESCE(applicant_email, 'n/a') <> 'n/a' AS has_customer_email,
+               EXISTS (
+                   SELECT 1 FROM notification_queue q
+                   WHERE q.submission_id = submissions.id AND q.kind = 'digest' AND q.sent_at IS NULL
+               ) AS email_queued
+        FROM submissions WHERE {SUBMISSION_BY_ID}
+        """,
+        (submission_id, submission_id)
+    )
+    row = cursor.fetchone()
+    cursor.close()
+    conn.close()
+    
+    if row is None:
+        return None
+    return {'persisted': True, 'has_customer_email': bool(row['has_customer_email']),
+            **{key: bool(row[key]) for key in SUBMISSION_EVENT_STATES[1:]}}
+
+def submission_settled(state: Dict[str, bool]) -> bool:
+    """Whether a submission has reached its last state for a stream.
+    
+    The PDF is stored, insurers are emailed or queued for a digest, and the
+    customer is confirmed or gave no address to confirm to.
+    """
+    return bool(state.get('pdf_generated')
+                and (state.get('email_sent') or state.get('email_queued'))
+                and (state.get('customer_email_sent') or not state.get('has_customer_email', True)))
+
+class SubmissionEventHub:
+    """Relays submission_events notifications to the SSE streams of this process.
+    
+    A single background thread holds one LISTEN connection and waits on its
+    socket with select(), which gevent makes cooperative, so an idle client
+    costs a greenlet and a queue rather than a database connection. Each
+    time the listener (re)connects, every subscriber is told to resync from
+    the table, since notifications are not delivered while disconnected.
+    """
+    
+    def __init__(self):
+        self._reset()
+    
+    def _reset(self):
+        self._subscribers = {}
+        self._lock = threading.Lock()
+        self._thread = None
+    
+    def subscribe(self, submission_id: str) -> queue.Queue:
+        subscriber = queue.Queue()
+        with self._lock:
+            self._subscribers.setdefault(submission_id, set()).add(subscriber)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._listen, name='submission-events', daemon=True)
+                self._thread.start()
+        return subscriber
+    
+    def unsubscribe(self, submission_id: str, subscriber: queue.Queue) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(submission_id)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[submission_id]
+    
+    def publish(self, submission_id: str, event: str) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers.get(submission_id, ()))
+        for subscriber in subscribers:
+            subscriber.put(event)
+    
+    def _resync_all(self) -> None:
+        with self._lock:
+            subscribers = [subscriber for group in self._subscribers.values() for subscriber in group]
+        for subscriber in subscribers:
+            subscriber.put('resync')
+    
+    def _listen(self) -> None:
+        import select
+        from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+        
+        backoff = 1
+        while True:
+            conn = None
+            try:
+                conn = get_db_connection()
+                conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+                conn.cursor().execute(f"LISTEN {SUBMISSION_EVENTS_CHANNEL}")
+                self._resync_all()
+                backoff = 1
+                while True:
+                    if not select.select([conn], [], [], SSE_HEARTBEAT_INTERVAL)[0]:
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        try:
+                            payload = json_loads(notify.payload)
+                        except ValueError:
+                            continue
+                        self.publish(payload.get('id'), payload.get('event'))
+            except Exception as e:
+                logger.warning("Submission event listener disconnected: %s", e)
+            finally:
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+            time.sleep(backoff)
+            backoff = min(backoff * 2, 30)
+
+submission_event_hub = SubmissionEventHub()
+# Preloaded gunicorn workers must not inherit the master's listener state
+os.register_at_fork(after_in_child=submission_event_hub._reset)
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json_dumps(data)}\n\n"
+
+def iter_submission_events(submission_id: str, state: Dict[str, bool], subscriber: queue.Queue):
+    """Yield SSE frames for each state reached, from ``state`` onwards.
+    
+    Ends with an 'end' event once the submission is settled (see
+    submission_settled) or after SSE_MAX_DURATION; comment lines keep idle
+    connections open.
+    """
+    sent = set()
+    expires_at = time.monotonic() + SSE_MAX_DURATION
+    try:
+        yield f"retry: {SSE_RETRY_MS}\n\n"
+        while True:
+            for event in SUBMISSION_EVENT_STATES:
+                if state.get(event) and event not in sent:
+                    sent.add(event)
+                    yield format_sse(event, {'submission_id': submission_id, 'event': event, 'state': state})
+            
+            remaining = expires_at - time.monotonic()
+            complete = submission_settled(state)
+            if complete or remaining <= 0:
+                yield format_sse('end', {'submission_id': submission_id, 'complete': complete})
+                return
+            
+            try:
+                event = subscriber.get(timeout=min(SSE_HEARTBEAT_INTERVAL, remaining))
+            except queue.Empty:
+                yield ": keep-alive\n\n"
+                continue
+            if event == 'resync':
+                state = fetch_submission_state(submission_id) or state
+            elif event in SUBMISSION_EVENT_STATES:
+                state = dict(state, **{event: True})
+    finally:
+        submission_event_hub.unsubscribe(submission_id, subscriber)
+
+# ======================
+# Traffic Capture
+# ======================
+
+CAPTURE_ENDPOINTS = {'submit', 'download_pdf', 'view_submission'}
+
+# Form values kept as captured: enumerations, integers, counts, dates and the
+# range fields are not identifying and shape the generated PDFs and stats.
+# Every other value is masked character by character (see mask_text).
+CAPTURE_KEEP_FIELDS = {
+    key for schema in SUBMISSION_SCHEMAS.values() for key, spec in schema.items()
+    if 'enum' in spec or spec.get('type') in ('integer', 'count', 'date')
+} | set(STATS_RANGE_FIELDS)
+
+def mask_text(value: str) -> str:
+    """Replace letters with x/X and digits with 0, keeping length and punctuation.
+    
+    Masked emails, phone numbers and names still pass validation, so a
+    replayed submission takes the same code path as the original.
+    """
+    return ''.join('X' if c.isupper() else 'x' if c.isalpha() else '0' if c.isdigit() else c for c in value)
+
+def anonymize_value(key: Optional[str], value):
+    if key in CAPTURE_KEEP_FIELDS or value is None or isinstance(value, bool):
+        return value
+    if isinstance(value, dict):
+        return {k: anonymize_value(k, v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [anonymize_value(key, v) for v in value]
+    return mask_text(str(value))
+
+def anonymize_body(body):
+    """Anonymize a /submit body, keeping its "type"."""
+    if not isinstance(body, dict):
+        return anonymize_value(None, body)
+    return {key: value if key == 'type' else anonymize_value(key, value) for key, value in body.items()}
+
+_capture_listener = None
+
+def _open_capture_log():
+    """Point the capture logger at this process's file (re-run in each forked worker).
+    
+    As with configure_logging, request threads only enqueue the record; the
+    rotating file is written by a QueueListener thread.
+    """
+    global _capture_listener
+    path = CAPTURE_PATH.replace('{pid}', str(os.getpid()))
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    handler = logging.handlers.RotatingFileHandler(path, maxBytes=CAPTURE_MAX_BYTES, backupCount=CAPTURE_BACKUP_COUNT,
+                                                   encoding='utf-8', delay=True)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    
+    capture_queue = queue.SimpleQueue()
+    capture_logger.handlers = [DeferredQueueHandler(capture_queue)]
+    _capture_listener = logging.handlers.QueueListener(capture_queue, handler)
+    _capture_listener.start()
+
+capture_logger = logging.getLogger('insurance.capture')
+capture_logger.setLevel(logging.INFO)
+capture_logger.propagate = False
+
+REPLAY_OVERRIDES = ('SMTP_SERVER', 'SMTP_PORT', 'PRIMARY_RECIPIENTS', 'CC_RECIPIENT')
+
+def check_replay_settings():
+    """Refuse to serve a replay while mail could still reach real recipients.
+    
+    Replayed submissions trigger the same notifications as the originals, so
+    a REPLAY_TARGET instance must set every REPLAY_OVERRIDES variable.
     """
+    missing = [name for name in REPLAY_OVERRIDES if name not in os.environ]
+    if missing:
+        raise RuntimeError(f"REPLAY_TARGET is set but {', '.join(missing)} not overridden")
+
+def register_capture_hooks(app):
+    """Record anonymized /submit, /download-pdf and /submission requests for replay.
+    
+    Only installed when CAPTURE_ENABLED is set. Each worker appends to its own
+    rotating JSONL file (``{pid}`` in CAPTURE_PATH); replay_capture.py merges
+    them by arrival time. Download tokens are never written.
+    """
+    if not CAPTURE_ENABLED:
+        return
+    
+    if _capture_listener is None:
+        _open_capture_log()
+        atexit.register(lambda: _capture_listener and _capture_listener.stop())
+        os.register_at_fork(after_in_child=_open_capture_log)
+    
+    @app.before_request
+    def mark_arrival():
+        if request.endpoint in CAPTURE_ENDPOINTS and random.random() < CAPTURE_SAMPLE_RATE:
+            request.environ['insurance.capture_arrival'] = time.time()
+    
+    @app.after_request
+    def capture_request(response):
+        arrival = request.environ.get('insurance.capture_arrival')
+        if arrival is None:
+            return response
+        try:
+            record = {
+                't': round(arrival, 6),
+                'method': request.method,
+                'path': request.path,
+                'endpoint': request.endpoint,
+                'query': {key: value for key, value in request.args.items() if key != 'token'},
+                'status': response.status_code,
+                'duration_ms': round((time.time() - arrival) * 1000, 2),
+            }
+            if request.method == 'POST':
+                record['content_type'] = request.content_type
+                body = request.get_json(silent=True)
+                if body is None:
+                    record['body_text'] = mask_text(request.get_data(as_text=True))
+                else:
+                    record['body'] = anonymize_body(body)
+            if request.endpoint == 'submit' and response.status_code == 201:
+                record['submission_id'] = (response.get_json(silent=True) or {}).get('submission_id')
+            capture_logger.info(json_dumps(record))
+        except Exception as e:
+            logger.warning("Could not capture request: %s", e)
+        return response
+
+# ======================
+# Startup
+# ======================
+
+def warm_up():
+    """Import the lazily loaded heavy dependencies ahead of the first request.
+
+    Called from gunicorn's ``post_fork`` hook so production workers pay the
+    import cost before accepting traffic instead of on a user's request.
+    """
+    import psycopg2.extras  # noqa: F401
+    import requests  # noqa: F401
+    import smtplib  # noqa: F401
+    from email.mime.application import MIMEApplication  # noqa: F401
+    from email.mime.multipart import MIMEMultipart  # noqa: F401
+    from email.mime.text import MIMEText  # noqa: F401
+    from reportlab.platypus import SimpleDocTemplate  # noqa: F401
+    from reportlab.lib.styles import getSampleStyleSheet
+    
+    # Building the sample stylesheet also loads ReportLab's font metrics
+    getSampleStyleSheet()
 
 # ======================
 # Flask App Factory
@@ -840,6 +4800,8 @@ def build_customer_confirmation_email(submission_type: str, data: Dict[str, Any]
 def create_app():
     """Application factory function."""
     app = Flask(__name__)
+    app.request_class = InsuranceRequest
+    app.json = FastJSONProvider(app)
 
     # ====================
     # General App Config
@@ -849,7 +4811,7 @@ def create_app():
         MAX_CONTENT_LENGTH=16 * 1024 * 1024  # 16MB max file size
     )
 
-    print("🔧 FLASK_ENV:", os.getenv('FLASK_ENV'))
+    logger.debug("FLASK_ENV: %s", os.getenv('FLASK_ENV'))
 
     # === CORS Configuration ===
     allowed_origins = set()
@@ -891,7 +4853,7 @@ def create_app():
         max_age=86400
     )
 
-    print(f"✅ CORS allowed origins: {allowed_origins}")
+    logger.debug("CORS allowed origins: %s", allowed_origins)
 
     # ====================
     # Ensure Instance Folder Exists
@@ -901,18 +4863,36 @@ def create_app():
     except OSError:
         pass
 
+    app.extensions['pdf_store'] = create_pdf_store(app.instance_path)
+
+    if REPLAY_TARGET:
+        check_replay_settings()
+
+    if not PDF_LINK_SECRET:
+        if REQUIRE_SIGNED_PDF_LINKS:
+            raise RuntimeError("REQUIRE_SIGNED_PDF_LINKS needs PDF_LINK_SECRET or SECRET_KEY")
+        logger.warning("No PDF_LINK_SECRET or SECRET_KEY; download and upload links are not signed or accepted")
+
     # ====================
     # Logging Configuration
     # ====================
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s %(levelname)s %(name)s %(message)s'
-    )
+    configure_logging()
+    register_request_hooks(app)
+    register_profiling_hooks(app)
+    register_capture_hooks(app)
+    register_memory_hooks(app)
 
     # ====================
     # Register CLI Commands
     # ====================
     app.cli.add_command(init_db_command)
+    app.cli.add_command(db_cli)
+    app.cli.add_command(profiles_cli)
+    app.cli.add_command(pdfs_cli)
+    app.cli.add_command(notifications_cli)
+    app.cli.add_command(stats_cli)
+    app.cli.add_command(partitions_cli)
+    app.cli.add_command(ingest_command)
 
     # ====================
     # Register Routes
@@ -925,6 +4905,79 @@ def create_app():
 # Route Registration
 # ======================
 
+REQUEST_ID_PATTERN = re.compile(r'^[A-Za-z0-9\-]{1,64}$')
+
+class InsuranceRequest(Request):
+    """Request class allowing larger bodies on the streaming document upload route."""
+    
+    @property
+    def max_content_length(self) -> Optional[int]:
+        if self.endpoint == 'upload_documents':
+            # Room for every allowed file plus multipart framing
+            return DOCUMENT_MAX_SUBMISSION_BYTES + 1024 * 1024
+        return super().max_content_length
+
+# Streaming endpoints run as long as the client transfer (or event stream) takes
+DEADLINE_EXEMPT_ENDPOINTS = {'upload_documents', 'export_submissions', 'submission_events'}
+
+def register_request_hooks(app):
+    """Assign a request id and deadline to each request and emit one access log line."""
+    @app.before_request
+    def start_request():
+        incoming = request.headers.get('X-Request-ID', '')
+        request_id = incoming if REQUEST_ID_PATTERN.match(incoming) else str(uuid.uuid4())[:8]
+        request.environ['insurance.request_id_token'] = request_id_var.set(request_id)
+        request.environ['insurance.request_started'] = time.perf_counter()
+        if REQUEST_DEADLINE > 0 and request.endpoint not in DEADLINE_EXEMPT_ENDPOINTS:
+            request.environ['insurance.deadline_token'] = deadline_var.set(Deadline(REQUEST_DEADLINE))
+
+    @app.after_request
+    def finish_request(response):
+        response.headers['X-Request-ID'] = get_request_id()
+        started = request.environ.get('insurance.request_started')
+        if started is not None and logger.isEnabledFor(logging.INFO):
+            logger.info(
+                "%s %s %s", request.method, request.path, response.status_code,
+                extra={
+                    'method': request.method,
+                    'path': request.path,
+                    'status': response.status_code,
+                    'duration_ms': round((time.perf_counter() - started) * 1000, 2)
+                }
+            )
+        return response
+
+    @app.teardown_request
+    def reset_request_id(exc):
+        token = request.environ.pop('insurance.request_id_token', None)
+        if token is not None:
+            request_id_var.reset(token)
+        token = request.environ.pop('insurance.deadline_token', None)
+        if token is not None:
+            deadline_var.reset(token)
+
+def service_unavailable(error: Exception):
+    """Build a 503 response for a request that hit an open breaker or ran out of time."""
+    body = {
+        "error": "Service temporarily unavailable. Please try again shortly.",
+        "request_id": get_request_id()
+    }
+    retry_after = 1
+    if isinstance(error, CircuitOpenError):
+        body["dependency"] = error.name
+        retry_after = max(1, math.ceil(error.retry_after))
+    response = jsonify(body)
+    response.status_code = 503
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+def not_modified(etag: str):
+    """Build a 304 response for a conditional GET that matched ``etag``."""
+    response = make_response('', 304)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
 def register_routes(app):
     @app.route("/health")
     def health_check():
@@ -942,29 +4995,33 @@ def register_routes(app):
                 "timestamp": datetime.now(timezone.utc).isoformat(),
                 "database": "connected",
                 "email_configured": bool(SMTP_USERNAME and SMTP_PASSWORD),
+                "circuit_breakers": {name: breaker.snapshot() for name, breaker in CIRCUIT_BREAKERS.items()},
                 "version": "2.0.0"
             }), 200
             
         except Exception as e:
-            logger.error(f"Health check failed: {str(e)}")
+            logger.error("Health check failed: %s", e)
             return jsonify({
                 "status": "unhealthy",
                 "timestamp": datetime.now(timezone.utc).isoformat(),
-                "database": "disconnected",
+                "database": "circuit open" if isinstance(e, CircuitOpenError) else "disconnected",
+                "circuit_breakers": {name: breaker.snapshot() for name, breaker in CIRCUIT_BREAKERS.items()},
                 "error": str(e)
             }), 500
 
     @app.route("/submit", methods=["POST"])
     def submit():
         """Handle insurance submission."""
-        request_id = str(uuid.uuid4())[:8]
-        logger.info(f"[{request_id}] Processing new submission")
+        request_id = get_request_id()
+        logger.info("Processing new submission")
         
         try:
             if not request.is_json:
                 return jsonify({"error": "Content-Type must be application/json"}), 400
             
-            content = request.json
+            content = request.get_json(silent=True)
+            if content is None and request.content_length:
+                return jsonify({"error": "Request body must be valid JSON"}), 400
             if not content:
                 return jsonify({"error": "Request body cannot be empty"}), 400
             
@@ -974,10 +5031,11 @@ def register_routes(app):
             # Clean the form data
             data = clean_form_data(raw_data)
             
-            is_valid, error_message = validate_submission_data_enhanced(submission_type, data)
-            if not is_valid:
-                logger.warning(f"[{request_id}] Validation failed: {error_message}")
-                return jsonify({"error": error_message}), 400
+            errors = validate_submission(submission_type, data)
+            if errors:
+                error_message = " ".join(error['message'] for error in errors)
+                logger.warning("Validation failed: %s", error_message)
+                return jsonify({"error": error_message, "errors": errors}), 400
             
             submission = InsuranceSubmission(submission_type, data)
             
@@ -993,7 +5051,7 @@ def register_routes(app):
                 ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
                 """,
                 (
-                    submission.id, submission.submission_type, json.dumps(submission.submission_data),
+                    submission.id, submission.submission_type, to_jsonb(submission.submission_data),
                     submission.created_at, submission.updated_at, submission.email_sent,
                     submission.customer_email_sent, submission.pdf_generated, submission.pdf_path
                 )
@@ -1003,114 +5061,56 @@ def register_routes(app):
             cursor.close()
             conn.close()
             
-            logger.info(f"[{request_id}] Submission {submission.id} saved to database")
-            
-            # Generate PDF
-            pdf_generator = PDFGenerator()
-            pdf_buffer = pdf_generator.generate_pdf(submission_type, data, submission.id)
-            
-            pdf_filename = f"insurance_submission_{submission.id}.pdf"
-            pdf_path = os.path.join(app.instance_path, 'pdfs', pdf_filename)
-            
-            os.makedirs(os.path.dirname(pdf_path), exist_ok=True)
-            
-            with open(pdf_path, 'wb') as f:
-                f.write(pdf_buffer.getvalue())
-            
-            # Update submission with PDF info
-            conn = get_db_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute(
-                """
-                UPDATE submissions 
-                SET pdf_generated = TRUE, pdf_path = %s, updated_at = %s
-                WHERE id = %s
-                """,
-                (pdf_path, datetime.now(timezone.utc), submission.id)
-            )
-            
-            conn.commit()
-            cursor.close()
-            conn.close()
-            
-            logger.info(f"[{request_id}] PDF generated and saved for submission {submission.id}")
+            logger.info("Submission %s saved to database", submission.id)
             
-            # Send admin email
-            admin_email_html = build_admin_email_html(submission_type, data, submission.id)
-            pdf_buffer.seek(0)
-            
-            admin_email_sent = send_email_with_attachment(
-                subject=f"New {submission_type.title()} Insurance Request - {submission.id[:8]}",
-                html_content=admin_email_html,
-                recipients=PRIMARY_RECIPIENTS,
-                cc=[CC_RECIPIENT],
-                pdf_attachment=pdf_buffer
-            )
-            
-            # Send customer confirmation email
-            customer_email = data.get('email' if submission_type == 'individual' else 'contact_email', '').strip()
-            customer_email_sent = False
-            
-            if customer_email:
-                customer_email_html = build_customer_confirmation_email(submission_type, data, submission.id)
-                
-                customer_email_sent = send_email_with_attachment(
-                    subject=f"Application Confirmation - LifeLine Insurance ({submission.id[:8]})",
-                    html_content=customer_email_html,
-                    recipients=[customer_email]
-                )
-                
-                if customer_email_sent:
-                    logger.info(f"[{request_id}] Customer confirmation email sent to {customer_email}")
-                else:
-                    logger.warning(f"[{request_id}] Failed to send customer confirmation email to {customer_email}")
-            else:
-                logger.warning(f"[{request_id}] No customer email found for confirmation")
-            
-            # Update submission with email status
-            if admin_email_sent or customer_email_sent:
-                conn = get_db_connection()
-                cursor = conn.cursor()
-                
-                cursor.execute(
-                    """
-                    UPDATE submissions 
-                    SET email_sent = %s, customer_email_sent = %s, updated_at = %s
-                    WHERE id = %s
-                    """,
-                    (admin_email_sent, customer_email_sent, datetime.now(timezone.utc), submission.id)
-                )
-                
-                conn.commit()
-                cursor.close()
-                conn.close()
-                
-            if admin_email_sent:
-                logger.info(f"[{request_id}] Admin email sent successfully for submission {submission.id}")
-            else:
-                logger.warning(f"[{request_id}] Admin email sending failed for submission {submission.id}")
+            try:
+                outcome = process_submission(submission)
+            except DeadlineExceeded as e:
+                # The submission is saved; `flask notifications retry` finishes it
+                logger.warning("Deferring processing of submission %s: %s", submission.id, e)
+                enqueue_notifications(submission.id, ['*'], kind='process')
+                return jsonify({
+                    "message": "Submission received; confirmation will follow shortly.",
+                    "submission_id": submission.id,
+                    "request_id": request_id,
+                    "status": "deferred",
+                    "pdf_generated": False,
+                    "links": {
+                        "pdf_download": pdf_download_path(submission.id),
+                        "view_submission": f"/submission/{submission.id}",
+                        "events": f"/submission/{submission.id}/events",
+                    }
+                }), 202
             
-            pdf_buffer.close()
+            logger.info("Successfully processed submission %s", submission.id)
             
-            logger.info(f"[{request_id}] Successfully processed submission {submission.id}")
+            links = {
+                "pdf_download": pdf_download_path(submission.id),
+                "view_submission": f"/submission/{submission.id}",
+                "events": f"/submission/{submission.id}/events",
+            }
+            if PDF_LINK_SECRET:
+                links["upload_documents"] = (f"/submission/{submission.id}/documents?token="
+                                             f"{make_pdf_token(submission.id, DOCUMENT_UPLOAD_TTL, scope='upload')}")
             
             return jsonify({
                 "message": "Submission processed successfully!",
                 "submission_id": submission.id,
                 "request_id": request_id,
                 "status": "processed",
-                "admin_email_sent": admin_email_sent,
-                "customer_email_sent": customer_email_sent,
+                "admin_email_sent": outcome['admin_email_sent'],
+                "admin_notifications_queued": outcome['admin_notifications_queued'],
+                "customer_email_sent": outcome['customer_email_sent'],
                 "pdf_generated": True,
-                "links": {
-                    "pdf_download": f"/download-pdf/{submission.id}",
-                    "view_submission": f"/submission/{submission.id}"
-                }
+                "links": links
             }), 201
+        
+        except (CircuitOpenError, DeadlineExceeded) as e:
+            logger.warning("Rejecting submission: %s", e)
+            return service_unavailable(e)
             
         except Exception as e:
-            logger.error(f"[{request_id}] Error processing submission: {str(e)}", exc_info=True)
+            logger.error("Error processing submission: %s", e, exc_info=True)
             return jsonify({
                 "error": "Internal server error occurred",
                 "request_id": request_id
@@ -1119,65 +5119,135 @@ def register_routes(app):
     @app.route("/download-pdf/<submission_id>")
     def download_pdf(submission_id):
         """Download PDF for a submission."""
+        token = request.args.get('token')
+        if token is not None and not verify_pdf_token(submission_id, token):
+            return jsonify({"error": "Download link is invalid or has expired"}), 403
+        if token is None and REQUIRE_SIGNED_PDF_LINKS and not is_admin_request():
+            return jsonify({"error": "A signed download link is required"}), 403
+        
         try:
-            conn = get_db_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute("SELECT * FROM submissions WHERE id = %s", (submission_id,))
-            submission = cursor.fetchone()
-            
-            cursor.close()
-            conn.close()
+            submission = get_submission_record(submission_id)
             
             if not submission:
                 return jsonify({"error": "Submission not found"}), 404
             
+            etag = submission_etag(submission)
+            if request.if_none_match.contains(etag):
+                return not_modified(etag)
+            
             if not submission['pdf_generated'] or not submission['pdf_path']:
                 pdf_generator = PDFGenerator()
                 pdf_buffer = pdf_generator.generate_pdf(
                     submission['submission_type'],
-                    json.loads(submission['submission_data']),
+                    submission['submission_data'],
                     submission_id
                 )
                 
-                return send_file(
+                response = send_file(
                     pdf_buffer,
                     as_attachment=True,
                     download_name=f"insurance_submission_{submission_id[:8]}.pdf",
-                    mimetype='application/pdf'
+                    mimetype='application/pdf',
+                    etag=False
                 )
+                response.set_etag(etag)
+                return response
             
-            if os.path.exists(submission['pdf_path']):
+            download_name = f"insurance_submission_{submission_id[:8]}.pdf"
+            try:
+                submission, local_path, document = open_stored_pdf(submission_id, submission)
+            except FileNotFoundError:
+                return jsonify({"error": "PDF file not found"}), 404
+            etag = submission_etag(submission)
+            
+            if local_path:
                 return send_file(
-                    submission['pdf_path'],
+                    local_path,
                     as_attachment=True,
-                    download_name=f"insurance_submission_{submission_id[:8]}.pdf",
-                    mimetype='application/pdf'
+                    download_name=download_name,
+                    mimetype='application/pdf',
+                    etag=etag
                 )
-            else:
-                return jsonify({"error": "PDF file not found"}), 404
+            
+            # Archived and remote documents are streamed in chunks
+            response = Response(iter_file_chunks(document), mimetype='application/pdf')
+            response.headers['Content-Disposition'] = f'attachment; filename="{download_name}"'
+            response.set_etag(etag)
+            return response
                 
         except Exception as e:
-            logger.error(f"Error downloading PDF for {submission_id}: {str(e)}")
+            logger.error("Error downloading PDF for %s: %s", submission_id, e)
             return jsonify({"error": "Failed to retrieve PDF"}), 500
 
+    @app.route("/submission/<submission_id>/documents", methods=["POST"])
+    def upload_documents(submission_id):
+        """Stream supporting documents (multipart/form-data) into the document store."""
+        if not (is_admin_request() or verify_pdf_token(submission_id, request.args.get('token', ''), scope='upload')):
+            return jsonify({"error": "A valid upload link is required"}), 403
+        if request.mimetype != 'multipart/form-data' or 'boundary' not in request.mimetype_params:
+            return jsonify({"error": "Content-Type must be multipart/form-data"}), 415
+        
+        try:
+            if get_submission_record(submission_id) is None:
+                return jsonify({"error": "Submission not found"}), 404
+            
+            documents = receive_documents(submission_id, request.stream, request.mimetype_params['boundary'])
+            if not documents:
+                return jsonify({"error": "No files were uploaded"}), 400
+            
+            logger.info("Received %s document(s) for submission %s", len(documents), submission_id)
+            return jsonify({
+                "submission_id": submission_id,
+                "documents": [
+                    {key: document[key] for key in ('id', 'filename', 'content_type', 'size', 'sha256', 'deduplicated')}
+                    for document in documents
+                ]
+            }), 201
+            
+        except DocumentRejected as e:
+            return jsonify({"error": str(e)}), e.status
+        except RequestEntityTooLarge:
+            return jsonify({"error": "Upload is too large"}), 413
+        except ValueError as e:
+            return jsonify({"error": f"Malformed multipart body: {e}"}), 400
+        except Exception as e:
+            logger.error("Error uploading documents for %s: %s", submission_id, e, exc_info=True)
+            return jsonify({"error": "Failed to store documents"}), 500
+
+    @app.route("/submission/<submission_id>/events")
+    def submission_events(submission_id):
+        """Stream a submission's processing state transitions as server-sent events."""
+        # Subscribe before reading the state so no transition falls in between
+        subscriber = submission_event_hub.subscribe(submission_id)
+        try:
+            state = fetch_submission_state(submission_id)
+        except Exception:
+            submission_event_hub.unsubscribe(submission_id, subscriber)
+            raise
+        if state is None:
+            submission_event_hub.unsubscribe(submission_id, subscriber)
+            return jsonify({"error": "Submission not found"}), 404
+        
+        return Response(
+            iter_submission_events(submission_id, state, subscriber),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
+
     @app.route("/submission/<submission_id>")
     def view_submission(submission_id):
         """View submission details."""
         try:
-            conn = get_db_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute("SELECT * FROM submissions WHERE id = %s", (submission_id,))
-            submission = cursor.fetchone()
-            
-            cursor.close()
-            conn.close()
+            record = get_submission_record(submission_id)
             
-            if not submission:
+            if not record:
                 return jsonify({"error": "Submission not found"}), 404
+            
+            etag = submission_etag(record)
+            if request.if_none_match.contains(etag):
+                return not_modified(etag)
                 
-            submission = InsuranceSubmission.from_dict(submission)
+            submission = InsuranceSubmission.from_dict(record)
             fields = get_fields_for_type(submission.submission_type)
             
             data_rows = ""
@@ -1486,7 +5556,7 @@ def register_routes(app):
                             </table>
                             
                             <div class="actions">
-                                <a href="/download-pdf/{submission.id}" class="btn btn-primary">
+                                <a href="{pdf_download_path(submission.id)}" class="btn btn-primary">
                                     Download PDF
                                 </a>
                                 <a href="/" class="btn btn-secondary">
@@ -1508,12 +5578,195 @@ def register_routes(app):
                     </div>
                 </body>
                 </html>
-            ''', submission=submission, fields=fields)
+            ''', submission=submission, fields=fields), 200, {'ETag': f'"{etag}"', 'Cache-Control': 'private, no-cache'}
             
         except Exception as e:
-            logger.error(f"Error viewing submission {submission_id}: {str(e)}")
+            logger.error("Error viewing submission %s: %s", submission_id, e)
             return jsonify({"error": "Failed to retrieve submission"}), 500
 
+    @app.route("/submissions/lookup")
+    @require_admin
+    def lookup_submissions():
+        """Find submissions by applicant email or phone number."""
+        email = request.args.get('email', '').strip()
+        phone = request.args.get('phone', '').strip()
+        
+        if not email and not phone:
+            return jsonify({"error": "Provide an 'email' or 'phone' query parameter"}), 400
+        
+        try:
+            limit = min(max(int(request.args.get('limit', 50)), 1), 200)
+        except ValueError:
+            return jsonify({"error": "'limit' must be an integer"}), 400
+        
+        try:
+            rows = find_submissions(email=email, phone=phone, limit=limit)
+            
+            results = []
+            for row in rows:
+                row['created_at'] = row['created_at'].isoformat()
+                row['links'] = {
+                    "pdf_download": pdf_download_path(row['id']),
+                    "view_submission": f"/submission/{row['id']}"
+                }
+                results.append(row)
+            
+            return jsonify({"count": len(results), "results": results}), 200
+            
+        except Exception as e:
+            logger.error("Submission lookup failed: %s", e)
+            return jsonify({"error": "Failed to look up submissions"}), 500
+
+    @app.route("/submissions/search")
+    @require_admin
+    def search_submissions_route():
+        """Full-text search over submissions with ranked, highlighted results."""
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({"error": "Query parameter 'q' is required"}), 400
+        
+        submission_type = request.args.get('type', '').strip().lower() or None
+        if submission_type and submission_type not in ["individual", "company"]:
+            return jsonify({"error": "Invalid submission type. Must be 'individual' or 'company'."}), 400
+        
+        try:
+            limit = min(max(int(request.args.get('limit', 20)), 1), 100)
+        except ValueError:
+            return jsonify({"error": "'limit' must be an integer"}), 400
+        
+        try:
+            rows = search_submissions(query, submission_type=submission_type, limit=limit)
+            
+            for row in rows:
+                row['created_at'] = row['created_at'].isoformat()
+                row['rank'] = float(row['rank'])
+                row['links'] = {
+                    "pdf_download": pdf_download_path(row['id']),
+                    "view_submission": f"/submission/{row['id']}"
+                }
+            
+            return jsonify({"query": query, "count": len(rows), "results": rows}), 200
+            
+        except Exception as e:
+            logger.error("Submission search failed: %s", e)
+            return jsonify({"error": "Failed to search submissions"}), 500
+
+    @app.route("/debug/memory")
+    @require_admin
+    def debug_memory():
+        """Report this worker's RSS, per-route growth and top tracemalloc allocators."""
+        group_by = request.args.get('group', 'lineno')
+        if group_by not in ('lineno', 'filename', 'traceback'):
+            return jsonify({"error": "'group' must be lineno, filename or traceback"}), 400
+        try:
+            top = min(int(request.args.get('top', 25)), 200)
+        except ValueError:
+            return jsonify({"error": "'top' must be a number"}), 400
+        return jsonify(memory_report(top, group_by)), 200
+
+    @app.route("/debug/memory/baseline", methods=["POST", "DELETE"])
+    @require_admin
+    def debug_memory_baseline():
+        """POST starts tracemalloc and takes a baseline snapshot; DELETE stops tracing."""
+        if request.method == "DELETE":
+            stop_memory_tracing()
+            return jsonify({"pid": os.getpid(), "tracing": False}), 200
+        take_memory_baseline()
+        return jsonify({"pid": os.getpid(), "tracing": True, "frames": MEMORY_TRACE_FRAMES}), 201
+
+    @app.route("/debug/queries", methods=["GET", "DELETE"])
+    @require_admin
+    def debug_queries():
+        """Per-statement latency histograms for this worker; DELETE resets them."""
+        if request.method == "DELETE":
+            query_stats.reset()
+            return jsonify({"pid": os.getpid(), "reset": True}), 200
+        statements = query_stats.snapshot()
+        endpoint = request.args.get('endpoint')
+        if endpoint:
+            statements = [item for item in statements if item['endpoint'] == endpoint]
+        try:
+            limit = min(int(request.args.get('limit', 50)), QUERY_STATS_MAX_STATEMENTS)
+        except ValueError:
+            return jsonify({"error": "'limit' must be a number"}), 400
+        return jsonify({
+            "pid": os.getpid(),
+            "slow_query_ms": DB_SLOW_QUERY_MS or None,
+            "bucket_bounds_ms": [bound for bound in QUERY_BUCKETS_MS if not math.isinf(bound)],
+            "statements": statements[:limit],
+        }), 200
+
+    @app.route("/stats")
+    @require_admin
+    def stats():
+        """Daily counts, form distributions and email delivery rates from the rollup table."""
+        from datetime import date, timedelta
+        
+        submission_type = request.args.get('type', '').strip().lower() or None
+        if submission_type and submission_type not in SUBMISSION_SCHEMAS:
+            return jsonify({"error": "Invalid submission type. Must be 'individual' or 'company'."}), 400
+        try:
+            date_to = date.fromisoformat(request.args['to']) if request.args.get('to') else datetime.now(timezone.utc).date()
+            date_from = date.fromisoformat(request.args['from']) if request.args.get('from') else date_to - timedelta(days=29)
+        except ValueError:
+            return jsonify({"error": "'from' and 'to' must be dates (YYYY-MM-DD)"}), 400
+        if date_from > date_to:
+            return jsonify({"error": "'from' must not be after 'to'"}), 400
+        
+        try:
+            response = jsonify(get_stats(date_from, date_to, submission_type))
+            response.headers['Cache-Control'] = f"private, max-age={int(STATS_CACHE_TTL)}"
+            return response, 200
+        except Exception as e:
+            logger.error("Error computing stats: %s", e)
+            return jsonify({"error": "Failed to compute stats"}), 500
+
+    @app.route("/submissions/export")
+    @require_admin
+    def export_submissions():
+        """Stream the PDFs of a filtered set of submissions as a ZIP or one merged PDF."""
+        from datetime import date
+        
+        export_format = request.args.get('format', 'zip').lower()
+        submission_type = request.args.get('type', '').strip().lower() or None
+        if export_format not in ('zip', 'pdf'):
+            return jsonify({"error": "'format' must be 'zip' or 'pdf'"}), 400
+        if submission_type and submission_type not in SUBMISSION_SCHEMAS:
+            return jsonify({"error": "Invalid submission type. Must be 'individual' or 'company'."}), 400
+        try:
+            date_from = date.fromisoformat(request.args['from']) if request.args.get('from') else None
+            date_to = date.fromisoformat(request.args['to']) if request.args.get('to') else None
+        except ValueError:
+            return jsonify({"error": "'from' and 'to' must be dates (YYYY-MM-DD)"}), 400
+        
+        name = "_".join(filter(None, ["submissions", submission_type,
+                                      date_from and date_from.isoformat(), date_to and date_to.isoformat()]))
+        
+        if export_format == 'zip':
+            rows = iter_export_rows(submission_type, date_from, date_to)
+            response = Response(stream_with_context(iter_zip_export(rows)), mimetype='application/zip')
+            response.headers['Content-Disposition'] = f'attachment; filename="{name}.zip"'
+            return response
+        
+        if importlib.util.find_spec('pypdf') is None:
+            return jsonify({"error": "Merged PDF export is not available on this server; use format=zip"}), 501
+        
+        try:
+            rows = list(iter_export_rows(submission_type, date_from, date_to, limit=EXPORT_MERGE_MAX_DOCUMENTS + 1))
+            if len(rows) > EXPORT_MERGE_MAX_DOCUMENTS:
+                return jsonify({"error": f"Merged exports are limited to {EXPORT_MERGE_MAX_DOCUMENTS} submissions; "
+                                         f"narrow the filters or use format=zip"}), 400
+            if not rows:
+                return jsonify({"error": "No submissions match the filters"}), 404
+            merged = build_merged_pdf(rows)
+        except Exception as e:
+            logger.error("Error building merged export: %s", e, exc_info=True)
+            return jsonify({"error": "Failed to build merged PDF"}), 500
+        
+        response = Response(iter_file_chunks(merged), mimetype='application/pdf')
+        response.headers['Content-Disposition'] = f'attachment; filename="{name}.pdf"'
+        return response
+
     @app.route("/")
     def index():
         """Enhanced API documentation homepage with brand styling."""
@@ -1804,7 +6057,7 @@ def register_routes(app):
         return jsonify({
             "error": "Endpoint not found",
             "message": "The requested resource could not be found on this server.",
-            "available_endpoints": ["/", "/submit", "/download-pdf/<id>", "/submission/<id>", "/health"]
+            "available_endpoints": ["/", "/submit", "/download-pdf/<id>", "/submission/<id>", "/submissions/lookup", "/submissions/search", "/health"]
         }), 404
 
     @app.errorhandler(405)
@@ -1814,9 +6067,14 @@ def register_routes(app):
             "message": "The method is not allowed for the requested URL."
         }), 405
 
+    @app.errorhandler(CircuitOpenError)
+    @app.errorhandler(DeadlineExceeded)
+    def dependency_unavailable(error):
+        return service_unavailable(error)
+
     @app.errorhandler(500)
     def internal_error(error):
-        logger.error(f"Internal server error: {str(error)}")
+        logger.error("Internal server error: %s", error)
         return jsonify({
             "error": "Internal server error",
             "message": "An unexpected error occurred. Please try again later."
@@ -1829,17 +6087,267 @@ def register_routes(app):
 @click.command("init-db")
 @with_appcontext
 def init_db_command():
-    """Initialize the database connection."""
+    """Initialize the database by applying all migrations."""
     from flask import current_app
     if init_database(current_app):
         click.echo("✅ Database initialized successfully!")
         click.echo("📊 PostgreSQL connection established")
-        click.echo("📋 Tables and indexes created")
+        click.echo("📋 Migrations applied, tables and indexes up to date")
         click.echo("🚀 API is ready to use!")
     else:
         click.echo("❌ Database initialization failed!")
         click.echo("Please check your PostgreSQL connection and try again.")
 
+@click.group("db")
+def db_cli():
+    """Manage database schema migrations."""
+
+@db_cli.command("upgrade")
+@click.argument("revision", default="head")
+@click.option("--sql", is_flag=True, help="Print the SQL instead of running it.")
+def db_upgrade_command(revision, sql):
+    """Upgrade the schema to a revision (default: head)."""
+    from alembic import command
+    command.upgrade(get_alembic_config(), revision, sql=sql)
+
+@db_cli.command("downgrade")
+@click.argument("revision")
+@click.option("--sql", is_flag=True, help="Print the SQL instead of running it.")
+def db_downgrade_command(revision, sql):
+    """Downgrade the schema to a revision."""
+    from alembic import command
+    command.downgrade(get_alembic_config(), revision, sql=sql)
+
+@db_cli.command("current")
+def db_current_command():
+    """Show the revision the database is at."""
+    from alembic import command
+    command.current(get_alembic_config(), verbose=True)
+
+@db_cli.command("history")
+def db_history_command():
+    """List migration revisions."""
+    from alembic import command
+    command.history(get_alembic_config())
+
+@click.group("profiles")
+def profiles_cli():
+    """Inspect captured request profiles."""
+
+@profiles_cli.command("list")
+def profiles_list_command():
+    """List captured profiles, newest first."""
+    import pstats
+    
+    if not os.path.isdir(PROFILE_DIR):
+        click.echo(f"No profiles in {PROFILE_DIR}")
+        return
+    
+    names = sorted((name for name in os.listdir(PROFILE_DIR) if name.endswith('.pstats')), reverse=True)
+    for name in names:
+        total = pstats.Stats(os.path.join(PROFILE_DIR, name)).total_tt
+        click.echo(f"{name:<70} {total * 1000:>10.1f} ms")
+    click.echo(f"{len(names)} profile(s) in {PROFILE_DIR}")
+
+@profiles_cli.command("show")
+@click.argument("name")
+@click.option("--sort", default="cumulative", help="pstats sort key (cumulative, tottime, calls...).")
+@click.option("--limit", default=25, help="Number of functions to show.")
+def profiles_show_command(name, sort, limit):
+    """Summarize a profile by file name or request id."""
+    import pstats
+    
+    matches = [entry for entry in os.listdir(PROFILE_DIR)
+               if entry.endswith('.pstats') and (entry == name or f"_{name}_" in entry)] if os.path.isdir(PROFILE_DIR) else []
+    if not matches:
+        raise click.ClickException(f"No profile matching '{name}' in {PROFILE_DIR}")
+    
+    for entry in sorted(matches):
+        click.echo(f"== {entry} (flamegraph input: {entry[:-len('.pstats')]}.collapsed)")
+        pstats.Stats(os.path.join(PROFILE_DIR, entry), stream=sys.stdout).sort_stats(sort).print_stats(limit)
+
+pdfs_cli = AppGroup("pdfs", help="Manage stored submission PDFs.")
+
+@pdfs_cli.command("migrate-layout")
+@click.option("--dry-run", is_flag=True, help="Report what would move without moving anything.")
+def pdfs_migrate_layout_command(dry_run):
+    """Move PDFs from the flat instance/pdfs directory into the sharded layout."""
+    store = get_pdf_store()
+    if not isinstance(store, LocalPDFStore):
+        raise click.ClickException("migrate-layout only applies to the local PDF storage backend")
+    stats = migrate_pdf_layout(store, dry_run=dry_run)
+    click.echo(f"{'Would move' if dry_run else 'Moved'} {stats['moved']} PDF(s); {stats['missing']} missing on disk")
+
+@pdfs_cli.command("compact")
+@click.option("--older-than", "older_than_days", default=PDF_ARCHIVE_AFTER_DAYS, show_default=True,
+              help="Archive PDFs of submissions older than this many days.")
+@click.option("--dry-run", is_flag=True, help="Report what would be archived without writing segments.")
+def pdfs_compact_command(older_than_days, dry_run):
+    """Pack old PDFs into compressed, indexed archive segments."""
+    store = get_pdf_store()
+    if not isinstance(store, LocalPDFStore):
+        raise click.ClickException("compact only applies to the local PDF storage backend")
+    stats = compact_pdfs(store, older_than_days, dry_run=dry_run)
+    click.echo(f"{'Would archive' if dry_run else 'Archived'} {stats['archived']} PDF(s) into "
+               f"{stats['segments']} segment(s); {stats['missing']} missing on disk")
+
+notifications_cli = AppGroup("notifications", help="Manage queued admin notifications.")
+
+@notifications_cli.command("send-digests")
+@click.option("--dry-run", is_flag=True, help="Report pending digests without sending anything.")
+def notifications_send_digests_command(dry_run):
+    """Send each recipient one digest of their queued submissions (run on a schedule)."""
+    stats = send_digests(dry_run=dry_run)
+    if dry_run:
+        click.echo(f"{stats['recipients']} digest(s) pending covering {stats['notifications']} notification(s)")
+        return
+    click.echo(f"Sent {stats['recipients']} digest(s) covering {stats['notifications']} notification(s); "
+               f"{stats['failed']} failed; {stats['completed']} submission(s) fully notified")
+
+@notifications_cli.command("retry")
+def notifications_retry_command():
+    """Finish deferred submissions and re-send emails that failed (run every few minutes)."""
+    resumed = resume_deferred_submissions()
+    confirmations = retry_confirmations()
+    admin = send_digests(failed_only=True)
+    click.echo(f"Deferred submissions: {resumed['processed']} processed, {resumed['failed']} failed")
+    click.echo(f"Confirmations: {confirmations['sent']} sent, {confirmations['failed']} failed, "
+               f"{confirmations['deferred']} deferred (SMTP circuit open)")
+    click.echo(f"Admin: {admin['recipients']} catch-up email(s) covering {admin['notifications']} notification(s); "
+               f"{admin['failed']} failed")
+
+@pdfs_cli.command("export")
+@click.argument("output", type=click.Path(dir_okay=False, writable=True))
+@click.option("--format", "export_format", type=click.Choice(['zip', 'pdf']), default='zip', show_default=True)
+@click.option("--type", "submission_type", type=click.Choice(['individual', 'company']), default=None)
+@click.option("--from", "date_from", type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+              help="First submission date to include (YYYY-MM-DD).")
+@click.option("--to", "date_to", type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+              help="Last submission date to include (YYYY-MM-DD).")
+def pdfs_export_command(output, export_format, submission_type, date_from, date_to):
+    """Write the PDFs of matching submissions to a ZIP or a merged PDF."""
+    date_from = date_from.date() if date_from else None
+    date_to = date_to.date() if date_to else None
+    
+    count = 0
+    with open(output, 'wb') as f:
+        if export_format == 'zip':
+            def counted(rows):
+                nonlocal count
+                for row in rows:
+                    count += 1
+                    yield row
+            for chunk in iter_zip_export(counted(iter_export_rows(submission_type, date_from, date_to))):
+                f.write(chunk)
+        else:
+            rows = list(iter_export_rows(submission_type, date_from, date_to))
+            count = len(rows)
+            merged = build_merged_pdf(rows)
+            shutil.copyfileobj(merged, f, PDFStore.CHUNK_SIZE)
+            merged.close()
+    click.echo(f"Exported {count} submission(s) to {output}")
+
+stats_cli = AppGroup("stats", help="Maintain the analytics rollup table.")
+
+@stats_cli.command("backfill")
+@click.option("--from", "date_from", type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+              help="First day to rebuild (default: the first submission).")
+@click.option("--to", "date_to", type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+              help="Last day to rebuild (default: yesterday; today is kept current by /submit).")
+def stats_backfill_command(date_from, date_to):
+    """Rebuild daily rollups from the submissions table."""
+    from datetime import timedelta
+    
+    if date_from is None:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT min(created_at) AS first FROM submissions")
+        first = cursor.fetchone()['first']
+        cursor.close()
+        conn.close()
+        if first is None:
+            click.echo("No submissions to backfill")
+            return
+        date_from = first.astimezone(timezone.utc)
+    date_to = date_to.date() if date_to else datetime.now(timezone.utc).date() - timedelta(days=1)
+    
+    written = backfill_stats(date_from.date(), date_to)
+    click.echo(f"Rebuilt {written} rollup row(s) for {date_from.date()} to {date_to}")
+
+partitions_cli = AppGroup("partitions", help="Maintain the monthly submissions partitions.")
+
+@partitions_cli.command("list")
+def partitions_list_command():
+    """List the submissions partitions with approximate row counts and sizes."""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        partitions = list_partitions(cursor)
+    finally:
+        cursor.close()
+        conn.close()
+    for partition in partitions:
+        click.echo(f"{partition['name']:<24} {partition['approx_rows']:>12,} rows  "
+                   f"{partition['bytes'] / (1024 * 1024):>10.1f} MB")
+
+@partitions_cli.command("maintain")
+@click.option("--premake", default=PARTITION_PREMAKE_MONTHS, show_default=True,
+              help="Months to create ahead of the current one.")
+@click.option("--retention-months", default=PARTITION_RETENTION_MONTHS, show_default=True,
+              help="Retire months older than this many months (0 keeps everything).")
+@click.option("--drop", is_flag=True, help="Drop retired months instead of moving them to the archive schema.")
+@click.option("--dry-run", is_flag=True, help="Report what would change without changing anything.")
+@click.option("--pdf-list", type=click.Path(dir_okay=False, writable=True), default=None,
+              help="Write the PDF locators of retired months to this file, one per line.")
+def partitions_maintain_command(premake, retention_months, drop, dry_run, pdf_list):
+    """Create upcoming monthly partitions and retire expired ones (run daily).
+    
+    Retired months' PDFs stay in the PDF store; use --pdf-list to collect
+    their locators for archiving or deletion.
+    """
+    report = maintain_partitions(premake, retention_months, drop=drop, dry_run=dry_run)
+    verb = "Would create" if dry_run else "Created"
+    click.echo(f"{verb} {len(report['created'])} partition(s): {', '.join(report['created']) or '-'}")
+    if report['moved_rows']:
+        click.echo(f"Moved {report['moved_rows']} row(s) out of {DEFAULT_PARTITION}")
+    target = "dropped" if drop else f"moved to schema {PARTITION_ARCHIVE_SCHEMA}"
+    click.echo(f"{'Would retire' if dry_run else 'Retired'} {len(report['retired'])} partition(s) ({target}): "
+               f"{', '.join(report['retired']) or '-'}")
+    if report['retired_pdfs']:
+        click.echo(f"{len(report['retired_pdfs'])} stored PDF(s) of retired months are left in the PDF store")
+        if pdf_list:
+            with open(pdf_list, 'w', encoding='utf-8') as f:
+                f.writelines(f"{path}\n" for path in report['retired_pdfs'])
+            click.echo(f"Locators written to {pdf_list}")
+
+@click.command("ingest")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--rejects", "rejects_path", type=click.Path(dir_okay=False, writable=True), default=None,
+              help="Where to write rejected lines (default: PATH.rejects.jsonl).")
+@click.option("--batch-size", default=INGEST_BATCH_SIZE, show_default=True, help="Records per COPY batch.")
+@click.option("--workers", default=os.cpu_count() or 1, show_default=True,
+              help="Post-processing worker processes (0 runs it inline).")
+@click.option("--no-post-process", is_flag=True, help="Only load records; skip PDFs, emails and stats.")
+@click.option("--no-notify", is_flag=True, help="Generate PDFs but send no emails.")
+@with_appcontext
+def ingest_command(path, rejects_path, batch_size, workers, no_post_process, no_notify):
+    """Load a JSONL backlog of /submit request bodies into the database."""
+    rejects_path = rejects_path or f"{path}.rejects.jsonl"
+    stats = ingest_submissions(path, rejects_path, batch_size=batch_size, post_process=not no_post_process,
+                               notify=not no_notify, workers=workers)
+    
+    rate = stats['read'] / stats['load_seconds'] if stats['load_seconds'] else 0
+    click.echo(f"Read {stats['read']} record(s) in {stats['load_seconds']:.1f}s ({rate:,.0f}/s): "
+               f"{stats['inserted']} inserted, {stats['duplicates']} already present, {stats['rejected']} rejected")
+    if stats['rejected']:
+        click.echo(f"Rejected lines written to {rejects_path}")
+    if no_post_process:
+        if stats['inserted']:
+            click.echo("Post-processing skipped; run `flask stats backfill` over the ingested days")
+    else:
+        click.echo(f"Post-processed {stats['processed']} submission(s) ({stats['failed']} failed) "
+                   f"in {stats['seconds']:.1f}s total")
+
 # ======================
 # Application Entry Point
 # ======================
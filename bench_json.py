@@ -0,0 +1,97 @@
+"""
+JSON serialization benchmark for the LifeLine Africa Insurance API.
+
+Compares the stdlib ``json`` module with the orjson-backed helpers used by the
+app (``json_loads``/``json_dumps`` for JSONB and the cache, ``FastJSONProvider``
+for ``request.json``/``jsonify``). Payloads are submission-shaped and scaled up
+to just under the 16 MB ``MAX_CONTENT_LENGTH`` limit.
+
+    python bench_json.py --runs 5
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+import app
+
+SIZES = {'16KB': 16 * 1024, '1MB': 1024 * 1024, '15MB': 15 * 1024 * 1024}
+
+SAMPLE = {
+    "full_name": "Aline Uwimana", "age": "34", "phone_number": "+250 788 123 456",
+    "email": "aline.uwimana@example.rw", "location": "Kigali, Rwanda",
+    "existing_medical_conditions": "Asthma; mild hypertension (managed)",
+    "specific_coverage_needs": "Maternity, outpatient, dental — préférence pour Kigali",
+}
+
+
+def build_payload(target_bytes):
+    """Build a {'type', 'data'} payload whose JSON encoding is about target_bytes."""
+    data = {}
+    item = json.dumps(SAMPLE, ensure_ascii=False)
+    i = 0
+    while True:
+        data[f"field_{i}"] = dict(SAMPLE, note=f"entry {i}")
+        i += 1
+        if i * (len(item) + 30) >= target_bytes:
+            break
+    return {"type": "individual", "data": data}
+
+
+def median_time(runs, func):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5, help='timed runs per measurement')
+    parser.add_argument('--json', action='store_true', help='print machine-readable results')
+    args = parser.parse_args()
+
+    if not app.USE_ORJSON:
+        raise SystemExit("orjson is not installed (or JSON_PROVIDER=stdlib); nothing to compare")
+
+    flask_app = app.create_app()
+    provider = flask_app.json
+
+    report = {}
+    for label, size in SIZES.items():
+        payload = build_payload(size)
+        encoded = json.dumps(payload).encode()
+        mb = len(encoded) / (1024 * 1024)
+
+        results = {
+            'stdlib_loads': median_time(args.runs, lambda: json.loads(encoded)),
+            'orjson_loads': median_time(args.runs, lambda: app.json_loads(encoded)),
+            'provider_loads': median_time(args.runs, lambda: provider.loads(encoded)),
+            'stdlib_dumps': median_time(args.runs, lambda: json.dumps(payload)),
+            'orjson_dumps': median_time(args.runs, lambda: app.json_dumps(payload)),
+            'provider_dumps': median_time(args.runs, lambda: provider.dumps(payload)),
+        }
+        report[label] = {
+            'bytes': len(encoded),
+            **{key: round(seconds * 1000, 2) for key, seconds in results.items()},
+            'loads_speedup': round(results['stdlib_loads'] / results['orjson_loads'], 1),
+            'dumps_speedup': round(results['stdlib_dumps'] / results['orjson_dumps'], 1),
+            'orjson_loads_mb_s': round(mb / results['orjson_loads']),
+        }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{'payload':<8} {'op':<6} {'stdlib ms':>10} {'orjson ms':>10} {'provider ms':>12} {'speedup':>8}")
+    for label, result in report.items():
+        for op in ('loads', 'dumps'):
+            print(f"{label:<8} {op:<6} {result[f'stdlib_{op}']:>10.2f} {result[f'orjson_{op}']:>10.2f} "
+                  f"{result[f'provider_{op}']:>12.2f} {result[f'{op}_speedup']:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Cold-start benchmark for the LifeLine Africa Insurance API.
+
+Runs ``python -X importtime`` in fresh interpreters and reports how long it
+takes to import the application module and to build the app with
+``create_app()``, plus the slowest imports. Use ``--json`` to record results
+for tracking over time.
+
+    python bench_startup.py --runs 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+SCENARIOS = {
+    'import': "import app",
+    'create_app': "import app; app.create_app()",
+    'warm_up': "import app; app.create_app(); app.warm_up()",
+}
+
+
+def run_importtime(code):
+    """Run code under -X importtime and return (wall_us, {module: self_us})."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c',
+         f"import time; _t = time.perf_counter(); {code}; "
+         f"print(int((time.perf_counter() - _t) * 1e6))"],
+        cwd=HERE, capture_output=True, text=True, check=True
+    )
+
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, _cumulative_us, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = int(self_us)
+
+    wall_us = int(result.stdout.strip().splitlines()[-1])
+    return wall_us, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5, help='fresh interpreters per scenario')
+    parser.add_argument('--top', type=int, default=15, help='number of slowest imports to show')
+    parser.add_argument('--json', action='store_true', help='print machine-readable results')
+    args = parser.parse_args()
+
+    report = {}
+    for scenario, code in SCENARIOS.items():
+        timings = []
+        modules = {}
+        for _ in range(args.runs):
+            wall_us, modules = run_importtime(code)
+            timings.append(wall_us / 1000)
+
+        slowest = sorted(modules.items(), key=lambda item: item[1], reverse=True)[:args.top]
+        report[scenario] = {
+            'median_ms': round(statistics.median(timings), 1),
+            'min_ms': round(min(timings), 1),
+            'max_ms': round(max(timings), 1),
+            'slowest_imports_ms': {name: round(us / 1000, 1) for name, us in slowest},
+        }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    for scenario, result in report.items():
+        print(f"{scenario:<12} median {result['median_ms']:>8.1f} ms  "
+              f"(min {result['min_ms']:.1f}, max {result['max_ms']:.1f})")
+    print()
+    print("Slowest imports (self time) during create_app():")
+    for name, ms in report['create_app']['slowest_imports_ms'].items():
+        print(f"  {ms:>8.1f} ms  {name}")
+
+
+if __name__ == '__main__':
+    main()
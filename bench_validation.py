@@ -0,0 +1,106 @@
+"""
+Validation throughput benchmark for the LifeLine Africa Insurance API.
+
+Builds a mix of valid and invalid individual/company payloads, runs them
+through ``clean_form_data`` + ``validate_submission`` and reports payloads per
+second on a single core. ``--min-rate`` makes the script exit non-zero when
+throughput drops below a floor, so it can gate CI.
+
+    python bench_validation.py --payloads 50000 --min-rate 20000
+"""
+
+import argparse
+import json
+import random
+import statistics
+import time
+
+import app
+
+INDIVIDUAL = {
+    "full_name": "Aline Uwimana", "age": "34", "phone_number": "+250 788 123 456",
+    "email": "aline.uwimana@example.rw", "location": "Kigali", "occupation": "Teacher",
+    "monthly_income_range": "200,000 - 500,000 RWF", "number_of_dependents": "2",
+    "existing_medical_conditions": "None", "regular_medications": "None",
+    "frequency_of_hospital_visits": "Rarely", "preferred_hospitals": "King Faisal Hospital",
+    "preferred_payment_frequency": "Monthly", "specific_coverage_needs": "Maternity, outpatient",
+}
+
+COMPANY = {
+    "company_name": "Umuganda Logistics Ltd", "industry_type": "Transport",
+    "number_of_employees_seeking_coverage": "45", "preferred_coverage_start_date": "2026-01-01",
+    "contact_person_name": "Eric Nkusi", "contact_email": "hr@umuganda.rw",
+    "contact_phone_number": "0788 654 321", "company_address": "KN 5 Rd, Kigali",
+    "registration_number": "RDB-102938", "years_in_operation": "7",
+    "special_requirements": "Dental and optical cover for drivers",
+}
+
+BREAKERS = [
+    ("email", "not-an-email"), ("contact_email", "missing-at.rw"), ("phone_number", "123"),
+    ("age", "two hundred"), ("years_in_operation", "-1"), ("full_name", ""),
+]
+
+
+def build_payloads(count, invalid_ratio, seed=7):
+    rng = random.Random(seed)
+    payloads = []
+    for i in range(count):
+        submission_type, base = ("individual", INDIVIDUAL) if i % 2 else ("company", COMPANY)
+        data = dict(base)
+        if rng.random() < invalid_ratio:
+            for key, value in rng.sample(BREAKERS, 2):
+                data[key] = value
+        payloads.append((submission_type, data))
+    return payloads
+
+
+def run_once(payloads):
+    start = time.perf_counter()
+    invalid = 0
+    for submission_type, data in payloads:
+        if app.validate_submission(submission_type, app.clean_form_data(data)):
+            invalid += 1
+    return len(payloads) / (time.perf_counter() - start), invalid
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--payloads', type=int, default=50000, help='payloads per run')
+    parser.add_argument('--runs', type=int, default=5, help='timed runs')
+    parser.add_argument('--invalid-ratio', type=float, default=0.3, help='share of payloads with errors')
+    parser.add_argument('--min-rate', type=float, default=0, help='fail if the median rate is below this')
+    parser.add_argument('--json', action='store_true', help='print machine-readable results')
+    args = parser.parse_args()
+
+    payloads = build_payloads(args.payloads, args.invalid_ratio)
+    run_once(payloads[:1000])  # warm up
+
+    rates = []
+    invalid = 0
+    for _ in range(args.runs):
+        rate, invalid = run_once(payloads)
+        rates.append(rate)
+
+    report = {
+        'payloads': args.payloads,
+        'invalid': invalid,
+        'median_per_s': round(statistics.median(rates)),
+        'min_per_s': round(min(rates)),
+        'max_per_s': round(max(rates)),
+        'median_us_per_payload': round(1e6 / statistics.median(rates), 2),
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{report['payloads']} payloads ({report['invalid']} invalid) x {args.runs} runs")
+        print(f"median {report['median_per_s']:>10,} payloads/s  "
+              f"(min {report['min_per_s']:,}, max {report['max_per_s']:,}; "
+              f"{report['median_us_per_payload']} us/payload)")
+
+    if report['median_per_s'] < args.min_rate:
+        raise SystemExit(f"Validation throughput {report['median_per_s']:,}/s is below {args.min_rate:,.0f}/s")
+
+
+if __name__ == '__main__':
+    main()
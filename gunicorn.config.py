@@ -14,8 +14,6 @@ backlog = 2048
 workers = int(os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
 worker_class = 'gevent'
 worker_connections = 1000
-max_requests = 1000
-max_requests_jitter = 50
 
 # Timeout settings
 timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
@@ -28,8 +26,10 @@ limit_request_fields = 100
 limit_request_field_size = 8190
 
 # Logging
-accesslog = 'logs/access.log'
-errorlog = 'logs/error.log'
+# The application writes structured access lines through a background queue,
+# so gunicorn's synchronous access log is off unless explicitly requested.
+accesslog = os.getenv('GUNICORN_ACCESS_LOG') or None
+errorlog = os.getenv('GUNICORN_ERROR_LOG', '-')
 loglevel = os.getenv('LOG_LEVEL', 'info').lower()
 access_log_format = '%(h)s %(l)s %(u)s %(t)s "%(r)s" %(s)s %(b)s "%(f)s" "%(a)s" %(D)s'
 
@@ -50,8 +50,10 @@ tmp_upload_dir = None
 # Preload application for better performance
 preload_app = True
 
-# Enable automatic worker restarts
-max_requests = 1000
+# Enable automatic worker restarts. With MEMORY_BUDGET_MB set, workers are
+# recycled when they outgrow the budget (see post_request) rather than after a
+# fixed number of requests, unless GUNICORN_MAX_REQUESTS is also given.
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '0' if float(os.getenv('MEMORY_BUDGET_MB', '0')) > 0 else '1000'))
 max_requests_jitter = 100
 
 def when_ready(server):
@@ -68,8 +70,21 @@ def pre_fork(server, worker):
 
 def post_fork(server, worker):
     """Called just after a worker has been forked."""
+    if os.getenv('GUNICORN_WARM_UP', 'true').lower() == 'true':
+        # The application imports ReportLab, requests and psycopg2 lazily;
+        # load them now so the first request on this worker does not.
+        import app
+        app.warm_up()
     server.log.info("Worker %s initialized", worker.pid)
 
+def post_request(worker, req, environ, resp):
+    """Called after a worker processes the request."""
+    import app
+    if worker.alive and app.memory_restart_requested():
+        # Same path as max_requests: stop accepting, finish in-flight requests, exit.
+        worker.log.info("Worker %s is over its memory budget, restarting", worker.pid)
+        worker.alive = False
+
 def worker_abort(worker):
     """Called when a worker receives the SIGABRT signal."""
     worker.log.info("Worker %s aborted", worker.pid)
\ No newline at end of file
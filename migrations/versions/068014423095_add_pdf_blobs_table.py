@@ -0,0 +1,34 @@
+"""Add pdf_blobs table for the postgres PDF storage backend
+
+Revision ID: 068014423095
+Revises: 3e04f83b82ad
+Create Date: 2026-10-19 11:05:37.204118
+
+The data column uses STORAGE EXTERNAL (out-of-line, uncompressed) so that
+substring() range reads used for chunked downloads do not have to
+decompress the whole value. PDFs are already compressed internally.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '068014423095'
+down_revision = '3e04f83b82ad'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS pdf_blobs (
+            key TEXT PRIMARY KEY,
+            data BYTEA NOT NULL,
+            size INTEGER NOT NULL,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL
+        )
+    """)
+    op.execute("ALTER TABLE pdf_blobs ALTER COLUMN data SET STORAGE EXTERNAL")
+
+
+def downgrade():
+    op.execute("DROP TABLE IF EXISTS pdf_blobs")
@@ -0,0 +1,60 @@
+"""Drop redundant id index, build lookup, search and backlog indexes
+
+Revision ID: 3e04f83b82ad
+Revises: c3540e316d57
+Create Date: 2026-10-19 09:40:51.602917
+
+``idx_submissions_id`` duplicated the primary key index. Every index here is
+built with CREATE INDEX CONCURRENTLY outside the migration transaction so
+writes to a large ``submissions`` table are not blocked.
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3e04f83b82ad'
+down_revision = 'c3540e316d57'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = {
+    'idx_submissions_applicant_email': "ON submissions (applicant_email, created_at DESC)",
+    'idx_submissions_applicant_phone': "ON submissions (applicant_phone, created_at DESC)",
+    'idx_submissions_company_name': "ON submissions (lower(company_name))",
+    'idx_submissions_full_name': "ON submissions (lower(full_name))",
+    'idx_submissions_data_path': "ON submissions USING GIN (submission_data jsonb_path_ops)",
+    'idx_submissions_search': "ON submissions USING GIN (search_vector)",
+    'idx_submissions_email_pending': "ON submissions (created_at) WHERE email_sent = FALSE",
+    'idx_submissions_pdf_pending': "ON submissions (created_at) WHERE pdf_generated = FALSE",
+}
+
+
+def create_index_concurrently(name, definition):
+    # A failed concurrent build leaves an INVALID index behind that
+    # IF NOT EXISTS would silently keep, so drop it first.
+    if context.is_offline_mode():
+        op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} {definition}")
+        return
+    invalid = op.get_bind().execute(sa.text(
+        "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+        "WHERE c.relname = :name AND NOT i.indisvalid"
+    ), {'name': name}).scalar()
+    if invalid:
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+    op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} {definition}")
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_submissions_id")
+        for name, definition in INDEXES.items():
+            create_index_concurrently(name, definition)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name in INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+        op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_submissions_id ON submissions (id)")
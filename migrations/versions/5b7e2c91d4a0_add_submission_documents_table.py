@@ -0,0 +1,41 @@
+"""Add submission_documents table for uploaded supporting documents
+
+Revision ID: 5b7e2c91d4a0
+Revises: e9d9bbedb323
+Create Date: 2026-10-19 13:02:11.734920
+
+Files are stored content-addressed (documents/<sha[:2]>/<sha256>) in the PDF
+store, so identical uploads share one stored object. The unique index makes
+re-uploading the same file to a submission a no-op.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '5b7e2c91d4a0'
+down_revision = 'e9d9bbedb323'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS submission_documents (
+            id VARCHAR(36) PRIMARY KEY,
+            submission_id VARCHAR(36) NOT NULL,
+            filename TEXT NOT NULL,
+            content_type TEXT NOT NULL,
+            size BIGINT NOT NULL,
+            sha256 CHAR(64) NOT NULL,
+            locator TEXT NOT NULL,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
+        )
+    """)
+    op.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_submission_documents_submission_sha256
+        ON submission_documents (submission_id, sha256)
+    """)
+
+
+def downgrade():
+    op.execute("DROP TABLE IF EXISTS submission_documents")
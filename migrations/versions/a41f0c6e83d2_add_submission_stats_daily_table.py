@@ -0,0 +1,36 @@
+"""Add submission_stats_daily rollup table
+
+Revision ID: a41f0c6e83d2
+Revises: 5b7e2c91d4a0
+Create Date: 2026-10-19 14:21:37.118402
+
+One counter per (day, submission type, dimension, bucket), incremented by
+/submit and rebuilt for past days by `flask stats backfill`. Dimensions:
+'total', the form's range fields, 'employees' (size bands), and the
+'admin_email' / 'customer_email' delivery outcomes.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'a41f0c6e83d2'
+down_revision = '5b7e2c91d4a0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS submission_stats_daily (
+            day DATE NOT NULL,
+            submission_type VARCHAR(20) NOT NULL,
+            dimension TEXT NOT NULL,
+            bucket TEXT NOT NULL,
+            count BIGINT NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, submission_type, dimension, bucket)
+        )
+    """)
+
+
+def downgrade():
+    op.execute("DROP TABLE IF EXISTS submission_stats_daily")
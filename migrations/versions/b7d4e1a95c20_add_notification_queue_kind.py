@@ -0,0 +1,41 @@
+"""Add kind column to notification_queue for queued customer confirmations
+
+Revision ID: b7d4e1a95c20
+Revises: a41f0c6e83d2
+Create Date: 2026-10-19 15:42:07.118204
+
+'digest' rows are admin notifications owed to a recipient (digest mode or
+a failed immediate send); 'confirmation' rows are customer confirmation
+emails that failed while SMTP was down, re-sent by `flask notifications
+retry`. The pending unique index now includes the kind so a customer who is
+also an admin recipient can be owed both.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d4e1a95c20'
+down_revision = 'a41f0c6e83d2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("ALTER TABLE notification_queue ADD COLUMN IF NOT EXISTS kind VARCHAR(20) NOT NULL DEFAULT 'digest'")
+    op.execute("DROP INDEX IF EXISTS idx_notification_queue_pending")
+    op.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_notification_queue_pending
+        ON notification_queue (kind, recipient, submission_id)
+        WHERE sent_at IS NULL
+    """)
+
+
+def downgrade():
+    op.execute("DELETE FROM notification_queue WHERE kind <> 'digest'")
+    op.execute("DROP INDEX IF EXISTS idx_notification_queue_pending")
+    op.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_notification_queue_pending
+        ON notification_queue (recipient, submission_id)
+        WHERE sent_at IS NULL
+    """)
+    op.execute("ALTER TABLE notification_queue DROP COLUMN IF EXISTS kind")
@@ -0,0 +1,117 @@
+"""Promote hot submission_data keys and add search vector
+
+Revision ID: c3540e316d57
+Revises: f8daaa48cdc9
+Create Date: 2026-10-19 09:12:04.118233
+
+Adds the lookup columns and the stored full-text search document without
+rewriting ``submissions``:
+
+1. Plain nullable columns are added (a catalog-only change) together with a
+   BEFORE INSERT/UPDATE trigger that fills them from submission_data, in one
+   short transaction, so every row written from then on is filled.
+2. Existing rows are backfilled in keyset-ordered batches of BATCH_SIZE, one
+   transaction each, so no lock is held on the whole table.
+
+The indexes on these columns are built CONCURRENTLY by 3e04f83b82ad.
+Expressions are frozen here on purpose; keep ``SEARCH_FIELD_WEIGHTS`` in
+app.py in sync. In --sql mode the backfill is a single UPDATE.
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3540e316d57'
+down_revision = 'f8daaa48cdc9'
+branch_labels = None
+depends_on = None
+
+
+# {data} is the submission_data value the expression reads
+PROMOTED_COLUMNS = {
+    'applicant_email': "lower(COALESCE({data}->>'email', {data}->>'contact_email'))",
+    'applicant_phone': "regexp_replace(COALESCE({data}->>'phone_number', "
+                       "{data}->>'contact_phone_number'), '[^0-9]', '', 'g')",
+    'company_name': "{data}->>'company_name'",
+    'full_name': "{data}->>'full_name'",
+}
+
+SEARCH_FIELD_WEIGHTS = {
+    'A': ["full_name", "company_name", "contact_person_name"],
+    'B': ["email", "contact_email", "occupation", "industry_type", "location", "company_address"],
+    'C': ["existing_medical_conditions", "regular_medications", "family_medical_history",
+          "specific_coverage_needs", "special_requirements", "preferred_hospitals"],
+}
+
+BATCH_SIZE = 5000
+
+
+def search_vector_expression(data):
+    weighted = []
+    for weight, fields in SEARCH_FIELD_WEIGHTS.items():
+        text = " || ' ' || ".join(
+            f"COALESCE(NULLIF({data}->>'{field}', 'N/A'), '')" for field in fields
+        )
+        weighted.append(f"setweight(to_tsvector('simple', {text}), '{weight}')")
+    return " || ".join(weighted)
+
+
+def column_expressions(data):
+    expressions = {column: expression.format(data=data) for column, expression in PROMOTED_COLUMNS.items()}
+    expressions['search_vector'] = search_vector_expression(data)
+    return expressions
+
+
+def upgrade():
+    columns = [f"ADD COLUMN IF NOT EXISTS {column} TEXT" for column in PROMOTED_COLUMNS]
+    columns.append("ADD COLUMN IF NOT EXISTS search_vector tsvector")
+    op.execute("ALTER TABLE submissions " + ", ".join(columns))
+
+    assignments = "\n".join(
+        f"            NEW.{column} := {expression};"
+        for column, expression in column_expressions('NEW.submission_data').items()
+    )
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION fill_submission_columns() RETURNS trigger AS $$
+        BEGIN
+{assignments}
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("DROP TRIGGER IF EXISTS submissions_fill_columns ON submissions")
+    op.execute("""
+        CREATE TRIGGER submissions_fill_columns BEFORE INSERT OR UPDATE OF submission_data ON submissions
+        FOR EACH ROW EXECUTE FUNCTION fill_submission_columns()
+    """)
+
+    # Rows written before the trigger existed; an id > :after window keeps
+    # each batch to an index range scan on the primary key
+    backfill = "UPDATE submissions SET " + ", ".join(
+        f"{column} = {expression}" for column, expression in column_expressions('submission_data').items()
+    )
+    if context.is_offline_mode():
+        op.execute(backfill)
+        return
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        after = ''
+        while True:
+            last = bind.execute(sa.text(
+                f"WITH batch AS ({backfill} WHERE id IN ("
+                f"SELECT id FROM submissions WHERE id > :after ORDER BY id LIMIT {BATCH_SIZE}"
+                f") RETURNING id) SELECT max(id) FROM batch"
+            ), {'after': after}).scalar()
+            if last is None:
+                break
+            after = last
+
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS submissions_fill_columns ON submissions")
+    op.execute("DROP FUNCTION IF EXISTS fill_submission_columns()")
+    op.execute(
+        "ALTER TABLE submissions "
+        + ", ".join(f"DROP COLUMN IF EXISTS {column}" for column in [*PROMOTED_COLUMNS, 'search_vector'])
+    )
@@ -0,0 +1,52 @@
+"""Publish submission state transitions with NOTIFY
+
+Revision ID: d2f6a83b19e4
+Revises: b7d4e1a95c20
+Create Date: 2026-10-19 17:05:31.402911
+
+Every insert and every pdf_generated / email_sent / customer_email_sent
+flip to true sends a {"id", "event"} payload on the submission_events
+channel, whichever code path wrote the row. GET /submission/<id>/events
+relays them to clients from one LISTEN connection per worker.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2f6a83b19e4'
+down_revision = 'b7d4e1a95c20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""
+        CREATE OR REPLACE FUNCTION notify_submission_event() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                PERFORM pg_notify('submission_events', json_build_object('id', NEW.id, 'event', 'persisted')::text);
+            END IF;
+            IF NEW.pdf_generated AND (TG_OP = 'INSERT' OR NOT COALESCE(OLD.pdf_generated, FALSE)) THEN
+                PERFORM pg_notify('submission_events', json_build_object('id', NEW.id, 'event', 'pdf_generated')::text);
+            END IF;
+            IF NEW.email_sent AND (TG_OP = 'INSERT' OR NOT COALESCE(OLD.email_sent, FALSE)) THEN
+                PERFORM pg_notify('submission_events', json_build_object('id', NEW.id, 'event', 'email_sent')::text);
+            END IF;
+            IF NEW.customer_email_sent AND (TG_OP = 'INSERT' OR NOT COALESCE(OLD.customer_email_sent, FALSE)) THEN
+                PERFORM pg_notify('submission_events', json_build_object('id', NEW.id, 'event', 'customer_email_sent')::text);
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("DROP TRIGGER IF EXISTS submissions_notify_events ON submissions")
+    op.execute("""
+        CREATE TRIGGER submissions_notify_events
+        AFTER INSERT OR UPDATE OF pdf_generated, email_sent, customer_email_sent ON submissions
+        FOR EACH ROW EXECUTE FUNCTION notify_submission_event()
+    """)
+
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS submissions_notify_events ON submissions")
+    op.execute("DROP FUNCTION IF EXISTS notify_submission_event()")
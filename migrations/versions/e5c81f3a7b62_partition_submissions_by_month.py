@@ -0,0 +1,235 @@
+"""Partition submissions by month on created_at
+
+Revision ID: e5c81f3a7b62
+Revises: d2f6a83b19e4
+Create Date: 2026-10-19 18:20:14.730518
+
+Builds ``submissions_partitioned`` (monthly RANGE partitions on created_at,
+plus a DEFAULT partition for anything outside them) next to the live table
+and swaps it in:
+
+1. A trigger on the old table mirrors every insert, update and delete into
+   the new one from the moment this revision's first transaction commits.
+2. Existing rows are copied one month per transaction. Each batch reads
+   with FOR SHARE, so a concurrent update either waits for the batch or is
+   copied in its committed form.
+3. One short transaction locks the old table, drops it and renames the new
+   table, its indexes and primary key into place, and moves the NOTIFY
+   trigger across.
+
+The primary key becomes (id, created_at) because a partitioned table's
+unique keys must include the partition key. ``submission_ids`` keeps ids
+globally unique and maps each id to its created_at, so an id lookup reads
+that one row and then a single partition. Its BEFORE INSERT trigger skips
+rows whose id is already taken, which replaces ``ON CONFLICT (id) DO
+NOTHING``. Requires PostgreSQL 13+ (row triggers on partitioned tables).
+
+In --sql mode the rows are copied in a single statement instead.
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5c81f3a7b62'
+down_revision = 'd2f6a83b19e4'
+branch_labels = None
+depends_on = None
+
+
+# Copied columns; the lookup and search columns are refilled by the
+# fill_submission_columns trigger (c3540e316d57) on the receiving table
+COLUMNS = [
+    'id', 'submission_type', 'submission_data', 'created_at', 'updated_at',
+    'email_sent', 'customer_email_sent', 'pdf_generated', 'pdf_path',
+]
+
+INDEXES = {
+    'idx_submissions_created_at': "(created_at)",
+    'idx_submissions_type': "(submission_type)",
+    'idx_submissions_applicant_email': "(applicant_email, created_at DESC)",
+    'idx_submissions_applicant_phone': "(applicant_phone, created_at DESC)",
+    'idx_submissions_company_name': "(lower(company_name))",
+    'idx_submissions_full_name': "(lower(full_name))",
+    'idx_submissions_data_path': "USING GIN (submission_data jsonb_path_ops)",
+    'idx_submissions_search': "USING GIN (search_vector)",
+    'idx_submissions_email_pending': "(created_at) WHERE email_sent = FALSE",
+    'idx_submissions_pdf_pending': "(created_at) WHERE pdf_generated = FALSE",
+}
+
+# Months created ahead of the current one; `flask partitions maintain` keeps this up
+PREMAKE_MONTHS = 3
+
+FILL_TRIGGER = """
+    CREATE TRIGGER submissions_fill_columns BEFORE INSERT OR UPDATE OF submission_data ON {table}
+    FOR EACH ROW EXECUTE FUNCTION fill_submission_columns()
+"""
+
+NOTIFY_TRIGGER = """
+    CREATE TRIGGER submissions_notify_events
+    AFTER INSERT OR UPDATE OF pdf_generated, email_sent, customer_email_sent ON {table}
+    FOR EACH ROW EXECUTE FUNCTION notify_submission_event()
+"""
+
+
+def create_month_partitions(table):
+    op.execute(f"""
+        DO $$
+        DECLARE
+            month date;
+        BEGIN
+            FOR month IN
+                SELECT generate_series(
+                    date_trunc('month', COALESCE((SELECT min(created_at) FROM submissions), now()) AT TIME ZONE 'UTC'),
+                    date_trunc('month', now() AT TIME ZONE 'UTC') + interval '{PREMAKE_MONTHS} months',
+                    interval '1 month'
+                )::date
+            LOOP
+                EXECUTE 'CREATE TABLE IF NOT EXISTS ' || quote_ident('submissions_' || to_char(month, '"y"YYYY"m"MM'))
+                    || ' PARTITION OF {table} FOR VALUES FROM ('
+                    || quote_literal(month::timestamp AT TIME ZONE 'UTC') || ') TO ('
+                    || quote_literal((month + interval '1 month')::timestamp AT TIME ZONE 'UTC') || ')';
+            END LOOP;
+        END $$
+    """)
+    op.execute(f"CREATE TABLE IF NOT EXISTS submissions_default PARTITION OF {table} DEFAULT")
+
+
+def upgrade():
+    columns = ", ".join(COLUMNS)
+
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS submission_ids (
+            id VARCHAR(36) PRIMARY KEY,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL
+        )
+    """)
+    op.execute("CREATE INDEX IF NOT EXISTS idx_submission_ids_created_at ON submission_ids (created_at)")
+
+    op.execute("""
+        CREATE TABLE submissions_partitioned (
+            LIKE submissions INCLUDING DEFAULTS INCLUDING STORAGE,
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute(FILL_TRIGGER.format(table='submissions_partitioned'))
+    for name, definition in INDEXES.items():
+        op.execute(f"CREATE INDEX {name}_p ON submissions_partitioned {definition}")
+    create_month_partitions('submissions_partitioned')
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION claim_submission_id() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO submission_ids (id, created_at) VALUES (NEW.id, NEW.created_at)
+            ON CONFLICT (id) DO NOTHING;
+            IF NOT FOUND THEN
+                RETURN NULL;
+            END IF;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION release_submission_id() RETURNS trigger AS $$
+        BEGIN
+            DELETE FROM submission_ids WHERE id = OLD.id;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION forbid_submission_key_change() RETURNS trigger AS $$
+        BEGIN
+            IF NEW.id IS DISTINCT FROM OLD.id OR NEW.created_at IS DISTINCT FROM OLD.created_at THEN
+                RAISE EXCEPTION 'submission id and created_at cannot be changed';
+            END IF;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER submissions_claim_id BEFORE INSERT ON submissions_partitioned
+        FOR EACH ROW EXECUTE FUNCTION claim_submission_id()
+    """)
+    op.execute("""
+        CREATE TRIGGER submissions_release_id AFTER DELETE ON submissions_partitioned
+        FOR EACH ROW EXECUTE FUNCTION release_submission_id()
+    """)
+    op.execute("""
+        CREATE TRIGGER submissions_fixed_key BEFORE UPDATE OF id, created_at ON submissions_partitioned
+        FOR EACH ROW EXECUTE FUNCTION forbid_submission_key_change()
+    """)
+
+    assignments = ", ".join(f"{column} = NEW.{column}" for column in COLUMNS[1:])
+    values = ", ".join(f"NEW.{column}" for column in COLUMNS)
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION mirror_submission_change() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO submissions_partitioned ({columns}) VALUES ({values});
+            ELSIF TG_OP = 'UPDATE' THEN
+                UPDATE submissions_partitioned SET {assignments}
+                WHERE id = OLD.id AND created_at = OLD.created_at;
+            ELSE
+                DELETE FROM submissions_partitioned WHERE id = OLD.id AND created_at = OLD.created_at;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER submissions_mirror AFTER INSERT OR UPDATE OR DELETE ON submissions
+        FOR EACH ROW EXECUTE FUNCTION mirror_submission_change()
+    """)
+
+    # Rows the mirror trigger has already inserted are skipped by the
+    # claim_submission_id trigger
+    backfill = f"INSERT INTO submissions_partitioned ({columns}) SELECT {columns} FROM submissions"
+    if context.is_offline_mode():
+        op.execute(backfill)
+    else:
+        with op.get_context().autocommit_block():
+            bind = op.get_bind()
+            months = bind.execute(sa.text(
+                "SELECT generate_series(date_trunc('month', min(created_at)), "
+                "date_trunc('month', max(created_at)), interval '1 month') FROM submissions"
+            )).scalars().all()
+            for month in months:
+                op.execute(sa.text(
+                    f"{backfill} WHERE created_at >= :start AND created_at < :start + interval '1 month' FOR SHARE"
+                ).bindparams(start=month))
+
+    op.execute("LOCK TABLE submissions IN ACCESS EXCLUSIVE MODE")
+    op.execute("DROP TABLE submissions")
+    op.execute("DROP FUNCTION mirror_submission_change()")
+    op.execute("ALTER TABLE submissions_partitioned RENAME TO submissions")
+    op.execute("ALTER TABLE submissions RENAME CONSTRAINT submissions_partitioned_pkey TO submissions_pkey")
+    for name in INDEXES:
+        op.execute(f"ALTER INDEX {name}_p RENAME TO {name}")
+    op.execute(NOTIFY_TRIGGER.format(table='submissions'))
+
+
+def downgrade():
+    columns = ", ".join(COLUMNS)
+
+    # Not online: the table is copied back while writes are blocked
+    op.execute("LOCK TABLE submissions IN EXCLUSIVE MODE")
+    op.execute("""
+        CREATE TABLE submissions_unpartitioned (
+            LIKE submissions INCLUDING DEFAULTS INCLUDING STORAGE,
+            PRIMARY KEY (id)
+        )
+    """)
+    op.execute(FILL_TRIGGER.format(table='submissions_unpartitioned'))
+    op.execute(f"INSERT INTO submissions_unpartitioned ({columns}) SELECT {columns} FROM submissions")
+    op.execute("DROP TABLE submissions")
+    op.execute("ALTER TABLE submissions_unpartitioned RENAME TO submissions")
+    op.execute("ALTER TABLE submissions RENAME CONSTRAINT submissions_unpartitioned_pkey TO submissions_pkey")
+    for name, definition in INDEXES.items():
+        op.execute(f"CREATE INDEX {name} ON submissions {definition}")
+    op.execute(NOTIFY_TRIGGER.format(table='submissions'))
+
+    op.execute("DROP TABLE IF EXISTS submission_ids")
+    op.execute("DROP FUNCTION IF EXISTS claim_submission_id()")
+    op.execute("DROP FUNCTION IF EXISTS release_submission_id()")
+    op.execute("DROP FUNCTION IF EXISTS forbid_submission_key_change()")
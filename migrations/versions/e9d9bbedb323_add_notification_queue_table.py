@@ -0,0 +1,47 @@
+"""Add notification_queue table for digest notifications
+
+Revision ID: e9d9bbedb323
+Revises: 068014423095
+Create Date: 2026-10-19 12:10:48.512305
+
+Each row is one admin notification still owed to a recipient: digest
+recipients are queued on submit, and immediate sends that fail are queued
+so they go out with the next digest run. Rows are kept after sending
+(sent_at set) as a delivery log. The partial unique index stops the same
+submission from being queued twice for a recipient while pending.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'e9d9bbedb323'
+down_revision = '068014423095'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS notification_queue (
+            id BIGSERIAL PRIMARY KEY,
+            submission_id VARCHAR(36) NOT NULL,
+            recipient TEXT NOT NULL,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            sent_at TIMESTAMP WITH TIME ZONE,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            last_error TEXT
+        )
+    """)
+    op.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_notification_queue_pending
+        ON notification_queue (recipient, submission_id)
+        WHERE sent_at IS NULL
+    """)
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS idx_notification_queue_submission
+        ON notification_queue (submission_id)
+    """)
+
+
+def downgrade():
+    op.execute("DROP TABLE IF EXISTS notification_queue")
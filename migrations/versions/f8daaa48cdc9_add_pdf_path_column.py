@@ -1,12 +1,13 @@
-"""Add pdf_path column
+"""Create submissions table with pdf_path column
 
 Revision ID: f8daaa48cdc9
 Revises: 
 Create Date: 2025-07-24 08:37:56.497962
 
+Baseline for the ``submissions`` table. Databases created by the old
+``init_database`` already have the table, so every statement is idempotent.
 """
 from alembic import op
-import sqlalchemy as sa
 
 
 # revision identifiers, used by Alembic.
@@ -17,16 +18,24 @@ depends_on = None
 
 
 def upgrade():
-    # ### commands auto generated by Alembic - please adjust! ###
-    with op.batch_alter_table('insurance_submissions', schema=None) as batch_op:
-        batch_op.add_column(sa.Column('pdf_path', sa.String(length=255), nullable=True))
-
-    # ### end Alembic commands ###
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS submissions (
+            id VARCHAR(36) PRIMARY KEY,
+            submission_type VARCHAR(20) NOT NULL,
+            submission_data JSONB NOT NULL,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL,
+            updated_at TIMESTAMP WITH TIME ZONE NOT NULL,
+            email_sent BOOLEAN DEFAULT FALSE,
+            customer_email_sent BOOLEAN DEFAULT FALSE,
+            pdf_generated BOOLEAN DEFAULT FALSE
+        )
+    """)
+    op.execute("ALTER TABLE submissions ADD COLUMN IF NOT EXISTS pdf_path TEXT")
+    op.execute("CREATE INDEX IF NOT EXISTS idx_submissions_created_at ON submissions (created_at)")
+    op.execute("CREATE INDEX IF NOT EXISTS idx_submissions_type ON submissions (submission_type)")
 
 
 def downgrade():
-    # ### commands auto generated by Alembic - please adjust! ###
-    with op.batch_alter_table('insurance_submissions', schema=None) as batch_op:
-        batch_op.drop_column('pdf_path')
-
-    # ### end Alembic commands ###
+    # The table may predate this revision (created by the old init_database)
+    # and holds every submission, so downgrading to base leaves it in place.
+    pass
@@ -0,0 +1,207 @@
+"""
+Traffic replay harness for the LifeLine Africa Insurance API.
+
+Re-issues requests recorded by the capture middleware (``CAPTURE_ENABLED=true``)
+against a target instance, keeping the original arrival pattern, and reports
+latency percentiles and error rates per endpoint. Capture files from several
+workers (and their rotated backups) are merged by arrival time.
+
+Submissions created during the replay get new ids; later /download-pdf and
+/submission requests for a captured submission are rewritten to the new id
+and its signed download link. Point the target at local stand-ins (see
+docker-compose.replay.yml), never at production services.
+
+    python replay_capture.py logs/capture/requests-*.jsonl* --target http://localhost:5000 --speed 1
+    python replay_capture.py capture.jsonl --speed 10
+    python replay_capture.py capture.jsonl --speed max --concurrency 64
+"""
+
+import argparse
+import heapq
+import json
+import math
+import statistics
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+def read_capture(path):
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def merged_records(paths, limit=None):
+    """Yield records from all files in arrival order (each file is already ordered)."""
+    records = heapq.merge(*(read_capture(path) for path in paths), key=lambda record: record['t'])
+    for count, record in enumerate(records):
+        if limit is not None and count >= limit:
+            return
+        yield record
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+class Replayer:
+    def __init__(self, target, timeout, admin_token=None):
+        self.target = target.rstrip('/')
+        self.timeout = timeout
+        self.admin_token = admin_token
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        # Captured submission id -> future resolving to the target's links
+        self.created = {}
+        self.results = defaultdict(list)
+        self.unmapped = 0
+
+    def session(self):
+        if not hasattr(self.local, 'session'):
+            self.local.session = requests.Session()
+        return self.local.session
+
+    def rewrite(self, record):
+        """Return (path, params) for a record, mapped onto ids created by this replay."""
+        path, params = record['path'], dict(record.get('query') or {})
+        if record['endpoint'] not in ('download_pdf', 'view_submission'):
+            return path, params
+
+        captured_id = path.rstrip('/').rsplit('/', 1)[-1]
+        future = self.created.get(captured_id)
+        links = future.result() if future is not None else None
+        if not links:
+            with self.lock:
+                self.unmapped += 1
+            return path, params
+        if record['endpoint'] == 'download_pdf':
+            path, _, query = links['pdf_download'].partition('?')
+            params.update(pair.split('=', 1) for pair in query.split('&') if '=' in pair)
+            return path, params
+        return links['view_submission'], params
+
+    def issue(self, record, scheduled):
+        lag = time.perf_counter() - scheduled
+        path, params = self.rewrite(record)
+        headers = {'X-Admin-Token': self.admin_token} if self.admin_token else {}
+        kwargs = {'params': params, 'headers': headers, 'timeout': self.timeout}
+        if 'body' in record:
+            kwargs['json'] = record['body']
+        elif 'body_text' in record:
+            kwargs['data'] = record['body_text'].encode()
+            headers['Content-Type'] = record.get('content_type') or 'application/json'
+
+        start = time.perf_counter()
+        links = None
+        try:
+            response = self.session().request(record['method'], self.target + path, **kwargs)
+            status = response.status_code
+            if record['endpoint'] == 'submit' and status == 201:
+                links = response.json().get('links')
+            response.close()
+        except requests.RequestException:
+            status = None
+        elapsed = time.perf_counter() - start
+
+        with self.lock:
+            self.results[record['endpoint']].append((status, elapsed, lag, record.get('duration_ms')))
+        return links
+
+
+def summarize(results, wall_seconds, unmapped):
+    report = {'endpoints': {}, 'unmapped_ids': unmapped}
+    total = 0
+    for endpoint, entries in sorted(results.items()):
+        latencies = [elapsed * 1000 for status, elapsed, _, _ in entries if status is not None]
+        captured = [duration for _, _, _, duration in entries if duration is not None]
+        count = len(entries)
+        total += count
+        errors = sum(1 for status, _, _, _ in entries if status is None)
+        server_errors = sum(1 for status, _, _, _ in entries if status is not None and status >= 500)
+        client_errors = sum(1 for status, _, _, _ in entries if status is not None and 400 <= status < 500)
+        report['endpoints'][endpoint] = {
+            'requests': count,
+            'error_rate': round((errors + server_errors) / count, 4),
+            'connection_errors': errors,
+            '5xx': server_errors,
+            '4xx': client_errors,
+            'p50_ms': round(percentile(latencies, 0.5), 1) if latencies else None,
+            'p90_ms': round(percentile(latencies, 0.9), 1) if latencies else None,
+            'p99_ms': round(percentile(latencies, 0.99), 1) if latencies else None,
+            'max_ms': round(max(latencies), 1) if latencies else None,
+            'captured_p50_ms': round(statistics.median(captured), 1) if captured else None,
+            'max_lag_ms': round(max(lag for _, _, lag, _ in entries) * 1000, 1),
+        }
+    report['requests'] = total
+    report['seconds'] = round(wall_seconds, 2)
+    report['rate_per_s'] = round(total / wall_seconds, 1) if wall_seconds else None
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('captures', nargs='+', help='capture files to replay')
+    parser.add_argument('--target', default='http://localhost:5000', help='base URL of the instance under test')
+    parser.add_argument('--speed', default='1', help="time scale: 1 = as captured, 10 = ten times faster, 'max' = no delays")
+    parser.add_argument('--concurrency', type=int, default=32, help='maximum requests in flight')
+    parser.add_argument('--timeout', type=float, default=30, help='per-request timeout in seconds')
+    parser.add_argument('--limit', type=int, default=None, help='replay at most this many requests')
+    parser.add_argument('--admin-token', default=None, help='X-Admin-Token for downloads that cannot be mapped')
+    parser.add_argument('--json', action='store_true', help='print machine-readable results')
+    args = parser.parse_args()
+
+    speed = 0 if args.speed == 'max' else float(args.speed)
+    replayer = Replayer(args.target, args.timeout, args.admin_token)
+    in_flight = threading.BoundedSemaphore(args.concurrency)
+
+    def run(record, scheduled):
+        try:
+            return replayer.issue(record, scheduled)
+        finally:
+            in_flight.release()
+
+    start = time.perf_counter()
+    first = None
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        for record in merged_records(args.captures, args.limit):
+            first = record['t'] if first is None else first
+            scheduled = start + (record['t'] - first) / speed if speed else time.perf_counter()
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            in_flight.acquire()
+            future = executor.submit(run, record, scheduled)
+            if record.get('submission_id'):
+                replayer.created[record['submission_id']] = future
+    wall = time.perf_counter() - start
+
+    report = summarize(replayer.results, wall, replayer.unmapped)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{report['requests']} request(s) in {report['seconds']}s ({report['rate_per_s']}/s) "
+          f"against {args.target} at speed {args.speed}")
+    print(f"{'endpoint':<16} {'count':>7} {'err%':>6} {'4xx':>5} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8} "
+          f"{'capt p50':>9} {'lag':>7}")
+    for endpoint, row in report['endpoints'].items():
+        cells = [f"{row[key]:>8.1f}" if row[key] is not None else f"{'-':>8}"
+                 for key in ('p50_ms', 'p90_ms', 'p99_ms', 'max_ms')]
+        captured = f"{row['captured_p50_ms']:>9.1f}" if row['captured_p50_ms'] is not None else f"{'-':>9}"
+        print(f"{endpoint:<16} {row['requests']:>7} {row['error_rate'] * 100:>5.1f}% {row['4xx']:>5} "
+              f"{' '.join(cells)} {captured} {row['max_lag_ms']:>6.0f}ms")
+    if report['unmapped_ids']:
+        print(f"{report['unmapped_ids']} request(s) referenced submissions created before the capture started")
+
+
+if __name__ == '__main__':
+    main()
@@ -4,12 +4,23 @@ Tests all endpoints, validation, error handling, and edge cases
 """
 
 from flask.config import Config
+from flask.json.provider import DefaultJSONProvider
 import pytest
 import json
 import io
-from unittest.mock import patch, MagicMock
+import os
+import importlib.util
+from unittest.mock import MagicMock
 from datetime import datetime, timezone
+from decimal import Decimal
 import uuid
+import logging
+import queue
+import threading
+import zipfile
+from concurrent.futures import Future
+
+import app
 
 
 class TestConfig(Config):
@@ -20,3 +31,853 @@ class TestConfig(Config):
     SECRET_KEY = 'test-secret-key'
     SMTP_USERNAME = 'SMTP_USERNAME'
     SMTP_PASSWORD = 'SMTP_PASSWORD'
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Record database side effects instead of needing PostgreSQL."""
+    recorded = []
+    monkeypatch.setattr(app, 'enqueue_notifications',
+                        lambda submission_id, recipients, kind='digest': recorded.append(('queue', kind, recipients)))
+    monkeypatch.setattr(app, 'update_submission',
+                        lambda submission_id, **fields: recorded.append(('update', fields)))
+    return recorded
+
+
+# ======================
+# Notification dispatch
+# ======================
+
+def test_dispatch_notifications_collects_results(monkeypatch):
+    monkeypatch.setattr(app, 'send_email_with_attachment', lambda timeout, ok: ok)
+    results, running = app.dispatch_notifications({'a': {'ok': True}, 'b': {'ok': False}}, timeout=5)
+    assert results == {'a': True, 'b': False}
+    assert running == {}
+
+
+def test_dispatch_notifications_reports_running_sends(monkeypatch):
+    release = threading.Event()
+
+    def send(timeout, slow):
+        if slow:
+            release.wait(5)
+        return True
+
+    monkeypatch.setattr(app, 'send_email_with_attachment', send)
+    results, running = app.dispatch_notifications({'fast': {'slow': False}, 'slow': {'slow': True}}, timeout=0.2)
+    assert results == {'fast': True}
+    assert list(running) == ['slow']
+    release.set()
+    assert running['slow'].result(timeout=5) is True
+
+
+def test_settle_late_notifications_queues_late_failures(calls):
+    submission = app.InsuranceSubmission('individual', {})
+    messages = {'admin': {'recipients': ['insurer@example.com']},
+                'customer': {'recipients': ['me@example.com']}}
+    running = {'admin': Future(), 'customer': Future()}
+    app.settle_late_notifications(submission, messages, running, admin_ok=True)
+    running['admin'].set_result(False)
+    running['customer'].set_result(False)
+    assert ('queue', 'digest', ['insurer@example.com']) in calls
+    assert ('queue', 'confirmation', ['me@example.com']) in calls
+    assert not [call for call in calls if call[0] == 'update']
+
+
+def test_settle_late_notifications_marks_late_admin_success(calls):
+    submission = app.InsuranceSubmission('individual', {})
+    messages = {'admin_1': {'recipients': ['a@example.com']}, 'admin_2': {'recipients': ['b@example.com']}}
+    running = {'admin_1': Future(), 'admin_2': Future()}
+    app.settle_late_notifications(submission, messages, running, admin_ok=True)
+    running['admin_1'].set_result(True)
+    assert calls == []
+    running['admin_2'].set_result(True)
+    assert calls == [('update', {'email_sent': True})]
+
+
+def test_settle_late_notifications_corrects_stats(calls, monkeypatch):
+    counted = []
+    monkeypatch.setattr(app, 'get_db_connection', MagicMock)
+    monkeypatch.setattr(app, 'increment_stats', lambda cursor, counts: counted.extend(counts))
+    submission = app.InsuranceSubmission('individual', {})
+    messages = {'admin_1': {'recipients': ['a@example.com']}, 'admin_2': {'recipients': ['b@example.com']},
+                'customer': {'recipients': ['me@example.com']}}
+    running = {'admin_1': Future(), 'admin_2': Future(), 'customer': Future()}
+    app.settle_late_notifications(submission, messages, running, admin_ok=True)
+    running['admin_1'].set_result(True)
+    running['customer'].set_result(True)
+    running['admin_2'].set_result(True)
+    day = submission.created_at.astimezone(timezone.utc).date()
+    assert [count[2:] for count in counted] == [
+        ('admin_send', 'ok', 1),
+        ('customer_email', 'failed', -1), ('customer_email', 'sent', 1),
+        ('admin_send', 'ok', 1), ('admin_email', 'pending', -1), ('admin_email', 'sent', 1),
+    ]
+    assert {count[:2] for count in counted} == {(day, 'individual')}
+
+
+def test_settle_late_notifications_counts_late_admin_failure(calls, monkeypatch):
+    counted = []
+    monkeypatch.setattr(app, 'get_db_connection', MagicMock)
+    monkeypatch.setattr(app, 'increment_stats', lambda cursor, counts: counted.extend(counts))
+    submission = app.InsuranceSubmission('company', {})
+    running = {'admin': Future()}
+    app.settle_late_notifications(submission, {'admin': {'recipients': ['a@example.com']}}, running, admin_ok=True)
+    running['admin'].set_result(False)
+    assert [count[2:] for count in counted] == [('admin_send', 'failed', 1)]
+
+
+# ======================
+# JSON serialization
+# ======================
+
+JSON_VALUES = [
+    {'created_at': datetime(2026, 3, 1, 10, 30, 15, 250, tzinfo=timezone.utc)},
+    {'naive': datetime(2026, 3, 1, 10, 30)},
+    {'id': uuid.UUID('6f1c2b0e-8d1a-4c57-9a43-2f7e5b9d0c11')},
+    {'premium': Decimal('1250.50')},
+    {1: 'one', 2: ['two']},
+    {'nested': [{'id': uuid.UUID(int=1), 'at': datetime(2026, 1, 1, tzinfo=timezone.utc)}]},
+]
+
+
+@pytest.mark.parametrize('value', JSON_VALUES)
+def test_json_dumps_matches_stdlib(monkeypatch, value):
+    pytest.importorskip('orjson')
+    monkeypatch.setattr(app, 'USE_ORJSON', True)
+    fast = app.json_dumps(value)
+    monkeypatch.setattr(app, 'USE_ORJSON', False)
+    assert json.loads(fast) == json.loads(app.json_dumps(value))
+
+
+@pytest.mark.parametrize('value', JSON_VALUES)
+def test_fast_json_provider_matches_flask(monkeypatch, value):
+    pytest.importorskip('orjson')
+    monkeypatch.setattr(app, 'USE_ORJSON', True)
+    flask_app = app.create_app()
+    fast = app.FastJSONProvider(flask_app).dumps(value)
+    assert json.loads(fast) == json.loads(DefaultJSONProvider(flask_app).dumps(value))
+
+
+# ======================
+# Submission cache and conditional GETs
+# ======================
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = app.LRUCache(max_size=2, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+
+
+def test_lru_cache_expires_entries():
+    cache = app.LRUCache(max_size=2, ttl=60)
+    cache.set('a', 1, ttl=-1)
+    assert cache.get('a') is None
+    cache.set('b', 2)
+    cache.invalidate('b')
+    assert cache.get('b') is None
+
+
+def test_submission_cache_local_ttl_without_redis():
+    cache = app.SubmissionCache(16, 300, local_ttl=5)
+    assert cache.local.ttl == 5
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(app, 'REQUIRE_SIGNED_PDF_LINKS', False)
+    return app.create_app().test_client()
+
+
+def submission_record(pdf_path):
+    now = datetime(2026, 1, 15, tzinfo=timezone.utc)
+    return {'id': 'sub-1', 'submission_type': 'individual', 'submission_data': {},
+            'created_at': now, 'updated_at': now, 'pdf_generated': True, 'pdf_path': pdf_path}
+
+
+def test_download_pdf_not_modified(client, monkeypatch):
+    record = submission_record('missing.pdf')
+    monkeypatch.setattr(app, 'get_submission_record', lambda submission_id: record)
+    response = client.get('/download-pdf/sub-1', headers={'If-None-Match': f'"{app.submission_etag(record)}"'})
+    assert response.status_code == 304
+    assert response.data == b''
+
+
+def test_download_pdf_rereads_moved_file(client, monkeypatch, tmp_path):
+    moved = tmp_path / 'moved.pdf'
+    moved.write_bytes(b'%PDF-1.4')
+    stale = submission_record(str(tmp_path / 'gone.pdf'))
+    fresh = {**submission_record(str(moved)), 'updated_at': datetime(2026, 2, 1, tzinfo=timezone.utc)}
+    records = iter([stale, fresh])
+    monkeypatch.setattr(app, 'get_submission_record', lambda submission_id: next(records))
+    response = client.get('/download-pdf/sub-1')
+    assert response.status_code == 200
+    assert response.data == b'%PDF-1.4'
+    assert response.get_etag()[0] == app.submission_etag(fresh)
+
+
+# ======================
+# PDF storage maintenance
+# ======================
+
+def test_migrate_pdf_layout_removes_old_file_after_commit(monkeypatch, tmp_path):
+    old = tmp_path / 'flat.pdf'
+    old.write_bytes(b'%PDF-1.4')
+    store = app.LocalPDFStore(str(tmp_path / 'store'))
+    created_at = datetime(2026, 1, 15, tzinfo=timezone.utc)
+    committed = []
+
+    def relocate(locators):
+        if locators:
+            assert old.exists()
+            committed.append(dict(locators))
+
+    monkeypatch.setattr(app, 'iter_pdf_rows', lambda where: iter([('sub-1', created_at, str(old))]))
+    monkeypatch.setattr(app, 'relocate_pdfs', relocate)
+    assert app.migrate_pdf_layout(store) == {'moved': 1, 'missing': 0}
+    locator = committed[0]['sub-1']
+    assert not old.exists()
+    with open(store.local_path(locator), 'rb') as f:
+        assert f.read() == b'%PDF-1.4'
+
+
+def test_iter_zip_export_streams_valid_archive(monkeypatch):
+    documents = {'sub-1': [b'%PDF-1.4 first'], 'sub-2': [b'%PDF-1.4 ', b'x' * 100000, b' second']}
+    monkeypatch.setattr(app, 'iter_submission_pdf', lambda submission_id, pdf_path: iter(documents[submission_id]))
+    created_at = datetime(2026, 1, 15, tzinfo=timezone.utc)
+    rows = [{'id': 'sub-1', 'submission_type': 'individual', 'created_at': created_at, 'pdf_path': None},
+            {'id': 'sub-2', 'submission_type': 'company', 'created_at': created_at, 'pdf_path': 'pg:sub-2'}]
+    bundle = zipfile.ZipFile(io.BytesIO(b''.join(app.iter_zip_export(rows))))
+    assert bundle.namelist() == ['2026-01-15_individual_sub-1.pdf', '2026-01-15_company_sub-2.pdf']
+    assert bundle.testzip() is None
+    assert bundle.read('2026-01-15_company_sub-2.pdf') == b''.join(documents['sub-2'])
+
+
+# ======================
+# Submission validation
+# ======================
+
+def company_form(**fields):
+    return {'company_name': 'Acme', 'contact_email': 'ops@acme.com',
+            'contact_phone_number': '+234 801 234 5678', **fields}
+
+
+@pytest.fixture
+def enforce_schema(monkeypatch):
+    monkeypatch.setattr(app, 'SCHEMA_CHECK_MODE', 'enforce')
+    monkeypatch.setattr(app, 'COMPILED_SCHEMAS', {
+        submission_type: app.compile_schema(schema) for submission_type, schema in app.SUBMISSION_SCHEMAS.items()
+    })
+
+
+@pytest.mark.parametrize('count', ['25', '10-49', '250+', '1 - 9'])
+def test_validate_submission_accepts_employee_ranges(enforce_schema, count):
+    assert app.validate_submission('company', company_form(number_of_employees_seeking_coverage=count)) == []
+
+
+def test_validate_submission_type_errors(enforce_schema):
+    errors = app.validate_submission('company', company_form(
+        number_of_employees_seeking_coverage='lots', years_in_operation='-3',
+        preferred_coverage_start_date='next week'))
+    assert [error['field'] for error in errors] == [
+        'number_of_employees_seeking_coverage', 'years_in_operation', 'preferred_coverage_start_date']
+
+
+def test_validate_submission_warns_on_types_by_default():
+    data = company_form(years_in_operation='about five', preferred_coverage_start_date='soon')
+    assert app.validate_submission('company', data) == []
+
+
+def test_validate_submission_enum(enforce_schema):
+    data = {'full_name': 'Ada', 'email': 'ada@example.com', 'phone_number': '08012345678',
+            'preferred_payment_frequency': 'Semi Annually'}
+    assert app.validate_submission('individual', data) == []
+    errors = app.validate_submission('individual', {**data, 'preferred_payment_frequency': 'weekly'})
+    assert [error['field'] for error in errors] == ['preferred_payment_frequency']
+
+
+def test_validate_submission_reports_every_error():
+    errors = app.validate_submission('individual', {'full_name': 'N/A', 'email': 'not-an-email',
+                                                    'phone_number': '123', 'location': 'x' * 201})
+    assert [error['field'] for error in errors] == ['full_name', 'email', 'phone_number', 'location']
+
+
+@pytest.mark.parametrize('value, band', [
+    ('5', '1-9'), ('10-49', '10-49'), (' 50 - 249', '50-249'), ('250+', '250+'),
+    ('1000', '250+'), ('0', 'unspecified'), ('N/A', 'unspecified'), (None, 'unspecified'),
+])
+def test_employee_band(value, band):
+    assert app.employee_band(value) == band
+
+
+# ======================
+# Traffic capture
+# ======================
+
+def test_mask_text_keeps_shape():
+    assert app.mask_text('Ada Lovelace') == 'Xxx Xxxxxxxx'
+    assert app.mask_text('ada.l+1@example.com') == 'xxx.x+0@xxxxxxx.xxx'
+    assert app.mask_text('+234 (801) 234-5678') == '+000 (000) 000-0000'
+    assert app.mask_text('') == ''
+
+
+def test_masked_submission_still_validates():
+    data = {'full_name': 'Ada Lovelace', 'email': 'ada@example.com', 'phone_number': '+234 801 234 5678'}
+    masked = {key: app.mask_text(value) for key, value in data.items()}
+    assert app.validate_submission('individual', masked) == []
+
+
+def test_check_replay_settings_requires_overrides(monkeypatch):
+    for name in app.REPLAY_OVERRIDES:
+        monkeypatch.setenv(name, 'replay')
+    app.check_replay_settings()
+    monkeypatch.delenv('PRIMARY_RECIPIENTS')
+    with pytest.raises(RuntimeError, match='PRIMARY_RECIPIENTS'):
+        app.check_replay_settings()
+
+
+def test_capture_hooks_open_log_once(monkeypatch):
+    opened = []
+
+    def open_capture_log():
+        opened.append(1)
+        monkeypatch.setattr(app, '_capture_listener', MagicMock())
+
+    monkeypatch.setattr(app, 'CAPTURE_ENABLED', True)
+    monkeypatch.setattr(app, '_capture_listener', None)
+    monkeypatch.setattr(app, '_open_capture_log', open_capture_log)
+    monkeypatch.setattr(app.atexit, 'register', lambda func: None)
+    monkeypatch.setattr(app.os, 'register_at_fork', lambda **kwargs: None)
+    app.create_app()
+    app.create_app()
+    assert opened == [1]
+
+
+# ======================
+# Circuit breakers
+# ======================
+
+def test_circuit_breaker_opens_after_threshold():
+    breaker = app.CircuitBreaker('test', failure_threshold=2, reset_timeout=60)
+    breaker.record_failure('boom')
+    assert breaker.state == app.CircuitBreaker.CLOSED
+    breaker.record_failure('boom')
+    assert breaker.state == app.CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert breaker.snapshot()['rejected'] == 1
+    with pytest.raises(app.CircuitOpenError):
+        breaker.call(lambda: None)
+
+
+def test_circuit_breaker_half_open_probe():
+    breaker = app.CircuitBreaker('test', failure_threshold=1, reset_timeout=0)
+    breaker.record_failure('boom')
+    assert breaker.state == app.CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_failure('still down')
+    assert breaker._state == app.CircuitBreaker.OPEN
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == app.CircuitBreaker.CLOSED
+    assert breaker.snapshot()['consecutive_failures'] == 0
+
+
+def test_circuit_breaker_ignores_deadline_exceeded():
+    breaker = app.CircuitBreaker('test', failure_threshold=1, reset_timeout=0)
+    breaker.record_failure('boom')
+
+    def out_of_time():
+        raise app.DeadlineExceeded('database')
+
+    with pytest.raises(app.DeadlineExceeded):
+        breaker.call(out_of_time)
+    assert breaker._state == app.CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+
+
+def test_shortened_smtp_timeout_not_counted(monkeypatch):
+    import smtplib
+
+    def timed_out(*args, **kwargs):
+        raise TimeoutError('timed out')
+
+    breaker = app.CircuitBreaker('smtp', failure_threshold=1)
+    monkeypatch.setattr(app, 'smtp_breaker', breaker)
+    monkeypatch.setattr(smtplib, 'SMTP_SSL', timed_out)
+    assert not app.send_email_with_attachment('s', '<p>x</p>', ['a@example.com'], timeout=2)
+    assert breaker.state == app.CircuitBreaker.CLOSED
+    assert not app.send_email_with_attachment('s', '<p>x</p>', ['a@example.com'], timeout=app.NOTIFICATION_TIMEOUT)
+    assert breaker.state == app.CircuitBreaker.OPEN
+
+
+# ======================
+# Request deadlines
+# ======================
+
+def test_deadline_budget():
+    deadline = app.Deadline(10, reserve=2)
+    assert 9 < deadline.remaining() <= 10
+    assert 7 < deadline.available() <= 8
+    assert deadline.timeout(3) == 3
+    assert 7 < deadline.timeout(30) <= 8
+    deadline.check('pdf', 5)
+    with pytest.raises(app.DeadlineExceeded) as raised:
+        deadline.check('smtp', 9)
+    assert raised.value.stage == 'smtp'
+
+
+class FakePDFGenerator:
+    rendered = 0
+
+    def generate_pdf(self, submission_type, data, submission_id):
+        FakePDFGenerator.rendered += 1
+        return io.BytesIO(b'%PDF-1.4')
+
+
+@pytest.fixture
+def pipeline(monkeypatch, calls):
+    FakePDFGenerator.rendered = 0
+    monkeypatch.setattr(app, 'PDFGenerator', FakePDFGenerator)
+    monkeypatch.setattr(app, 'get_pdf_store', lambda: MagicMock(save=lambda *args: 'stored.pdf'))
+    monkeypatch.setattr(app, 'record_submission_stats', lambda *args: None)
+    return calls
+
+
+def test_process_submission_defers_before_rendering(pipeline):
+    token = app.deadline_var.set(app.Deadline(0.5, reserve=0))
+    try:
+        with pytest.raises(app.DeadlineExceeded):
+            app.process_submission(app.InsuranceSubmission('individual', {}), notify=False)
+    finally:
+        app.deadline_var.reset(token)
+    assert FakePDFGenerator.rendered == 0
+    assert pipeline == []
+
+
+def test_process_submission_lifts_deadline_after_rendering(pipeline, monkeypatch):
+    def update_submission(submission_id, **fields):
+        assert app.current_deadline() is None
+        pipeline.append(('update', fields))
+
+    monkeypatch.setattr(app, 'update_submission', update_submission)
+    token = app.deadline_var.set(app.Deadline(app.DEADLINE_PDF_MIN + 5, reserve=0))
+    try:
+        app.process_submission(app.InsuranceSubmission('individual', {}), notify=False)
+        assert app.current_deadline() is not None
+    finally:
+        app.deadline_var.reset(token)
+    assert pipeline == [('update', {'pdf_generated': True, 'pdf_path': 'stored.pdf'})]
+
+
+def test_process_submission_resume_skips_recorded_stages(pipeline, monkeypatch):
+    dispatched = []
+
+    def dispatch(messages, timeout):
+        dispatched.extend(messages)
+        return {key: True for key in messages}, {}
+
+    monkeypatch.setattr(app, 'dispatch_notifications', dispatch)
+    monkeypatch.setattr(app, 'load_submission_pdf', lambda submission_id, pdf_path: b'%PDF-1.4')
+    submission = app.InsuranceSubmission('individual', {'full_name': 'Ada', 'email': 'ada@example.com'})
+    submission.pdf_generated, submission.pdf_path, submission.email_sent = True, 'stored.pdf', True
+    outcome = app.process_submission(submission)
+    assert FakePDFGenerator.rendered == 0
+    assert dispatched == ['customer']
+    assert outcome == {'admin_email_sent': True, 'admin_notifications_queued': 0, 'customer_email_sent': True}
+    assert pipeline == [('queue', 'digest', []), ('update', {'email_sent': True, 'customer_email_sent': True})]
+
+
+# ======================
+# Submission events
+# ======================
+
+def stream_events(state, *published):
+    subscriber = queue.Queue()
+    for event in published:
+        subscriber.put(event)
+    frames = list(app.iter_submission_events('sub-1', state, subscriber))
+    return [frame.split('\n', 1)[0][len('event: '):] for frame in frames if frame.startswith('event: ')], frames[-1]
+
+
+def test_events_end_without_customer_email(monkeypatch):
+    monkeypatch.setattr(app, 'SSE_MAX_DURATION', 2)
+    state = {'persisted': True, 'has_customer_email': False}
+    events, end = stream_events(state, 'pdf_generated', 'email_sent')
+    assert events == ['persisted', 'pdf_generated', 'email_sent', 'end']
+    assert '"complete":true' in end.replace(' ', '')
+
+
+def test_events_end_when_insurers_queued(monkeypatch):
+    monkeypatch.setattr(app, 'SSE_MAX_DURATION', 2)
+    state = {'persisted': True, 'pdf_generated': True, 'has_customer_email': True}
+    events, _ = stream_events(state, 'email_queued', 'customer_email_sent')
+    assert events == ['persisted', 'pdf_generated', 'email_queued', 'customer_email_sent', 'end']
+
+
+def test_events_wait_for_customer_confirmation(monkeypatch):
+    monkeypatch.setattr(app, 'SSE_MAX_DURATION', 0.2)
+    state = {'persisted': True, 'pdf_generated': True, 'email_sent': True, 'has_customer_email': True}
+    events, end = stream_events(state)
+    assert events[-1] == 'end'
+    assert '"complete":false' in end.replace(' ', '')
+
+
+# ======================
+# Partition maintenance
+# ======================
+
+@pytest.mark.parametrize('month, count, expected', [
+    ((2026, 10, 1), 3, (2027, 1, 1)),
+    ((2026, 1, 1), -1, (2025, 12, 1)),
+    ((2026, 12, 1), 0, (2026, 12, 1)),
+    ((2026, 3, 1), -27, (2023, 12, 1)),
+])
+def test_add_months(month, count, expected):
+    from datetime import date
+    assert app.add_months(date(*month), count) == date(*expected)
+
+
+def test_month_bounds_span_december():
+    from datetime import date
+    start, end = app.month_bounds(date(2026, 12, 1))
+    assert start == datetime(2026, 12, 1, tzinfo=timezone.utc)
+    assert end == datetime(2027, 1, 1, tzinfo=timezone.utc)
+    assert app.partition_name(date(2026, 12, 1)) == 'submissions_y2026m12'
+
+
+def test_retire_partition_returns_pdf_paths():
+    from datetime import date
+    cursor = MagicMock()
+    cursor.fetchall.return_value = [{'pdf_path': '2024/01/a.pdf'}, {'pdf_path': 's3://bucket/b.pdf'}]
+    partition = {'name': 'submissions_y2024m01', 'month': date(2024, 1, 1)}
+    assert app.retire_partition(cursor, partition, drop=True) == ['2024/01/a.pdf', 's3://bucket/b.pdf']
+    statements = [call.args[0] for call in cursor.execute.call_args_list]
+    assert statements[0].startswith('SELECT pdf_path FROM submissions_y2024m01')
+    assert statements[1] == 'ALTER TABLE submissions DETACH PARTITION submissions_y2024m01'
+    assert statements[-1] == 'DROP TABLE submissions_y2024m01'
+
+
+# ======================
+# Bulk ingest
+# ======================
+
+def ingest_line(**fields):
+    record = {'type': 'individual',
+              'data': {'full_name': 'Ada', 'email': 'ada@example.com', 'phone_number': '08012345678'}, **fields}
+    return json.dumps(record).encode()
+
+
+def test_parse_ingest_record_derives_stable_id():
+    line = ingest_line()
+    first = app.parse_ingest_record(line)
+    assert first.submission_type == 'individual'
+    assert first.id == str(uuid.uuid5(app.INGEST_NAMESPACE, line.decode()))
+    assert app.parse_ingest_record(line + b'\n').id == first.id
+    assert app.parse_ingest_record(ingest_line(note='other')).id != first.id
+
+
+def test_parse_ingest_record_keeps_given_id():
+    given = uuid.uuid4()
+    assert app.parse_ingest_record(ingest_line(id=given.hex)).id == str(given)
+
+
+@pytest.mark.parametrize('created_at, expected, offset_hours', [
+    ('2026-03-01T10:30:00', datetime(2026, 3, 1, 10, 30, tzinfo=timezone.utc), 0),
+    ('2026-03-01T10:30:00+01:00', datetime(2026, 3, 1, 9, 30, tzinfo=timezone.utc), 1),
+])
+def test_parse_ingest_record_created_at(created_at, expected, offset_hours):
+    parsed = app.parse_ingest_record(ingest_line(created_at=created_at)).created_at
+    assert parsed == expected
+    assert parsed.utcoffset().total_seconds() == offset_hours * 3600
+
+
+@pytest.mark.parametrize('line, reason', [
+    (b'{"type": "individual", "data":', 'Invalid JSON'),
+    (b'["individual"]', 'Record must be a JSON object'),
+    (ingest_line(id='not-a-uuid'), 'Invalid id'),
+    (ingest_line(created_at='yesterday'), 'Invalid created_at'),
+    (json.dumps({'type': 'individual', 'data': {}}).encode(), 'Record has no form data'),
+])
+def test_parse_ingest_record_rejects(line, reason):
+    with pytest.raises(ValueError, match=reason):
+        app.parse_ingest_record(line)
+
+
+# ======================
+# Memory diagnostics
+# ======================
+
+def test_memory_watchdog_requests_restart_once(caplog):
+    watchdog = app.MemoryWatchdog(budget_bytes=100 * 1048576)
+    watchdog.record('submit', 90 * 1048576, 99 * 1048576)
+    assert not watchdog.restart_requested
+    with caplog.at_level(logging.WARNING, logger=app.logger.name):
+        watchdog.record('submit', 99 * 1048576, 101 * 1048576)
+        watchdog.record('submit', 101 * 1048576, 102 * 1048576)
+    assert watchdog.restart_requested
+    assert len([record for record in caplog.records if 'over the' in record.getMessage()]) == 1
+
+
+def test_memory_watchdog_without_budget_never_restarts():
+    watchdog = app.MemoryWatchdog(budget_bytes=0)
+    watchdog.record('submit', 0, 10 * 1048576 * 1024)
+    assert not watchdog.restart_requested
+
+
+def test_memory_watchdog_route_summary():
+    watchdog = app.MemoryWatchdog(budget_bytes=0)
+    watchdog.record('submit', 0, 3 * 1048576)
+    watchdog.record('submit', 0, 1048576)
+    watchdog.record('submit', 1048576, 1048576 - 512 * 1024)
+    watchdog.record('health', 0, 10240)
+    assert watchdog.route_summary() == {
+        'submit': {'requests': 3, 'avg_growth_kb': 1194.7, 'growth_mb': 3.5, 'max_growth_kb': 3072.0},
+        'health': {'requests': 1, 'avg_growth_kb': 10.0, 'growth_mb': 0.01, 'max_growth_kb': 10.0},
+    }
+    assert list(watchdog.route_summary()) == ['submit', 'health']
+    assert watchdog.routes['submit']['growth_bytes'] == 3.5 * 1048576
+
+
+# ======================
+# Profiling
+# ======================
+
+class FakeStats:
+    def __init__(self, stats):
+        self.stats = stats
+
+
+def test_pstats_to_collapsed_attributes_time_along_edges():
+    main, helper, leaf = ('/srv/app.py', 1, 'main'), ('/srv/app.py', 10, 'helper'), ('~', 0, '<built-in leaf>')
+    stats = FakeStats({
+        main: (1, 1, 0.001, 0.005, {}),
+        helper: (2, 2, 0.002, 0.004, {main: (2, 2, 0.002, 0.004)}),
+        leaf: (1, 1, 0.002, 0.002, {helper: (1, 1, 0.002, 0.002)}),
+    })
+    assert app.pstats_to_collapsed(stats) == [
+        'main (app.py:1) 1000',
+        'main (app.py:1);helper (app.py:10) 2000',
+        'main (app.py:1);helper (app.py:10);<built-in leaf> 2000',
+    ]
+
+
+def test_pstats_to_collapsed_splits_shared_callee_and_stops_recursion():
+    a, b, shared = ('a.py', 1, 'a'), ('b.py', 1, 'b'), ('s.py', 1, 'shared')
+    stats = FakeStats({
+        a: (1, 1, 0.0, 0.003, {}),
+        b: (1, 1, 0.0, 0.001, {}),
+        shared: (3, 2, 0.004, 0.004, {a: (1, 1, 0.003, 0.003), b: (1, 1, 0.001, 0.001),
+                                      shared: (1, 1, 0.0, 0.0)}),
+    })
+    assert app.pstats_to_collapsed(stats) == ['a (a.py:1);shared (s.py:1) 3000', 'b (b.py:1);shared (s.py:1) 1000']
+
+
+# ======================
+# Signed links
+# ======================
+
+@pytest.fixture
+def link_secret(monkeypatch):
+    monkeypatch.setattr(app, 'PDF_LINK_SECRET', 'test-link-secret')
+
+
+def test_pdf_token_round_trip(link_secret):
+    token = app.make_pdf_token('sub-1')
+    assert app.verify_pdf_token('sub-1', token)
+    assert not app.verify_pdf_token('sub-2', token)
+    assert app.pdf_download_path('sub-1').startswith('/download-pdf/sub-1?token=')
+
+
+def test_pdf_token_expiry(link_secret):
+    assert not app.verify_pdf_token('sub-1', app.make_pdf_token('sub-1', ttl=-1))
+
+
+def test_pdf_token_scope_mismatch(link_secret):
+    upload = app.make_pdf_token('sub-1', scope='upload')
+    assert app.verify_pdf_token('sub-1', upload, scope='upload')
+    assert not app.verify_pdf_token('sub-1', upload)
+    assert not app.verify_pdf_token('sub-1', app.make_pdf_token('sub-1'), scope='upload')
+
+
+@pytest.mark.parametrize('token', ['', 'garbage', 'abc.def', '99999999999.'])
+def test_pdf_token_rejects_malformed(link_secret, token):
+    assert not app.verify_pdf_token('sub-1', token)
+
+
+def test_download_pdf_rejects_bad_token(link_secret, client):
+    response = client.get('/download-pdf/sub-1?token=' + app.make_pdf_token('sub-2'))
+    assert response.status_code == 403
+
+
+# ======================
+# Supporting documents
+# ======================
+
+def test_document_writer_accepts_chunked_pdf():
+    import hashlib
+    writer = app.DocumentWriter('../scan 1.pdf', budget=1024)
+    for chunk in (b'%PD', b'F-1.7 body', b' more'):
+        writer.write(chunk)
+    writer.finish()
+    assert writer.filename == 'scan_1.pdf'
+    assert writer.content_type == 'application/pdf'
+    assert writer.size == 18
+    assert writer.sha256.hexdigest() == hashlib.sha256(b'%PDF-1.7 body more').hexdigest()
+    assert writer.spool.read() == b'%PDF-1.7 body more'
+    writer.close()
+
+
+def test_document_writer_rejects_unknown_type():
+    writer = app.DocumentWriter('notes.txt', budget=1024)
+    with pytest.raises(app.DocumentRejected) as rejected:
+        writer.write(b'plain text notes')
+    assert rejected.value.status == 415
+
+
+def test_document_writer_rejects_short_unknown_file_on_finish():
+    writer = app.DocumentWriter('x.pdf', budget=1024)
+    writer.write(b'%P')
+    with pytest.raises(app.DocumentRejected):
+        writer.finish()
+
+
+def test_document_writer_file_limit(monkeypatch):
+    monkeypatch.setattr(app, 'DOCUMENT_MAX_FILE_BYTES', 16)
+    writer = app.DocumentWriter('big.png', budget=1024)
+    writer.write(b'\x89PNG\r\n\x1a\n' + b'0' * 8)
+    with pytest.raises(app.DocumentRejected, match='per-file limit') as rejected:
+        writer.write(b'0')
+    assert rejected.value.status == 413
+
+
+def test_document_writer_submission_budget():
+    writer = app.DocumentWriter('photo.jpg', budget=10)
+    writer.write(b'\xff\xd8\xff' + b'0' * 7)
+    with pytest.raises(app.DocumentRejected, match='for this submission') as rejected:
+        writer.write(b'0')
+    assert rejected.value.status == 413
+
+
+# ======================
+# Search
+# ======================
+
+@pytest.mark.parametrize('query, tsquery', [
+    ('Diabetes, Kigali!', 'diabetes:* & kigali:*'),
+    ("o'brien & co | ltd:*", 'o:* & brien:* & co:* & ltd:*'),
+    ('\uff2b\uff29\uff27\uff21\uff2c\uff29 \ufb01sh', 'kigali:* & fish:*'),
+    (' '.join(f'term{i}' for i in range(20)), ' & '.join(f'term{i}:*' for i in range(app.SEARCH_MAX_TERMS))),
+    ('', ''),
+    ('!!! --- ...', ''),
+])
+def test_build_prefix_tsquery(query, tsquery):
+    assert app.build_prefix_tsquery(query) == tsquery
+
+
+def test_search_submissions_skips_empty_query(monkeypatch):
+    monkeypatch.setattr(app, 'get_db_connection', MagicMock(side_effect=AssertionError('queried')))
+    assert app.search_submissions('  ?! ') == []
+
+
+def test_search_weights_match_migration():
+    path = os.path.join(os.path.dirname(__file__), 'migrations', 'versions',
+                        'c3540e316d57_promote_submission_data_columns.py')
+    spec = importlib.util.spec_from_file_location('promote_submission_data_columns', path)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    assert migration.SEARCH_FIELD_WEIGHTS == app.SEARCH_FIELD_WEIGHTS
+
+
+# ======================
+# Query instrumentation
+# ======================
+
+@pytest.mark.parametrize('query, normalized', [
+    ('SELECT *  FROM submissions\n   WHERE id = %s', 'SELECT * FROM submissions WHERE id = %s'),
+    ("UPDATE s SET a = 'it''s', b = 12.5 WHERE c = 3", 'UPDATE s SET a = ?, b = ? WHERE c = ?'),
+    ('INSERT INTO t (a, b) VALUES (1, 2), (3, 4), (5, 6)', 'INSERT INTO t (a, b) VALUES (?, ?) ...'),
+    ('SELECT id FROM submissions_y2026m10', 'SELECT id FROM submissions_y2026m10'),
+])
+def test_normalize_query(query, normalized):
+    assert app.normalize_query(query) == normalized
+
+
+def test_query_label_and_param_shape():
+    assert app.query_label('  update submissions set x = 1') == 'UPDATE submissions'
+    assert app.query_label('SELECT 1') == 'SELECT'
+    assert app.param_shape(('ada@example.com', 3, [1, 2], None)) == ['str', 'int', 'list[2]', 'NoneType']
+    assert app.param_shape({'email': 'ada@example.com'}) == {'email': 'str'}
+
+
+def test_anonymize_body_keeps_non_identifying_fields():
+    body = {'type': 'company', 'data': {'company_name': 'Acme Ltd', 'number_of_employees_seeking_coverage': '10-49',
+                                        'years_in_operation': '12'}}
+    assert app.anonymize_body(body) == {'type': 'company', 'data': {
+        'company_name': 'Xxxx Xxx', 'number_of_employees_seeking_coverage': '10-49', 'years_in_operation': '12'}}
+
+
+def test_pdf_tokens_disabled_without_secret(monkeypatch):
+    monkeypatch.setattr(app, 'PDF_LINK_SECRET', None)
+    with pytest.raises(RuntimeError):
+        app.make_pdf_token('sub-1', scope='upload')
+    forged = '9999999999.' + 'A' * 43
+    assert not app.verify_pdf_token('sub-1', forged, scope='upload')
+    assert app.pdf_download_path('sub-1') == '/download-pdf/sub-1'
+
+
+def test_signed_links_required_without_secret(monkeypatch):
+    monkeypatch.setattr(app, 'PDF_LINK_SECRET', None)
+    monkeypatch.setattr(app, 'REQUIRE_SIGNED_PDF_LINKS', True)
+    with pytest.raises(RuntimeError, match='REQUIRE_SIGNED_PDF_LINKS'):
+        app.create_app()
+
+
+# ======================
+# Logging
+# ======================
+
+def test_queued_records_keep_exception_for_json_formatter():
+    log_queue = queue.SimpleQueue()
+    logger = logging.getLogger('test.deferred')
+    logger.propagate = False
+    logger.handlers = [app.DeferredQueueHandler(log_queue)]
+    try:
+        raise ValueError('broken')
+    except ValueError:
+        logger.exception('Failed for %s', 'sub-1')
+    record = log_queue.get_nowait()
+    entry = json.loads(app.JsonFormatter().format(record))
+    assert entry['message'] == 'Failed for sub-1'
+    assert 'ValueError: broken' in entry['exception']
+
+
+# ======================
+# Digests
+# ======================
+
+@pytest.fixture
+def db(monkeypatch):
+    conn = MagicMock()
+    monkeypatch.setattr(app, 'get_db_connection', lambda: conn)
+    return conn.cursor.return_value
+
+
+def test_fetch_pending_notifications_skips_exhausted_rows(db):
+    db.fetchall.return_value = [{'queue_id': 1, 'recipient': 'a@example.com'}]
+    assert app.fetch_pending_notifications() == {'a@example.com': [{'queue_id': 1, 'recipient': 'a@example.com'}]}
+    query, params = db.execute.call_args.args
+    assert 'q.attempts < %s' in query
+    assert params == (app.NOTIFICATION_MAX_ATTEMPTS,)
+
+
+def test_record_digest_results_counts_failures_by_fetched_rows(db):
+    assert app.record_digest_results([], {7: 'SMTP send failed', 9: 'SMTP send failed'}) == 0
+    query, params = db.execute.call_args.args
+    assert 'WHERE id = ANY(%s)' in query
+    assert params == ('SMTP send failed', [7, 9])